@@ -1,31 +1,19 @@
 import streamlit as st
 import os
 from dotenv import load_dotenv
-from main import download_youtube_transcript, get_video_info, analyze_with_gpt, save_to_notion, search_youtube_videos
+from main import search_youtube_videos, get_search_quota_stats, filter_search_results
+from jobs import get_job_manager, job_key, STAGE_LABELS, PENDING, RUNNING, DONE, FAILED
+import metrics
+from search_index import get_search_index, HIGHLIGHT_START, HIGHLIGHT_END
+from prefetch import get_prefetcher, cancel_prefetch
 from pytube import YouTube
-from youtube_transcript_api import YouTubeTranscriptApi
 from langchain_teddynote import logging
+import html
 import re
 import time
+import uuid
 
-# 프록시 설정 (스트림릿 클라우드 환경에서만 사용)
-if 'STREAMLIT_SERVER' in os.environ:
-    proxies = {
-        'http': os.getenv('HTTP_PROXY'),
-        'https': os.getenv('HTTPS_PROXY')
-    }
-    YouTubeTranscriptApi._proxies = proxies
-
-# User-Agent 설정
-headers = {
-    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-}
-
-# YouTubeTranscriptApi에 headers 전달
-YouTubeTranscriptApi._headers = headers
-
-# 타임아웃 설정
-YouTubeTranscriptApi._timeout = 30  # 30초로 설정
+# 자막 요청 프록시/재시도는 fetch_scheduler가 담당 (YOUNOTION_PROXIES, Streamlit Cloud에서는 HTTP(S)_PROXY)
 
 # 페이지 설정
 st.set_page_config(
@@ -40,6 +28,34 @@ load_dotenv()
 # 프로젝트 이름
 logging.langsmith("jmango-yp")
 
+# YOUNOTION_METRICS_PORT가 설정되어 있으면 Prometheus /metrics 엔드포인트 시작 (프로세스당 한 번)
+if os.getenv('YOUNOTION_METRICS_PORT'):
+    metrics.start_metrics_server(os.getenv('YOUNOTION_METRICS_PORT'))
+
+# 자막 선택 우선순위: (언어 코드, 자동 생성 여부)
+APP_TRANSCRIPT_PRIORITY = [('ko', True), ('en', True), ('ko', False), ('en', False)]
+
+# 분석 진행 상황 갱신 주기(초)
+JOB_POLL_INTERVAL = 1.0
+
+# 로컬 검색 설정 (CLI가 자막/분석 파일을 저장하는 디렉토리)
+LOCAL_ARCHIVE_DIR = "subtitles"
+LOCAL_SEARCH_LIMIT = 10
+
+# 검색 결과 거르기/정렬 (사이드바, 분 단위 최대 길이: None이면 제한 없음)
+MAX_DURATION_OPTIONS = [None, 10, 30, 60, 120]
+SORT_LABELS = {
+    'relevance': "관련도순",
+    'duration_asc': "짧은 영상부터",
+    'duration_desc': "긴 영상부터",
+    'captions_first': "업로더 자막 있는 영상부터",
+}
+# 이보다 긴 영상은 분석 버튼 아래에 경고 표시 (초)
+LONG_VIDEO_SECONDS = 2 * 3600
+
+# 검색 결과 자막 미리 받기 기본값 (사이드바에서 세션마다 끄고 켤 수 있음)
+PREFETCH_DEFAULT = os.getenv('YOUNOTION_PREFETCH') == '1'
+
 # API 키 가져오기
 def get_api_keys():
     return {
@@ -59,11 +75,70 @@ if 'search_query' not in st.session_state:
     st.session_state.search_query = ""
 if 'search_offset' not in st.session_state:
     st.session_state.search_offset = 0
+if 'jobs' not in st.session_state:
+    st.session_state.jobs = {}
+if 'local_results' not in st.session_state:
+    st.session_state.local_results = []
+if 'session_id' not in st.session_state:
+    st.session_state.session_id = uuid.uuid4().hex
+if 'prefetch' not in st.session_state:
+    st.session_state.prefetch = PREFETCH_DEFAULT
+
+def needs_retry(job):
+    """실패했거나, 분석을 요청했는데 분석 결과 없이 끝난 작업"""
+    if job.state == FAILED:
+        return True
+    return job.state == DONE and job.options['analysis'] and not (job.result or {}).get('analysis_text')
+
+def forget_failed_jobs():
+    """세션이 기억하는 작업 중 다시 실행해야 할 작업을 지움 (다음에 요청하면 새로 제출됨)"""
+    for key, job in list(st.session_state.jobs.items()):
+        if needs_retry(job):
+            del st.session_state.jobs[key]
+
+def visible_results(videos=None):
+    """사이드바의 자막/길이 조건과 정렬을 적용한 검색 결과"""
+    max_minutes = st.session_state.get('max_duration_minutes')
+    return filter_search_results(
+        st.session_state.search_results if videos is None else videos,
+        captions_only=st.session_state.get('captions_only', False),
+        max_duration=max_minutes * 60 if max_minutes else None,
+        sort_by=st.session_state.get('sort_by', 'relevance')
+    )
+
+def prefetch_results(videos):
+    """보이는 검색 결과의 자막을 미리 받기 (새 검색이면 이전 결과의 대기 중인 요청은 취소)"""
+    if st.session_state.prefetch:
+        get_prefetcher().prefetch(st.session_state.session_id, videos, APP_TRANSCRIPT_PRIORITY)
+    else:
+        cancel_prefetch(st.session_state.session_id)
+
+def search_local(query):
+    """저장된 자막/분석 리포트에서 검색 (API 호출 없음), 영상마다 가장 잘 맞는 문서 하나만 반환"""
+    index = get_search_index()
+    index.sync_directory(LOCAL_ARCHIVE_DIR)
+    results = {}
+    for result in index.search(query, limit=LOCAL_SEARCH_LIMIT * 2):
+        results.setdefault(result['video_id'], result)
+    return list(results.values())[:LOCAL_SEARCH_LIMIT]
+
+def render_snippet(snippet):
+    """검색 snippet을 HTML로 변환 (일치 부분 강조)"""
+    escaped = html.escape(snippet).replace("\n", " ")
+    return escaped.replace(HIGHLIGHT_START, "<mark>").replace(HIGHLIGHT_END, "</mark>")
 
 # run_search 함수 정의 (검색 실행 로직)
 def run_search():
     if st.session_state.search_input.strip():
-        with st.spinner("🔍 검색 중..."):
+        # 이미 본 영상은 로컬 색인에서 먼저 찾음
+        with metrics.span('local_search'):
+            st.session_state.local_results = search_local(st.session_state.search_input)
+        st.session_state.search_query = st.session_state.search_input
+        if st.session_state.get('local_only'):
+            st.session_state.search_results = []
+            prefetch_results([])
+            return
+        with st.spinner("🔍 검색 중..."), metrics.span('search'):
             videos = search_youtube_videos(
                 st.session_state.search_input,
                 max_results=10,
@@ -71,16 +146,19 @@ def run_search():
             )
             st.session_state.search_results = videos
             st.session_state.search_query = st.session_state.search_input
+        prefetch_results(visible_results(videos))
 
 # --- 초기화 함수 정의 ---
 def reset_search():
     if "search_input" in st.session_state:
         del st.session_state["search_input"]
     st.session_state.search_results = []
+    st.session_state.local_results = []
     st.session_state.search_query = ""
     st.session_state.video_url = ""
     st.session_state.results = None
     st.session_state.search_offset = 0
+    prefetch_results([])
     st.rerun()
 
 # --- 메인 화면 ---
@@ -96,6 +174,7 @@ with st.sidebar:
         key="search_input",
         on_change=run_search
     )
+    st.checkbox("저장된 영상에서만 검색 (API 쿼터 사용 안 함)", key="local_only")
     btn_col1, btn_col2 = st.columns(2)
     with btn_col1:
         if st.button("검색", key="search_button"):
@@ -103,6 +182,36 @@ with st.sidebar:
     with btn_col2:
         if st.button("초기화", key="reset_button"):
             reset_search()
+    st.caption(f"YouTube API 쿼터 사용량: {get_search_quota_stats()['quota_units']:,} units")
+    # 조건을 바꾸면 보이는 결과만 미리 받도록 갱신
+    st.checkbox(
+        "업로더 자막이 있는 영상만",
+        key="captions_only",
+        help="자동 생성 자막만 있는 영상도 제외됩니다.",
+        on_change=lambda: prefetch_results(visible_results())
+    )
+    st.selectbox(
+        "최대 길이",
+        MAX_DURATION_OPTIONS,
+        format_func=lambda minutes: f"{minutes}분" if minutes else "제한 없음",
+        key="max_duration_minutes",
+        on_change=lambda: prefetch_results(visible_results())
+    )
+    st.selectbox(
+        "정렬",
+        list(SORT_LABELS),
+        format_func=SORT_LABELS.get,
+        key="sort_by",
+        on_change=lambda: prefetch_results(visible_results())
+    )
+    st.checkbox("검색 결과 자막 미리 받기", key="prefetch")
+    if st.session_state.prefetch:
+        stats = get_prefetcher().stats()
+        hit_rate = f"{stats['hit_rate']:.0%}" if stats['hit_rate'] is not None else "-"
+        st.caption(
+            f"미리 받기 적중률 {hit_rate} (적중 {stats['hit'] + stats['late_hit']} / 미스 {stats['miss']} / "
+            f"쓰이지 않음 {stats['wasted']} / 취소 {stats['cancelled']})"
+        )
 
     st.markdown("---")
     st.markdown("#### 또는 직접 유튜브 URL 입력")
@@ -110,6 +219,7 @@ with st.sidebar:
     def analyze_direct_url():
         url_input = st.session_state.get("direct_url_input", "")
         if url_input.strip():
+            forget_failed_jobs()
             st.session_state.video_url = url_input.strip()
             st.session_state.results = None
         else:
@@ -124,11 +234,40 @@ with st.sidebar:
     if st.button("이 URL 분석", key="analyze_direct_url"):
         analyze_direct_url()
 
+# 로컬 검색 결과 (이전에 분석한 영상)
+if st.session_state.local_results:
+    st.markdown(f"### 📚 '{st.session_state.search_query}' 저장된 영상")
+    for result in st.session_state.local_results:
+        kind_label = "분석" if result['kind'] == 'analysis' else "자막"
+        st.markdown(
+            f"**{html.escape(result['title'])}** · 👤 {html.escape(result['channel'] or '')} · {kind_label}<br>"
+            f"<span style='color:#555; font-size:0.9em;'>{render_snippet(result['snippet'])}</span>",
+            unsafe_allow_html=True
+        )
+        if st.button("이 영상 분석하기", key=f"local_{result['video_id']}"):
+            forget_failed_jobs()
+            st.session_state.results = None
+            st.session_state.video_url = result['url']
+            st.rerun()
+elif st.session_state.search_query and st.session_state.get('local_only'):
+    st.info("저장된 영상 중 일치하는 결과가 없습니다.")
+
 # 항상 세션 상태의 검색 결과를 보여줌
 if st.session_state.search_results:
     st.markdown(f"### 📺 '{st.session_state.search_query}' 검색 결과")
+    shown = visible_results()
+    hidden = len(st.session_state.search_results) - len(shown)
+    if hidden:
+        st.caption(f"조건에 맞지 않는 영상 {hidden}개를 숨겼습니다.")
     cols = st.columns(5)  # 5열 카드형, 10개면 2줄로 나옴
-    for idx, video in enumerate(st.session_state.search_results):
+    for idx, video in enumerate(shown):
+        # 길이/자막 정보는 조회에 실패하면 없음 (None)
+        badges = []
+        if video.get('duration'):
+            badges.append(f"⏱ {video['duration']}")
+        if video.get('has_captions'):
+            badges.append("CC")
+        is_live = video.get('duration_seconds') == 0
         with cols[idx % 5]:
             st.markdown(
                 f"""
@@ -136,14 +275,23 @@ if st.session_state.search_results:
                     <img src="{video['thumbnail']}" width="100%" style="border-radius:6px; margin-bottom:4px; max-height:90px; object-fit:cover;">
                     <div style="font-weight:bold; font-size:0.95em; margin-bottom:2px; white-space:nowrap; overflow:hidden; text-overflow:ellipsis;">{video['title']}</div>
                     <div style="color:#666; font-size:0.85em; margin-bottom:4px; white-space:nowrap; overflow:hidden; text-overflow:ellipsis;">👤 {video['channel']}</div>
+                    <div style="color:#888; font-size:0.8em; min-height:1.2em;">{" · ".join(badges)}</div>
                 </div>
                 """,
                 unsafe_allow_html=True
             )
-            if st.button("이 영상 분석하기", key=f"select_{video['video_id']}"):
+            if st.button(
+                "이 영상 분석하기",
+                key=f"select_{video['video_id']}",
+                disabled=is_live,
+                help="라이브 중인 영상은 자막을 받을 수 없습니다." if is_live else None
+            ):
+                forget_failed_jobs()
                 st.session_state.results = None  # 항상 결과 초기화
                 st.session_state.video_url = video['url']
                 st.rerun()
+            if (video.get('duration_seconds') or 0) > LONG_VIDEO_SECONDS:
+                st.caption("⚠️ 긴 영상이라 분석에 시간이 오래 걸립니다.")
     # 페이지네이션 버튼 (이전/다음)
     st.markdown("<div style='height: 24px;'></div>", unsafe_allow_html=True)  # 카드와 버튼 사이 여백
 
@@ -167,84 +315,52 @@ if st.session_state.search_results:
 # st.write(f"분석 시작 조건: {bool(st.session_state.video_url)}")
 
 # 분석 시작 처리
+# 분석은 (video_id, 옵션) 단위 작업으로 백그라운드에서 한 번만 실행하고,
+# 이 화면은 진행 상황을 주기적으로 조회해서 보여준다 (재실행 시에는 저장된 결과만 다시 그림)
+job_in_progress = False
 if st.session_state.video_url:
     video_url = st.session_state.video_url
     try:
-        # 자막 다운로드 및 분석
         video_id = YouTube(video_url).video_id
-        transcript = None
-        used_language = None
-
-        try:
-            # 자동 생성 자막만 시도 (한국어 → 영어 순서)
-            transcript = None
-            used_language = None
-            try:
-                st.info("🔍 한국어 자동 생성 자막을 찾는 중...")
-                transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-                auto_generated = transcript_list.find_generated_transcript(['ko'])
-                if auto_generated:
-                    transcript = auto_generated.fetch()
-                    used_language = 'ko'
-                    st.success("✅ 한국어 자동 생성 스크립트 생성 성공")
-                else:
-                    st.warning("⚠️ 한국어 자동 생성 자막을 찾을 수 없습니다.")
-            except Exception as e:
-                st.warning(f"⚠️ 한국어 자동 생성 자막 시도 실패: {str(e)}")
-                # 영어 자동 생성 자막만 시도
-                try:
-                    st.info("🔍 영어 자동 생성 자막을 찾는 중...")
-                    transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-                    auto_generated = transcript_list.find_generated_transcript(['en'])
-                    if auto_generated:
-                        transcript = auto_generated.fetch()
-                        used_language = 'en'
-                        st.success("✅ 영어 자동 생성 스크립트 생성 성공")
-                    else:
-                        st.warning("⚠️ 영어 자동 생성 자막을 찾을 수 없습니다.")
-                except Exception as e:
-                    st.warning(f"⚠️ 영어 자동 생성 자막 시도 실패: {str(e)}")
-                    transcript = None
-                    used_language = None
-
-            if transcript:
-                # Get video info
-                title, channel = get_video_info(video_url)
-                transcript_text = "\n".join([f"{item['text']}" for item in transcript])
-                api_keys = get_api_keys()
-                if api_keys['openai']:
-                    with st.spinner('🤖 AI가 영상을 분석하고 있습니다...'):
-                        analysis_text = analyze_with_gpt(transcript_text, title, channel, video_url, api_keys['openai'])
-                        if analysis_text:
-                            if api_keys['notion'] and api_keys['notion_db']:
-                                with st.spinner('📝 Notion에 저장 중...'):
-                                    notion_url = save_to_notion(
-                                        analysis_text, 
-                                        title, 
-                                        channel, 
-                                        video_url, 
-                                        api_keys['notion_db'], 
-                                        api_keys['notion']
-                                    )
-                                    if notion_url:
-                                        st.success("✅ Notion에 저장되었습니다. 결과에서 링크를 확인하세요.")
-                                    else:
-                                        st.error("❌ Notion 저장에 실패했습니다.")
-                        else:
-                            st.error("❌ AI 분석에 실패했습니다.")
-                st.session_state.results = {
-                    'transcript': transcript,
-                    'transcript_text': transcript_text,
-                    'analysis_text': analysis_text if 'analysis_text' in locals() else None,
-                    'notion_url': notion_url if 'notion_url' in locals() else None,
-                    'language': used_language,
-                    'title': title,
-                    'channel': channel
-                }
-        except Exception as e:
-            st.error(f"❌ 오류가 발생했습니다: {str(e)}")
-            transcript = None
-            used_language = None
+        api_keys = get_api_keys()
+        options = {
+            # 자동 생성 자막 우선 (한국어 → 영어), 없으면 수동 자막
+            'priority': APP_TRANSCRIPT_PRIORITY,
+            'analysis': bool(api_keys['openai']),
+            'notion': bool(api_keys['notion'] and api_keys['notion_db']),
+        }
+        key = job_key(video_id, options)
+        job = st.session_state.jobs.get(key)
+        # 실패한 작업은 분석 버튼이나 "다시 시도"를 누르면 세션에서 지워지므로 여기서 새로 제출됨
+        if job is None:
+            # 다른 세션에서 같은 영상을 분석 중이면 그 작업에 합류
+            job = get_job_manager().submit(video_id, video_url, options, api_keys)
+            st.session_state.jobs[key] = job
+
+        if job.state in (PENDING, RUNNING):
+            job_in_progress = True
+            position = get_job_manager().queue_position(job)
+            stage_label = STAGE_LABELS.get(job.stage, "준비 중")
+            if position:
+                st.info(f"⏳ {stage_label} 중... (대기 순번 {position})")
+            else:
+                st.info(f"🤖 {stage_label} 중...")
+            # 생성 중인 GPT 응답 미리 보기
+            if job.partial:
+                st.markdown(job.partial_text)
+        else:
+            for level, message in job.notices:
+                getattr(st, level)(message)
+            if job.state == DONE:
+                st.session_state.results = job.result
+            elif job.state == FAILED:
+                # 자막까지 받고 분석/Notion 저장에 실패했으면 받은 자막은 보여줌
+                st.session_state.results = job.result
+                st.error(f"❌ 오류가 발생했습니다: {job.error}")
+                if st.button("다시 시도", key="retry_job"):
+                    del st.session_state.jobs[key]
+                    st.session_state.results = None
+                    st.rerun()
     except Exception as e:
         st.error(f"❌ 오류가 발생했습니다: {str(e)}")
         if hasattr(e, 'response'):
@@ -253,16 +369,17 @@ if st.session_state.video_url:
 # 결과 표시 (세션 상태에서 가져옴)
 if st.session_state.results:
     results = st.session_state.results
-    st.success("✅ 분석이 완료되었습니다!")
+    if results['analysis_text'] or not get_api_keys()['openai']:
+        st.success("✅ 분석이 완료되었습니다!")
     results_container = st.container()
     
     with results_container:
         col1, col2 = st.columns(2)
         with col1:
-            if results['transcript_text']:
+            if results['transcript']:
                 st.download_button(
                     "📥 전체 스크립트 다운로드",
-                    results['transcript_text'],
+                    results['transcript'].plain_text(),
                     file_name=f"full_transcript_{results['language']}.txt",
                     mime="text/plain",
                     key="full_transcript_download"
@@ -280,30 +397,14 @@ if st.session_state.results:
                 st.markdown("### 📝 Notion")
                 st.markdown(f"[Notion에서 보기]({results['notion_url']})")
 
+        if results['analysis_text']:
+            st.markdown(results['analysis_text'])
+
 # 푸터
 st.markdown("---")
 st.markdown("Made by jmhanmu@gmail.com❤️ ")
 
-def get_transcript_with_retry(video_id, languages, max_retries=3, delay=2):
-    for attempt in range(max_retries):
-        try:
-            return YouTubeTranscriptApi.get_transcript(video_id, languages=languages)
-        except Exception as e:
-            if attempt < max_retries - 1:
-                time.sleep(delay)
-                continue
-            raise e
-
-def check_transcript_availability(video_id):
-    try:
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
-        return {
-            'available': True,
-            'languages': [t.language_code for t in transcript_list],
-            'generated': [t.language_code for t in transcript_list if t.is_generated]
-        }
-    except Exception as e:
-        return {
-            'available': False,
-            'error': str(e)
-        }
+# 분석이 진행 중이면 잠시 후 다시 그려서 진행 상황 갱신
+if job_in_progress:
+    time.sleep(JOB_POLL_INTERVAL)
+    st.rerun()
@@ -0,0 +1,267 @@
+"""
+여러 YouTube URL을 한 번에 처리하는 배치 모드
+
+단계(영상 정보 → 자막 → GPT 분석 → Notion 저장)마다 별도의 워커 풀을 두고
+영상들을 파이프라인으로 흘려보낸다. 각 단계의 동시 실행 수는 개별적으로 제한되며,
+영상 하나의 처리가 끝날 때마다 결과를 NDJSON 한 줄로 출력한다.
+
+사용법:
+    python batch.py urls.txt
+    cat urls.txt | python batch.py - --analysis 4 --notion 2
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from main import (
+    extract_video_id,
+    get_video_info,
+    fetch_transcript,
+    write_transcript_file,
+    analyze_with_gpt,
+    save_analysis_report,
+    save_to_notion_async,
+    find_analyzed_duplicate,
+    reused_analysis,
+    DUPLICATE_ACTIONS,
+)
+from duplicate_index import get_duplicate_index
+from notion_writer import NotionWriter
+import metrics
+from video_metadata import fetch_video_metadata_batch
+
+# 단계별 기본 동시 실행 수
+DEFAULT_CONCURRENCY = {
+    'metadata': 4,
+    'transcript': 4,
+    'analysis': 2,
+    'notion': 1,
+}
+
+def read_urls(source):
+    """파일 경로(또는 '-'이면 표준입력)에서 URL 목록 읽기 (빈 줄, # 주석 제외)"""
+    if source == '-':
+        lines = sys.stdin.read().splitlines()
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+
+def dedup_urls(urls):
+    """
+    video_id 기준으로 중복 URL 제거
+    반환값: ([(video_id, url), ...], [유효하지 않은 URL, ...])
+    """
+    seen = set()
+    videos = []
+    invalid = []
+    for url in urls:
+        video_id = extract_video_id(url)
+        if not video_id:
+            invalid.append(url)
+            continue
+        if video_id in seen:
+            continue
+        seen.add(video_id)
+        videos.append((video_id, url))
+    return videos, invalid
+
+def run_batch(urls, output_dir="subtitles", language='ko', openai_api_key=None, notion_api_key=None, notion_database_id=None, concurrency=None, out=None,
+              on_duplicate='reuse'):
+    """
+    URL 목록을 단계별 워커 풀 파이프라인으로 처리하고 결과를 NDJSON으로 출력
+    concurrency: {'metadata': n, 'transcript': n, 'analysis': n, 'notion': n}
+    on_duplicate: 이미 분석한 영상과 자막이 거의 같을 때의 처리 (main.DUPLICATE_ACTIONS 중 하나)
+    반환값: 단계별 처리 결과 요약 dict
+    """
+    out = out or sys.stdout
+    limits = dict(DEFAULT_CONCURRENCY)
+    limits.update(concurrency or {})
+
+    videos, invalid = dedup_urls(urls)
+
+    write_lock = threading.Lock()
+    done = threading.Condition()
+    summary = {'total': len(videos) + len(invalid), 'ok': 0, 'failed': 0, 'invalid': len(invalid)}
+    remaining = [len(videos)]
+    finished = set()  # 결과를 낸 video_id (영상마다 finish는 정확히 한 번)
+
+    def emit(record):
+        with write_lock:
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            out.flush()
+
+    def finish(record):
+        """영상 하나의 최종 결과 기록 (이미 결과를 냈으면 무시, 출력에 실패해도 남은 수는 줄임)"""
+        with done:
+            if record['video_id'] in finished:
+                return
+            finished.add(record['video_id'])
+        try:
+            record['elapsed'] = round(time.time() - record.pop('_started'), 3)
+            for key in [k for k in record if k.startswith('_')]:
+                del record[key]
+            emit(record)
+        finally:
+            with done:
+                summary['ok' if record.get('status') == 'ok' else 'failed'] += 1
+                remaining[0] -= 1
+                done.notify_all()
+
+    def fail(record, stage, error):
+        record['status'] = 'failed'
+        record['stage'] = stage
+        record['error'] = str(error)
+        finish(record)
+
+    # Notion 단계는 속도 제한/재시도가 적용된 쓰기 큐로 처리 (분석 워커는 Notion을 기다리지 않음)
+    pools = {
+        stage: ThreadPoolExecutor(max_workers=max(1, n), thread_name_prefix=f"batch-{stage}")
+        for stage, n in limits.items() if stage != 'notion'
+    }
+    notion_writer = NotionWriter(workers=limits['notion'])
+
+    def submit(stage, func, record):
+        """단계 실행 (단계 안에서 난 예외는 색인 갱신 등 어디서 났든 그 영상의 실패로 기록)"""
+        def run():
+            try:
+                with metrics.span(stage, video_id=record['video_id']):
+                    func(record)
+            except Exception as e:
+                fail(record, stage, e)
+        pools[stage].submit(run)
+
+    # --- 단계 정의: 각 단계는 끝나면 다음 단계 풀에 작업을 넘긴다 ---
+    def metadata_stage(record):
+        record['title'], record['channel'] = get_video_info(record['url'])
+        submit('transcript', transcript_stage, record)
+
+    def transcript_stage(record):
+        transcript, used_language = fetch_transcript(record['video_id'], language)
+        filepath, text_formatted = write_transcript_file(transcript, record['title'], record['channel'], record['video_id'], output_dir)
+        record['language'] = used_language
+        record['transcript_file'] = filepath
+        duplicate = find_analyzed_duplicate(record['video_id'], text_formatted, record['title'], record['channel'], record['url'])
+        if duplicate:
+            record['duplicate_of'] = {key: duplicate[key] for key in ('video_id', 'similarity', 'kind')}
+        if not openai_api_key:
+            record['status'] = 'ok'
+            finish(record)
+            return
+        if duplicate and on_duplicate == 'link':
+            # 분석하지 않고 기존 리포트/Notion 페이지를 결과로 알려 줌
+            record['analysis_file'] = duplicate['analysis_path']
+            record['notion_url'] = duplicate['notion_url']
+            record['status'] = 'ok'
+            finish(record)
+            return
+        record['_text'] = text_formatted
+        record['_reused'] = reused_analysis(duplicate) if duplicate and on_duplicate == 'reuse' else None
+        submit('analysis', analysis_stage, record)
+
+    def analysis_stage(record):
+        text_formatted = record.pop('_text')
+        analysis_result = record.pop('_reused') or analyze_with_gpt(text_formatted, record['title'], record['channel'], record['url'], openai_api_key)
+        if not analysis_result:
+            raise Exception("GPT 분석 결과가 없습니다.")
+        record['analysis_file'] = save_analysis_report(analysis_result, record['title'], record['video_id'], output_dir, record['channel'])
+        if record['analysis_file']:
+            get_duplicate_index().set_analysis(record['video_id'], os.path.abspath(record['analysis_file']))
+        if not (notion_api_key and notion_database_id):
+            record['status'] = 'ok'
+            finish(record)
+            return
+        record['_notion_started'] = time.perf_counter()
+        future = save_to_notion_async(analysis_result, record['title'], record['channel'], record['url'], notion_database_id, notion_api_key, notion_writer)
+        future.add_done_callback(lambda f: notion_done(record, f))
+
+    def notion_done(record, future):
+        # Future 콜백에서 난 예외는 로그만 남고 사라지므로, 여기서 잡아 실패로 기록해야 run_batch가 끝남
+        try:
+            try:
+                notion_url = future.result()
+            except Exception as e:
+                notion_url = None
+                error = e
+            else:
+                error = "Notion 저장에 실패했습니다."
+            seconds = time.perf_counter() - record.pop('_notion_started')
+            metrics.record_stage('notion', seconds, 'ok' if notion_url else 'error', video_id=record['video_id'])
+            if not notion_url:
+                fail(record, 'notion', error)
+                return
+            record['notion_url'] = notion_url
+            get_duplicate_index().set_analysis(record['video_id'], notion_url=notion_url)
+            record['status'] = 'ok'
+            finish(record)
+        except Exception as e:
+            fail(record, 'notion', e)
+
+    try:
+        for url in invalid:
+            emit({'url': url, 'status': 'invalid', 'error': "유효하지 않은 YouTube URL입니다."})
+
+        # YouTube Data API 키가 있으면 메타데이터를 50개씩 미리 조회해서 캐시를 데움
+        if videos and os.getenv('YOUTUBE_API_KEY'):
+            fetch_video_metadata_batch([video_id for video_id, _ in videos])
+
+        for video_id, url in videos:
+            record = {'video_id': video_id, 'url': url, '_started': time.time()}
+            submit('metadata', metadata_stage, record)
+
+        with done:
+            done.wait_for(lambda: remaining[0] == 0)
+    finally:
+        for pool in pools.values():
+            pool.shutdown(wait=True)
+        notion_writer.shutdown(wait=True)
+
+    return summary
+
+def main():
+    """배치 모드 메인 함수"""
+    parser = argparse.ArgumentParser(description="YouTube 자막 배치 다운로드 + AI 분석 + Notion 저장")
+    parser.add_argument('source', help="URL 목록 파일 경로 (표준입력은 '-')")
+    parser.add_argument('--output-dir', default="subtitles", help="자막/분석 파일 저장 디렉토리")
+    parser.add_argument('--language', default='ko', help="우선 자막 언어")
+    for stage, n in DEFAULT_CONCURRENCY.items():
+        parser.add_argument(f'--{stage}', type=int, default=n, help=f"{stage} 단계 동시 실행 수 (기본값: {n})")
+    parser.add_argument('--on-duplicate', choices=DUPLICATE_ACTIONS, default='reuse',
+                        help="이미 분석한 영상과 자막이 거의 같을 때: reuse(기존 리포트 재사용) / link(분석 생략) / analyze(다시 분석)")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    urls = read_urls(args.source)
+    concurrency = {stage: getattr(args, stage) for stage in DEFAULT_CONCURRENCY}
+
+    # NDJSON은 표준출력으로, 진행 메시지는 표준에러로 분리
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        summary = run_batch(
+            urls,
+            args.output_dir,
+            args.language,
+            os.getenv('OPENAI_API_KEY'),
+            os.getenv('NOTION_API_KEY'),
+            os.getenv('NOTION_DATABASE_ID'),
+            concurrency=concurrency,
+            out=out,
+            on_duplicate=args.on_duplicate
+        )
+
+    print(f"✅ 배치 완료: 성공 {summary['ok']} / 실패 {summary['failed']} / 잘못된 URL {summary['invalid']} (총 {summary['total']}개)", file=sys.stderr)
+
+    # YOUNOTION_METRICS_FILE이 설정되어 있으면 단계별 지표를 Prometheus 텍스트로 저장
+    metrics_path = metrics.write_prometheus()
+    if metrics_path:
+        print(f"📈 지표 저장: {metrics_path}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
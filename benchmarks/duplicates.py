@@ -0,0 +1,136 @@
+"""
+거의 같은 자막 조회 벤치마크 (duplicate_index.py)
+
+임시 색인에 무작위 서명 영상 N개(영상마다 전체 서명 + 구간 서명)와 실제 자막 --originals개를 넣고,
+재업로드(일부 단어가 바뀐 자막), 쇼츠(구간 경계와 맞지 않는 무작위 위치에서 잘라 낸 자막), 관계없는 자막으로
+조회 시간과 찾아낸 비율(recall)을 잰다. 서명 계산 시간은 따로 표시한다 (조회 시간에는 포함하지 않음).
+
+사용법:
+    python benchmarks/duplicates.py
+    python benchmarks/duplicates.py --videos 20000 --windows 60 --trials 100 --budget-ms 1.0
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from duplicate_index import NUM_PERM, DuplicateIndex, TranscriptSketch
+from pipeline import percentile
+
+# 쇼츠 조회에 쓸 자막 길이 (단어 수)
+CLIP_WORDS = (96, 200, 320, 480)
+
+def random_sketch(rng, windows):
+    def signature():
+        return tuple(rng.getrandbits(32) for _ in range(NUM_PERM))
+    return TranscriptSketch(2000, signature(), [(100, signature()) for _ in range(windows)])
+
+def make_text(rng, words):
+    vocabulary = [f"단어{i}" for i in range(5000)]
+    return [rng.choice(vocabulary) for _ in range(words)]
+
+def timed(func, runs):
+    durations = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - started)
+    return result, durations
+
+def main():
+    parser = argparse.ArgumentParser(description="거의 같은 자막 조회 벤치마크")
+    parser.add_argument('--videos', type=int, default=5000, help="색인에 넣을 무작위 영상 수")
+    parser.add_argument('--windows', type=int, default=20, help="무작위 영상마다 넣을 구간 서명 수")
+    parser.add_argument('--originals', type=int, default=30, help="색인에 넣을 실제 자막 수 (3000단어)")
+    parser.add_argument('--trials', type=int, default=30, help="길이별 쇼츠/재업로드 조회 횟수 (recall 계산)")
+    parser.add_argument('--runs', type=int, default=200, help="조회 시간 측정 반복 횟수")
+    parser.add_argument('--budget-ms', type=float, default=1.0, help="조회 p50 예산 (넘으면 종료 코드 1)")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    workdir = tempfile.mkdtemp(prefix='younotion-dedup-')
+    try:
+        index = DuplicateIndex(os.path.join(workdir, 'duplicate_index.sqlite3'))
+        started = time.perf_counter()
+        for i in range(args.videos):
+            index.add(f"rand{i:07d}", random_sketch(rng, args.windows))
+        fill_seconds = time.perf_counter() - started
+
+        originals = [make_text(rng, 3000) for _ in range(args.originals)]
+        started = time.perf_counter()
+        sketches = [TranscriptSketch.from_text(" ".join(words)) for words in originals]
+        sketch_ms = (time.perf_counter() - started) * 1000 / len(originals)
+        for i, sketch in enumerate(sketches):
+            index.add(f"original{i:03d}", sketch, f"원본 영상 {i}", "원본 채널")
+
+        def reupload(words):
+            words = list(words)
+            for i in rng.sample(range(len(words)), len(words) // 100):
+                words[i] = f"바뀐{i}"
+            return words
+
+        def clip(words, length):
+            # 구간 경계(WINDOW_STRIDE의 배수)와 맞지 않는 위치에서 자름
+            start = rng.randrange(1, len(words) - length)
+            return words[start:start + length]
+
+        trials = {'reupload': lambda i: reupload(originals[i])}
+        for length in CLIP_WORDS:
+            trials[f"clip_{length}"] = lambda i, length=length: clip(originals[i], length)
+
+        report = {
+            'videos': args.videos + args.originals,
+            'signatures': index.stats()['signatures'],
+            'fill_seconds': round(fill_seconds, 2),
+            'sketch_ms': round(sketch_ms, 2),
+            'recall': {},
+            'queries': {},
+        }
+        for name, make_query in trials.items():
+            found = 0
+            for _ in range(args.trials):
+                i = rng.randrange(len(originals))
+                matches = index.find(TranscriptSketch.from_text(" ".join(make_query(i))))
+                found += any(match['video_id'] == f"original{i:03d}" for match in matches)
+            report['recall'][name] = round(found / args.trials, 3)
+
+        false_positives = sum(
+            bool(index.find(TranscriptSketch.from_text(" ".join(make_text(rng, rng.choice(CLIP_WORDS))))))
+            for _ in range(args.trials)
+        )
+        report['recall']['unrelated_false_positive'] = round(false_positives / args.trials, 3)
+        # 관계없는 짧은 자막끼리 같다고 보지 않는지 (서명을 만들지 않음)
+        report['tiny_caption_sketch'] = TranscriptSketch.from_text("thanks for watching") is not None
+
+        queries = {
+            'reupload': TranscriptSketch.from_text(" ".join(reupload(originals[0]))),
+            'clip': TranscriptSketch.from_text(" ".join(clip(originals[0], 200))),
+            'unrelated': TranscriptSketch.from_text(" ".join(make_text(rng, 3000))),
+        }
+        for name, query in queries.items():
+            matches, durations = timed(lambda: index.find(query), args.runs)
+            report['queries'][name] = {
+                'p50_ms': round(percentile(durations, 50) * 1000, 3),
+                'p99_ms': round(percentile(durations, 99) * 1000, 3),
+                'matches': [(match['video_id'], match['similarity'], match['kind']) for match in matches],
+            }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    slowest = max(result['p50_ms'] for result in report['queries'].values())
+    if slowest > args.budget_ms:
+        print(f"❌ 조회 p50 {slowest}ms > 예산 {args.budget_ms}ms", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ 서명 {report['signatures']:,}개에서 조회 p50 최대 {slowest}ms", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
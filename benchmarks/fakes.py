@@ -0,0 +1,424 @@
+"""
+벤치마크용 외부 서비스 대역(fake)
+
+YouTube 자막/메타데이터, OpenAI chat completion, Notion, YouTube Data API 검색을
+네트워크 없이 흉내 낸다. 각 서비스는 지연 시간, 오류율, 응답 크기를 설정할 수 있다.
+
+install()은 실제 라이브러리 대신 가짜 모듈을 sys.modules에 등록한다.
+앱 코드는 외부 라이브러리를 함수 안에서 import하므로, 앱 모듈을 먼저 import했더라도
+install() 이후의 호출은 모두 가짜 서비스로 간다.
+"""
+import random
+import sys
+import threading
+import time
+import types
+
+# 서비스별 기본 설정
+# latency: 호출당 지연 시간(초), jitter: 지연 시간에 더해지는 0~jitter초 무작위 값,
+# error_rate: 호출이 실패할 확률 (0~1), error_status: 실패할 때의 HTTP 상태 코드
+# blocked_proxies: 항상 429로 실패하는 프록시 URL 목록 (자막 목록 조회에만 적용)
+# overlap_words: 자막 항목마다 앞 항목 끝에서 반복되는 단어 수 (자동 생성 자막의 롤링 겹침),
+# tag_every: 이 항목마다 한 번씩 [음악] 태그 항목을 넣음 (0이면 넣지 않음)
+# prompt_latency_per_1k_tokens: OpenAI 입력 토큰 1000개당 추가 지연 시간(초)
+DEFAULT_FAKE_CONFIG = {
+    'transcript_list': {'latency': 0.04, 'jitter': 0.02, 'error_rate': 0.0, 'error_status': 429, 'blocked_proxies': []},
+    'transcript_fetch': {'latency': 0.06, 'jitter': 0.03, 'error_rate': 0.0, 'error_status': 429,
+                         'items': 600, 'chars_per_item': 40, 'overlap_words': 3, 'tag_every': 20},
+    'metadata': {'latency': 0.03, 'jitter': 0.01, 'error_rate': 0.0},
+    'openai': {'latency': 0.3, 'jitter': 0.1, 'error_rate': 0.0, 'output_chars': 3000, 'stream_chunks': 60,
+               'prompt_latency_per_1k_tokens': 0.02, 'stream_error_after': None},
+    'notion': {'latency': 0.05, 'jitter': 0.02, 'error_rate': 0.0, 'error_status': 503},
+    'search': {'latency': 0.08, 'jitter': 0.02, 'error_rate': 0.0, 'total_results': 50},
+}
+
+FAKE_REPORT = """## 📺 영상 분석 리포트
+
+### 📋 기본 정보
+- **제목**: 벤치마크 영상
+- **분석일시**: {{ANALYSIS_TIME}}
+
+### 🔍 주요 인사이트
+"""
+
+class FakeServiceError(Exception):
+    """가짜 서비스가 일부러 낸 오류 (Notion처럼 status/headers를 가짐)"""
+
+    def __init__(self, service, status=500, headers=None):
+        super().__init__(f"{service} 가짜 오류 (status {status})")
+        self.status = status
+        self.headers = headers or {}
+
+class FakeService:
+    """지연 시간과 오류를 흉내 내고 호출 수를 세는 가짜 서비스 (스레드 안전)"""
+
+    def __init__(self, name, latency=0.0, jitter=0.0, error_rate=0.0, seed=None, **payload):
+        self.name = name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.payload = payload
+        self.calls = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def call(self, fail=False, extra_latency=0.0):
+        """지연 시간(+extra_latency)만큼 기다린 뒤, error_rate 확률로 (fail=True면 항상) FakeServiceError 발생"""
+        with self._lock:
+            self.calls += 1
+            delay = self.latency + extra_latency + self._random.uniform(0, self.jitter)
+            failed = fail or self._random.random() < self.error_rate
+            if failed:
+                self.errors += 1
+        time.sleep(delay)
+        if failed:
+            raise FakeServiceError(self.name, self.payload.get('error_status', 500))
+
+    def stats(self):
+        with self._lock:
+            return {'calls': self.calls, 'errors': self.errors}
+
+class FakeServices:
+    """설정에 따라 만든 가짜 서비스 묶음"""
+
+    def __init__(self, config=None, seed=0):
+        merged = {name: dict(defaults) for name, defaults in DEFAULT_FAKE_CONFIG.items()}
+        for name, overrides in (config or {}).items():
+            merged.setdefault(name, {}).update(overrides)
+        self.config = merged
+        self.services = {
+            name: FakeService(name, seed=seed + i, **options)
+            for i, (name, options) in enumerate(merged.items())
+        }
+
+    def __getitem__(self, name):
+        return self.services[name]
+
+    def stats(self):
+        return {name: service.stats() for name, service in self.services.items()}
+
+# ----- youtube_transcript_api -----
+
+def _fake_caption_items(payload, video_id):
+    """자동 생성 자막처럼 앞 항목 끝 단어가 다시 나오고 가끔 [음악] 태그가 섞인 자막 항목 (영상마다 다른 내용)"""
+    items = payload.get('items', 600)
+    chars = payload.get('chars_per_item', 40)
+    overlap = payload.get('overlap_words', 0)
+    tag_every = payload.get('tag_every', 0)
+    result = []
+    previous = []
+    for i in range(items):
+        if tag_every and i % tag_every == tag_every - 1:
+            text = "[음악]"
+        else:
+            # 항목마다 새 단어 약 chars 글자 (다섯 항목마다 문장이 끝남)
+            words = [f"{video_id[-4:]}{i}번{'가' * 2}{j}" for j in range(max(1, chars // 8))]
+            if i % 5 == 4:
+                words[-1] += "."
+            text = " ".join(previous[-overlap:] + words if overlap else words)
+            previous = words
+        result.append({'text': text, 'start': i * 2.0, 'duration': 2.0})
+    return result
+
+def _transcript_module(services):
+    fetch_service = services['transcript_fetch']
+
+    class FakeTranscript:
+        def __init__(self, video_id, language_code, is_generated):
+            self.video_id = video_id
+            self.language_code = language_code
+            self.language = language_code
+            self.is_generated = is_generated
+            self.is_translatable = True
+            self.translation_languages = [
+                {'language': 'Korean', 'language_code': 'ko'},
+                {'language': 'English', 'language_code': 'en'},
+            ]
+
+        def fetch(self, preserve_formatting=False):
+            fetch_service.call()
+            return _fake_caption_items(fetch_service.payload, self.video_id)
+
+        def translate(self, language_code):
+            return FakeTranscript(self.video_id, language_code, self.is_generated)
+
+    class FakeTranscriptList:
+        def __init__(self, video_id):
+            self._transcripts = [FakeTranscript(video_id, 'ko', False), FakeTranscript(video_id, 'en', True)]
+
+        def __iter__(self):
+            return iter(self._transcripts)
+
+    class YouTubeTranscriptApi:
+        @classmethod
+        def list_transcripts(cls, video_id, proxies=None, cookies=None):
+            service = services['transcript_list']
+            proxy = (proxies or {}).get('https')
+            service.call(fail=proxy in service.payload.get('blocked_proxies', ()))
+            return FakeTranscriptList(video_id)
+
+    module = types.ModuleType('youtube_transcript_api')
+    module.YouTubeTranscriptApi = YouTubeTranscriptApi
+
+    class TextFormatter:
+        def format_transcript(self, transcript, **kwargs):
+            return "\n".join(item['text'] for item in transcript)
+
+    formatters = types.ModuleType('youtube_transcript_api.formatters')
+    formatters.TextFormatter = TextFormatter
+    module.formatters = formatters
+    return {'youtube_transcript_api': module, 'youtube_transcript_api.formatters': formatters}
+
+# ----- yt_dlp / oEmbed -----
+
+def _fake_metadata(services, video_id):
+    services['metadata'].call()
+    return {'title': f"벤치마크 영상 {video_id}", 'channel': "벤치마크 채널"}
+
+def _yt_dlp_module(services):
+    class YoutubeDL:
+        def __init__(self, options=None):
+            self.options = options or {}
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def extract_info(self, url, download=False, process=True):
+            metadata = _fake_metadata(services, url.rsplit('=', 1)[-1])
+            return {'title': metadata['title'], 'uploader': metadata['channel']}
+
+    module = types.ModuleType('yt_dlp')
+    module.YoutubeDL = YoutubeDL
+    return {'yt_dlp': module}
+
+# ----- openai / httpx -----
+
+def _openai_module(services):
+    service = services['openai']
+
+    def _obj(**fields):
+        return types.SimpleNamespace(**fields)
+
+    def _report():
+        size = service.payload.get('output_chars', 3000)
+        return FAKE_REPORT + ("- 인사이트 " * (size // 7 + 1))[:max(0, size - len(FAKE_REPORT))]
+
+    def _usage(messages, text):
+        # 토큰 수는 대략 4글자당 1토큰으로 계산
+        prompt_chars = sum(len(message['content']) for message in messages)
+        return _obj(prompt_tokens=prompt_chars // 4, completion_tokens=len(text) // 4)
+
+    def _stream(text, usage):
+        pieces = max(1, service.payload.get('stream_chunks', 60))
+        step = max(1, len(text) // pieces)
+        # stream_error_after: 이 개수만큼 조각을 보낸 뒤 연결이 끊긴 것처럼 오류
+        error_after = service.payload.get('stream_error_after')
+        for count, i in enumerate(range(0, len(text), step)):
+            if error_after is not None and count >= error_after:
+                raise FakeServiceError(service.name, 502)
+            yield _obj(choices=[_obj(delta=_obj(content=text[i:i + step]))], usage=None)
+        if usage:
+            yield _obj(choices=[], usage=usage)
+
+    class Completions:
+        def create(self, messages=(), stream=False, stream_options=None, **kwargs):
+            text = _report()
+            usage = _usage(messages, text)
+            # 입력이 길수록 응답도 늦게 시작함
+            service.call(extra_latency=usage.prompt_tokens / 1000 * service.payload.get('prompt_latency_per_1k_tokens', 0.0))
+            if stream:
+                return _stream(text, usage if (stream_options or {}).get('include_usage') else None)
+            return _obj(choices=[_obj(message=_obj(content=text))], usage=usage)
+
+    class OpenAI:
+        def __init__(self, api_key=None, http_client=None, **kwargs):
+            self.chat = _obj(completions=Completions())
+
+    class DefaultHttpxClient:
+        def __init__(self, **kwargs):
+            pass
+
+    module = types.ModuleType('openai')
+    module.OpenAI = OpenAI
+    module.DefaultHttpxClient = DefaultHttpxClient
+    return {'openai': module}
+
+def _httpx_module():
+    class _Options:
+        def __init__(self, *args, **kwargs):
+            self.args = args
+            self.kwargs = kwargs
+
+    module = types.ModuleType('httpx')
+    module.Limits = _Options
+    module.Timeout = _Options
+    module.Client = _Options
+    return {'httpx': module}
+
+# ----- notion_client -----
+
+def _notion_module(services):
+    service = services['notion']
+    counter = {'pages': 0}
+    lock = threading.Lock()
+
+    def _page():
+        with lock:
+            counter['pages'] += 1
+            page_id = f"page-{counter['pages']}"
+        return {'id': page_id, 'url': f"https://www.notion.so/{page_id}", 'last_edited_time': time.strftime('%Y-%m-%dT%H:%M:%S.000Z'), 'archived': False}
+
+    class Pages:
+        def create(self, **kwargs):
+            service.call()
+            return _page()
+
+        def update(self, page_id, **kwargs):
+            service.call()
+            return dict(_page(), id=page_id)
+
+    class Children:
+        def append(self, block_id, children):
+            service.call()
+            return {'results': children}
+
+        def list(self, block_id, **kwargs):
+            service.call()
+            return {'results': [], 'has_more': False}
+
+    class Blocks:
+        def __init__(self):
+            self.children = Children()
+
+        def delete(self, block_id):
+            service.call()
+            return {}
+
+    class Databases:
+        def query(self, **kwargs):
+            service.call()
+            return {'results': [], 'has_more': False}
+
+    class Client:
+        def __init__(self, auth=None, client=None, **kwargs):
+            self.pages = Pages()
+            self.blocks = Blocks()
+            self.databases = Databases()
+
+    module = types.ModuleType('notion_client')
+    module.Client = Client
+    module.APIResponseError = FakeServiceError
+    return {'notion_client': module}
+
+# ----- googleapiclient (YouTube Data API) -----
+
+def _googleapiclient_module(services):
+    service = services['search']
+
+    class _Request:
+        def __init__(self, handler, kwargs):
+            self._handler = handler
+            self._kwargs = kwargs
+
+        def execute(self):
+            return self._handler(**self._kwargs)
+
+    def _search(q, maxResults=5, pageToken=None, **kwargs):
+        service.call()
+        start = int(pageToken or 0)
+        end = min(start + maxResults, service.payload.get('total_results', 50))
+        items = [
+            {
+                'id': {'videoId': f"s{abs(hash((q, i))) % 10 ** 10:010d}"},
+                'snippet': {
+                    'title': f"{q} 결과 {i}",
+                    'channelTitle': "벤치마크 채널",
+                    'thumbnails': {'high': {'url': f"https://i.ytimg.com/vi/{i}/hqdefault.jpg"}},
+                },
+            }
+            for i in range(start, end)
+        ]
+        response = {'items': items}
+        if end < service.payload.get('total_results', 50):
+            response['nextPageToken'] = str(end)
+        return response
+
+    def _videos(id, part='snippet', **kwargs):
+        items = []
+        for video_id in id.split(','):
+            if part == 'contentDetails':
+                if not items:
+                    service.call()  # 요청 한 번 (ID 수와 관계없음)
+                # 검색 결과 보강: 영상 ID로 길이(1~90분)와 업로더 자막 여부를 고정
+                seed = abs(hash(video_id))
+                items.append({'id': video_id, 'contentDetails': {
+                    'duration': f"PT{seed % 90 + 1}M{seed % 60}S",
+                    'caption': 'true' if seed % 3 else 'false',
+                }})
+                continue
+            metadata = _fake_metadata(services, video_id)
+            items.append({'id': video_id, 'snippet': {'title': metadata['title'], 'channelTitle': metadata['channel']}})
+        return {'items': items}
+
+    class _Resource:
+        def __init__(self, handler):
+            self._handler = handler
+
+        def list(self, **kwargs):
+            return _Request(self._handler, kwargs)
+
+    class YouTube:
+        def search(self):
+            return _Resource(_search)
+
+        def videos(self):
+            return _Resource(_videos)
+
+    def build(service_name, version, **kwargs):
+        return YouTube()
+
+    class HttpError(Exception):
+        pass
+
+    package = types.ModuleType('googleapiclient')
+    discovery = types.ModuleType('googleapiclient.discovery')
+    discovery.build = build
+    errors = types.ModuleType('googleapiclient.errors')
+    errors.HttpError = HttpError
+    package.discovery = discovery
+    package.errors = errors
+    return {'googleapiclient': package, 'googleapiclient.discovery': discovery, 'googleapiclient.errors': errors}
+
+def install(services):
+    """
+    가짜 모듈을 sys.modules에 등록하고 oEmbed 조회를 가짜 메타데이터 서비스로 교체
+    반환값: 원래 상태로 되돌리는 함수
+    """
+    modules = {}
+    modules.update(_transcript_module(services))
+    modules.update(_yt_dlp_module(services))
+    modules.update(_openai_module(services))
+    modules.update(_httpx_module())
+    modules.update(_notion_module(services))
+    modules.update(_googleapiclient_module(services))
+
+    saved = {name: sys.modules.get(name) for name in modules}
+    sys.modules.update(modules)
+
+    import video_metadata
+    original_oembed = video_metadata._fetch_oembed
+    video_metadata._fetch_oembed = lambda video_id: _fake_metadata(services, video_id)
+
+    def uninstall():
+        video_metadata._fetch_oembed = original_oembed
+        for name, module in saved.items():
+            if module is None:
+                sys.modules.pop(name, None)
+            else:
+                sys.modules[name] = module
+
+    return uninstall
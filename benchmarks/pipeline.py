@@ -0,0 +1,269 @@
+"""
+오프라인 파이프라인 벤치마크
+
+외부 서비스를 benchmarks/fakes.py의 가짜 서비스로 바꿔 놓고
+download_youtube_transcript, search_youtube_videos, 배치 모드(run_batch)를 반복 실행한다.
+시나리오별/단계별 p50/p95/p99와 처리량을 JSON으로 출력해서 성능 회귀 추적에 사용한다.
+
+캐시는 임시 디렉터리를 쓰고 매 반복마다 다른 video_id/검색어를 사용하므로 항상 캐시 미스 경로를 잰다.
+
+사용법:
+    python benchmarks/pipeline.py
+    python benchmarks/pipeline.py --scenario batch --batch-size 20 --output bench.json
+    python benchmarks/pipeline.py --config fakes.json   # {"openai": {"latency": 1.0, "error_rate": 0.1}}
+    python benchmarks/pipeline.py --scenario transcript --compact   # 자막 압축 전후 입력 토큰 비교
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from fakes import FakeServices, install
+
+SCENARIOS = ['transcript', 'search', 'batch']
+
+# 단계별 시간을 잴 함수 (모듈 이름, 함수 이름, 단계 이름)
+INSTRUMENTED = [
+    ('main', 'get_video_info', 'metadata'),
+    ('main', 'fetch_transcript', 'transcript'),
+    ('main', 'analyze_with_gpt', 'analysis'),
+    ('main', 'save_analysis_report', 'report'),
+    ('main', 'save_to_notion', 'notion'),
+    ('batch', 'get_video_info', 'metadata'),
+    ('batch', 'fetch_transcript', 'transcript'),
+    ('batch', 'analyze_with_gpt', 'analysis'),
+    ('batch', 'save_analysis_report', 'report'),
+]
+
+def percentile(values, pct):
+    """nearest-rank 백분위수"""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * pct // 100))
+    return ordered[int(rank) - 1]
+
+def summarize(durations, errors=0, elapsed=None, items=None):
+    """소요 시간 목록(초)을 p50/p95/p99(ms)와 처리량으로 요약"""
+    summary = {
+        'count': len(durations),
+        'errors': errors,
+        'p50_ms': None,
+        'p95_ms': None,
+        'p99_ms': None,
+        'mean_ms': None,
+    }
+    if durations:
+        for pct in (50, 95, 99):
+            summary[f'p{pct}_ms'] = round(percentile(durations, pct) * 1000, 3)
+        summary['mean_ms'] = round(sum(durations) / len(durations) * 1000, 3)
+    if elapsed:
+        summary['throughput_per_s'] = round((items if items is not None else len(durations)) / elapsed, 3)
+    return summary
+
+class StageRecorder:
+    """단계별 함수 호출 시간 기록 (스레드 안전)"""
+
+    def __init__(self):
+        self.durations = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage, seconds):
+        with self._lock:
+            self.durations.setdefault(stage, []).append(seconds)
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - started)
+        return timed
+
+    def reset(self):
+        with self._lock:
+            self.durations = {}
+
+    def summary(self):
+        with self._lock:
+            return {stage: summarize(values) for stage, values in sorted(self.durations.items())}
+
+def instrument(recorder):
+    """INSTRUMENTED 함수들을 시간 측정 함수로 교체, 반환값: 원래대로 되돌리는 함수"""
+    import importlib
+    # batch는 main의 함수를 이름으로 가져오므로, 감싸기 전에 모든 모듈을 먼저 import해야 두 번 감싸지 않음
+    modules = {module_name: importlib.import_module(module_name) for module_name, _, _ in INSTRUMENTED}
+    originals = []
+    for module_name, name, stage in INSTRUMENTED:
+        module = modules[module_name]
+        original = getattr(module, name)
+        originals.append((module, name, original))
+        setattr(module, name, recorder.wrap(stage, original))
+
+    def restore():
+        for module, name, original in originals:
+            setattr(module, name, original)
+    return restore
+
+def token_summary():
+    """지금까지 기록된 OpenAI 토큰 수와 자막 압축 전/후 토큰 수 (metrics 카운터 합계)"""
+    import metrics
+    counters, _ = metrics.snapshot()
+    summary = {}
+    for (name, labels), value in counters.items():
+        if name == 'younotion_openai_tokens_total':
+            key = f"openai_{dict(labels)['kind']}_tokens"
+        elif name == 'younotion_transcript_tokens_total':
+            key = f"transcript_{dict(labels)['kind']}_tokens"
+        else:
+            continue
+        summary[key] = summary.get(key, 0) + value
+    return summary
+
+def video_url(n):
+    # 11자리 video_id (매 반복마다 달라서 캐시에 걸리지 않음)
+    return f"https://www.youtube.com/watch?v=bench{n:06d}"
+
+def run_transcript(iterations, output_dir, counter):
+    """download_youtube_transcript 전체 경로 (자막 → 분석 → 리포트 → Notion)"""
+    import main
+    durations = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(iterations):
+        url = video_url(next(counter))
+        began = time.perf_counter()
+        filepath, analysis_path, notion_url = main.download_youtube_transcript(
+            url, output_dir, 'ko', 'sk-benchmark', 'secret-benchmark', 'db-benchmark'
+        )
+        durations.append(time.perf_counter() - began)
+        if not (filepath and analysis_path and notion_url):
+            errors += 1
+    return summarize(durations, errors, time.perf_counter() - started)
+
+def run_search(iterations, counter, max_results=5):
+    """search_youtube_videos 첫 페이지와 다음 페이지 (둘 다 search.list + 길이/자막 보강 videos.list 호출)"""
+    import main
+    durations = []
+    errors = 0
+    # 실제 검색처럼 API 키가 있어야 videos.list 보강이 실행됨 (다른 시나리오의 메타데이터 경로는 그대로 두기 위해 여기서만 설정)
+    os.environ['YOUTUBE_API_KEY'] = 'benchmark'
+    started = time.perf_counter()
+    try:
+        for _ in range(iterations):
+            query = f"benchmark query {next(counter)}"
+            for offset in (0, max_results):
+                began = time.perf_counter()
+                results = main.search_youtube_videos(query, max_results, offset)
+                durations.append(time.perf_counter() - began)
+                if not results or any(video['duration_seconds'] is None for video in results):
+                    errors += 1
+    finally:
+        os.environ.pop('YOUTUBE_API_KEY', None)
+    return summarize(durations, errors, time.perf_counter() - started)
+
+def run_batch_scenario(runs, batch_size, output_dir, counter, concurrency=None):
+    """배치 모드 (run_batch) 전체, 처리량은 초당 영상 수"""
+    import batch
+    durations = []
+    errors = 0
+    processed = 0
+    started = time.perf_counter()
+    for _ in range(runs):
+        urls = [video_url(next(counter)) for _ in range(batch_size)]
+        began = time.perf_counter()
+        summary = batch.run_batch(
+            urls, output_dir, 'ko', 'sk-benchmark', 'secret-benchmark', 'db-benchmark',
+            concurrency=concurrency, out=io.StringIO()
+        )
+        durations.append(time.perf_counter() - began)
+        processed += batch_size
+        errors += batch_size - summary.get('ok', batch_size)
+    return summarize(durations, errors, time.perf_counter() - started, items=processed)
+
+def main():
+    parser = argparse.ArgumentParser(description="가짜 외부 서비스로 파이프라인 벤치마크")
+    parser.add_argument('--scenario', action='append', choices=SCENARIOS, help="실행할 시나리오 (여러 번 지정 가능, 기본값: 전부)")
+    parser.add_argument('--iterations', type=int, default=20, help="transcript/search 시나리오 반복 횟수")
+    parser.add_argument('--batch-size', type=int, default=10, help="배치 1회당 URL 수")
+    parser.add_argument('--batch-runs', type=int, default=3, help="배치 반복 횟수")
+    parser.add_argument('--config', help="가짜 서비스 설정 JSON 파일 (서비스별 latency/jitter/error_rate/응답 크기)")
+    parser.add_argument('--seed', type=int, default=0, help="지연/오류 난수 시드")
+    parser.add_argument('--compact', action='store_true', help="GPT 분석 전 자막 압축을 켜고 실행 (입력 토큰/응답 시간 비교용)")
+    parser.add_argument('--output', help="결과 JSON을 저장할 파일 (기본값: 표준출력)")
+    args = parser.parse_args()
+
+    config = {}
+    if args.config:
+        with open(args.config, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+
+    workdir = tempfile.mkdtemp(prefix='younotion-bench-')
+    # 캐시 디렉터리는 cache 모듈을 import하기 전에 정해야 함
+    os.environ['YOUNOTION_CACHE_DIR'] = os.path.join(workdir, 'cache')
+    os.environ.pop('YOUTUBE_API_KEY', None)
+    output_dir = os.path.join(workdir, 'subtitles')
+
+    services = FakeServices(config, seed=args.seed)
+    uninstall = install(services)
+    recorder = StageRecorder()
+    restore = instrument(recorder)
+    import main as app_main
+    import metrics
+    app_main.COMPACT_TRANSCRIPTS = args.compact
+
+    counter = iter(range(10 ** 6))
+    scenarios = args.scenario or SCENARIOS
+    report = {'config': services.config, 'compact': args.compact, 'scenarios': {}, 'stages': {}, 'tokens': {}, 'services': {}}
+    try:
+        # 앱 코드의 진행 메시지는 표준오류로 보내고 표준출력에는 JSON만 남김
+        with contextlib.redirect_stdout(sys.stderr):
+            for scenario in scenarios:
+                recorder.reset()
+                metrics.reset()
+                print(f"⏱️ {scenario} 시나리오 실행 중...")
+                if scenario == 'transcript':
+                    result = run_transcript(args.iterations, output_dir, counter)
+                elif scenario == 'search':
+                    result = run_search(args.iterations, counter)
+                else:
+                    result = run_batch_scenario(args.batch_runs, args.batch_size, output_dir, counter)
+                report['scenarios'][scenario] = result
+                report['stages'][scenario] = recorder.summary()
+                report['tokens'][scenario] = token_summary()
+    finally:
+        restore()
+        uninstall()
+        shutil.rmtree(workdir, ignore_errors=True)
+    report['services'] = services.stats()
+    # 자막 요청 스케줄러 상태 (동시 실행 수, 서킷 브레이커, 프록시 건강 점수)
+    from fetch_scheduler import get_transcript_scheduler
+    report['transcript_scheduler'] = get_transcript_scheduler().stats()
+
+    for scenario, result in report['scenarios'].items():
+        print(
+            f"📊 {scenario}: p50 {result['p50_ms']}ms, p95 {result['p95_ms']}ms, p99 {result['p99_ms']}ms, "
+            f"처리량 {result.get('throughput_per_s')}/s, 오류 {result['errors']}",
+            file=sys.stderr
+        )
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + "\n")
+        print(f"✅ 결과 저장: {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+CLI 시작 시간 벤치마크 (python -X importtime 기반)
+
+`import main`에 걸리는 시간을 측정하고, 시간이 예산을 넘거나 무거운 외부 라이브러리가
+모듈 import 시점에 함께 로드되면 실패(종료 코드 1)로 처리해서 회귀를 막는다.
+
+사용법:
+    python benchmarks/startup.py
+    python benchmarks/startup.py --module batch --budget-ms 300 --runs 7 --json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 모듈 import 시점에 로드되면 안 되는 무거운 라이브러리
+HEAVY_MODULES = ['streamlit', 'openai', 'notion_client', 'googleapiclient', 'yt_dlp', 'youtube_transcript_api', 'httpx']
+
+def measure_import(module):
+    """
+    새 인터프리터에서 module을 import하고 -X importtime 출력을 파싱
+    반환값: (전체 누적 시간(us), {모듈명: 누적 시간(us)})
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} 실패:\n{result.stderr}")
+
+    # 형식: "import time: self [us] | cumulative | imported package"
+    modules = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        modules[name.strip()] = int(cumulative)
+    return modules.get(module, 0), modules
+
+def main():
+    parser = argparse.ArgumentParser(description="CLI import 시간 벤치마크")
+    parser.add_argument('--module', default='main', help="측정할 모듈 (기본값: main)")
+    parser.add_argument('--runs', type=int, default=5, help="반복 측정 횟수")
+    parser.add_argument('--budget-ms', type=float, default=200.0, help="import 시간 중앙값 예산(ms)")
+    parser.add_argument('--top', type=int, default=10, help="가장 느린 모듈 표시 개수")
+    parser.add_argument('--json', action='store_true', help="결과를 JSON으로 출력")
+    args = parser.parse_args()
+
+    totals = []
+    modules = {}
+    for _ in range(args.runs):
+        total, modules = measure_import(args.module)
+        totals.append(total)
+
+    median_ms = statistics.median(totals) / 1000
+    heavy = sorted({name.split('.')[0] for name in modules if name.split('.')[0] in HEAVY_MODULES})
+    slowest = sorted(
+        ((name, us) for name, us in modules.items() if name != args.module),
+        key=lambda item: item[1],
+        reverse=True
+    )[:args.top]
+    passed = median_ms <= args.budget_ms and not heavy
+
+    if args.json:
+        print(json.dumps({
+            'module': args.module,
+            'runs': args.runs,
+            'median_ms': round(median_ms, 3),
+            'min_ms': round(min(totals) / 1000, 3),
+            'budget_ms': args.budget_ms,
+            'heavy_modules': heavy,
+            'slowest': [{'module': name, 'cumulative_ms': round(us / 1000, 3)} for name, us in slowest],
+            'passed': passed,
+        }, ensure_ascii=False))
+    else:
+        print(f"📦 import {args.module}: 중앙값 {median_ms:.1f}ms (최소 {min(totals) / 1000:.1f}ms, {args.runs}회, 예산 {args.budget_ms:.0f}ms)")
+        print("🐢 가장 느린 모듈:")
+        for name, us in slowest:
+            print(f"  - {name}: {us / 1000:.1f}ms")
+        if heavy:
+            print(f"❌ import 시점에 로드된 무거운 라이브러리: {', '.join(heavy)}")
+        print("✅ 통과" if passed else "❌ 실패")
+
+    sys.exit(0 if passed else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+캐시 모음
+
+- DiskCache: SQLite 파일 하나에 JSON 값을 압축해서 저장하는 디스크 캐시.
+  항목마다 TTL이 적용되고, 전체 크기가 제한을 넘으면 가장 오래 사용되지 않은 항목부터 지운다(LRU).
+- MemoryCache: 프로세스 안에서만 공유하는 메모리 캐시 (TTL + 항목 수 제한 LRU).
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+# 캐시 파일을 저장할 디렉토리 (환경 변수로 변경 가능)
+CACHE_DIR = os.getenv('YOUNOTION_CACHE_DIR', '.cache')
+
+class DiskCache:
+    """SQLite 기반 키-값 캐시 (TTL + 크기 제한 LRU, 스레드 안전)"""
+
+    def __init__(self, path, ttl=None, max_bytes=100 * 1024 * 1024):
+        """
+        path: SQLite 파일 경로
+        ttl: 항목 유효 시간(초), None이면 만료 없음
+        max_bytes: 저장된 값(압축 후)의 최대 총 크기
+        """
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " value BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at)")
+
+    def get(self, key, default=None):
+        """캐시 조회 (만료된 항목은 삭제 후 미스로 처리)"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM entries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return default
+            value, created_at = row
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                self.misses += 1
+                return default
+            self._conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+        return json.loads(zlib.decompress(value).decode('utf-8'))
+
+    def set(self, key, value):
+        """캐시 저장 후 크기 제한을 넘으면 LRU 순서로 정리"""
+        blob = zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8'))
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, created_at, accessed_at) VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now)
+            )
+            self._evict(now)
+
+    def delete(self, key):
+        """캐시 항목 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+
+    def delete_except_prefix(self, prefix):
+        """키가 prefix로 시작하지 않는 항목 모두 삭제 (버전이 바뀐 항목 정리용), 삭제한 개수 반환"""
+        with self._lock:
+            cursor = self._conn.execute("DELETE FROM entries WHERE substr(key, 1, ?) != ?", (len(prefix), prefix))
+            return cursor.rowcount
+
+    def stats(self):
+        """히트/미스 카운터와 현재 저장 상태"""
+        with self._lock:
+            entries, total = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': entries,
+            'bytes': total,
+        }
+
+    def _evict(self, now):
+        """만료 항목과 크기 제한을 넘는 LRU 항목 삭제 (lock 안에서 호출)"""
+        if self.ttl is not None:
+            self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.ttl,))
+
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        stale = []
+        for key, size in self._conn.execute("SELECT key, size FROM entries ORDER BY accessed_at ASC"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self._conn.executemany("DELETE FROM entries WHERE key = ?", stale)
+
+class MemoryCache:
+    """프로세스 메모리 캐시 (TTL + 항목 수 제한 LRU, 스레드 안전)"""
+
+    def __init__(self, max_entries=1024, ttl=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def get(self, key, default=None):
+        """캐시 조회 (만료된 항목은 삭제 후 미스로 처리)"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (self.ttl is not None and now - entry[0] > self.ttl):
+                self._entries.pop(key, None)
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, value):
+        """캐시 저장 후 항목 수 제한을 넘으면 LRU 순서로 정리"""
+        with self._lock:
+            self._entries[key] = (time.time(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        """캐시 항목 삭제"""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """캐시 전체 삭제"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        """히트/미스 카운터와 현재 저장 상태"""
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+            'entries': len(self._entries),
+        }
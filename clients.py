@@ -0,0 +1,127 @@
+"""
+외부 API 클라이언트 레지스트리
+
+OpenAI, Notion, YouTube Data API 클라이언트를 API 키별로 한 번만 만들어 프로세스 전체에서 재사용한다.
+매 호출마다 클라이언트를 새로 만들면 HTTP 연결 풀(keep-alive, TLS 세션)이 버려지므로,
+배치 모드와 Streamlit 세션이 같은 연결을 계속 쓰도록 한다.
+
+- OpenAI, Notion: httpx 연결 풀을 공유 (httpx.Client는 스레드 안전)
+- YouTube Data API: httplib2가 스레드 안전하지 않으므로 스레드별로 하나씩 만들고,
+  discovery 문서는 패키지에 포함된 정적 문서를 사용 (네트워크 요청 없음)
+
+사용법:
+    python clients.py   # 클라이언트 생성/재사용 지연 시간 비교
+"""
+import threading
+import time
+
+# 연결 풀 설정 (httpx 객체는 클라이언트를 만들 때 생성)
+POOL_LIMITS = {'max_connections': 50, 'max_keepalive_connections': 20, 'keepalive_expiry': 60}
+HTTP_TIMEOUT = {'timeout': 60.0, 'connect': 10.0}
+
+# 각 SDK는 import 비용이 크므로 클라이언트를 처음 만들 때 import한다
+def _new_openai_client(api_key):
+    import httpx
+    from openai import OpenAI, DefaultHttpxClient
+    http_client = DefaultHttpxClient(limits=httpx.Limits(**POOL_LIMITS), timeout=httpx.Timeout(**HTTP_TIMEOUT))
+    return OpenAI(api_key=api_key, http_client=http_client)
+
+def _new_notion_client(api_key):
+    import httpx
+    from notion_client import Client
+    return Client(auth=api_key, client=httpx.Client(limits=httpx.Limits(**POOL_LIMITS), timeout=httpx.Timeout(**HTTP_TIMEOUT)))
+
+def _new_youtube_client(api_key):
+    from googleapiclient.discovery import build
+    return build('youtube', 'v3', developerKey=api_key, static_discovery=True, cache_discovery=False)
+
+_clients = {}
+_lock = threading.Lock()
+_thread_local = threading.local()
+_setup_stats = {}
+
+def _record(service, created, seconds):
+    """클라이언트 생성/재사용 횟수와 소요 시간 기록 (lock 안에서 호출)"""
+    stats = _setup_stats.setdefault(service, {'created': 0, 'reused': 0, 'create_seconds': 0.0, 'reuse_seconds': 0.0})
+    if created:
+        stats['created'] += 1
+        stats['create_seconds'] += seconds
+    else:
+        stats['reused'] += 1
+        stats['reuse_seconds'] += seconds
+
+def _get_or_create(registry, service, api_key, factory):
+    """registry에서 (service, api_key) 클라이언트를 찾고, 없으면 만들어서 등록"""
+    started = time.perf_counter()
+    with _lock:
+        client = registry.get((service, api_key))
+        if client is not None:
+            _record(service, False, time.perf_counter() - started)
+            return client
+
+    client = factory()
+    with _lock:
+        # 다른 스레드가 먼저 만들었으면 그쪽을 사용
+        client = registry.setdefault((service, api_key), client)
+        _record(service, True, time.perf_counter() - started)
+    return client
+
+def get_openai_client(api_key):
+    """API 키별 공유 OpenAI 클라이언트"""
+    return _get_or_create(
+        _clients, 'openai', api_key,
+        lambda: _new_openai_client(api_key)
+    )
+
+def get_notion_client(api_key):
+    """API 키별 공유 Notion 클라이언트"""
+    return _get_or_create(
+        _clients, 'notion', api_key,
+        lambda: _new_notion_client(api_key)
+    )
+
+def get_youtube_client(api_key):
+    """API 키별 YouTube Data API 클라이언트 (스레드마다 하나, 정적 discovery 문서 사용)"""
+    if not hasattr(_thread_local, 'clients'):
+        _thread_local.clients = {}
+    return _get_or_create(
+        _thread_local.clients, 'youtube', api_key,
+        lambda: _new_youtube_client(api_key)
+    )
+
+def client_setup_stats():
+    """서비스별 클라이언트 생성/재사용 횟수와 평균 준비 시간(ms)"""
+    with _lock:
+        snapshot = {service: dict(stats) for service, stats in _setup_stats.items()}
+    for stats in snapshot.values():
+        stats['avg_create_ms'] = round(stats['create_seconds'] / stats['created'] * 1000, 3) if stats['created'] else 0.0
+        stats['avg_reuse_ms'] = round(stats['reuse_seconds'] / stats['reused'] * 1000, 3) if stats['reused'] else 0.0
+    return snapshot
+
+def measure_setup_latency(calls=20):
+    """
+    호출당 클라이언트 준비 시간 비교
+    before: 매 호출마다 새로 생성 (기존 방식), after: 레지스트리 재사용
+    """
+    from openai import OpenAI
+    from notion_client import Client
+    from googleapiclient.discovery import build
+    factories = {
+        'openai': (lambda: OpenAI(api_key='sk-benchmark'), lambda: get_openai_client('sk-benchmark')),
+        'notion': (lambda: Client(auth='secret-benchmark'), lambda: get_notion_client('secret-benchmark')),
+        'youtube': (lambda: build('youtube', 'v3', developerKey='benchmark'), lambda: get_youtube_client('benchmark')),
+    }
+    results = {}
+    for service, (before, after) in factories.items():
+        timings = {}
+        for label, factory in (('before', before), ('after', after)):
+            started = time.perf_counter()
+            for _ in range(calls):
+                factory()
+            timings[f'{label}_ms'] = round((time.perf_counter() - started) / calls * 1000, 3)
+        results[service] = timings
+    return results
+
+if __name__ == "__main__":
+    for service, timings in measure_setup_latency().items():
+        print(f"{service:8s} 호출당 준비 시간: 기존 {timings['before_ms']:.3f}ms → 재사용 {timings['after_ms']:.3f}ms")
@@ -0,0 +1,207 @@
+"""
+GPT 분석 전 자막 압축 (토큰 예산)
+
+자동 생성 자막은 같은 내용이 여러 번 들어 있다. 이전 줄의 끝이 다음 줄 앞에 다시 나오는
+롤링 자막, [음악]/[Music] 같은 비음성 태그, "음", "어" 같은 군말과 말더듬, 항목마다 한 줄씩인
+줄바꿈이 모두 gpt-4o 입력 토큰으로 청구되고 응답도 느려진다.
+compact_transcript()는 분석 전에 다음을 적용한다.
+
+- 정해진 비음성 태그([음악], [Music], (박수), ♪ 등)와 군말 제거, 말더듬으로 바로 반복된 짧은 기능어는 하나만 남김
+  (내용일 수 있는 "어", "음"은 쉼표/말줄임표가 붙은 경우에만, "정말 정말" 같은 강조 반복은 그대로 둠)
+- 앞 줄 끝과 겹치는 단어(롤링 자막) 제거
+- 자막 항목을 문장 단위로 합치고(문장 부호가 없으면 약 LINE_CHARS 글자마다 항목 경계에서 줄바꿈) 공백 정리
+- 앞에서 이미 나온 같은 문장 제거
+- token_budget이 있으면 영상 전체에서 고르게 문장을 남겨 예산 안으로 줄임
+
+사용법:
+    python compactor.py subtitles/xxx_trans.txt [토큰 예산]
+"""
+import os
+import re
+import sys
+
+# 압축 규칙을 바꾸면 올릴 것 (분석 캐시 키에 포함됨)
+COMPACTOR_VERSION = "2"
+
+# 토큰 예산 기본값 (YOUNOTION_TOKEN_BUDGET, 없으면 압축만 하고 자르지 않음)
+DEFAULT_TOKEN_BUDGET = int(os.getenv('YOUNOTION_TOKEN_BUDGET') or 0) or None
+
+# 문장 부호 없이 이어지는 자막을 줄바꿈하는 기준 길이 (글자)
+LINE_CHARS = 200
+# 롤링 자막 겹침으로 볼 최소/최대 단어 수 (항목 전체가 겹치면 최소 길이와 관계없이 제거)
+MIN_OVERLAP_WORDS = 2
+MAX_OVERLAP_WORDS = 20
+# 이 글자 수 이상인 문장만 중복 문장 제거 대상 ("네.", "맞아요." 같은 짧은 대답은 남김)
+MIN_DUPLICATE_SENTENCE_CHARS = 20
+
+# 자막에 들어가는 비음성 태그 ([태그] 또는 (태그) 형태, 이 목록에 없는 괄호 내용은 그대로 둠)
+NON_SPEECH_TAGS = (
+    '음악', '박수', '웃음', '환호', '함성', '침묵', '소음', '외국어', '음악 소리', '박수 소리', '웃음 소리',
+    'music', 'applause', 'laughter', 'laughs', 'laughing', 'cheering', 'cheers', 'silence', 'noise',
+    'inaudible', 'foreign', 'background music', 'music playing', 'upbeat music', 'no audio',
+)
+NON_SPEECH_PATTERN = re.compile(
+    r'\[\s*(?:' + '|'.join(map(re.escape, NON_SPEECH_TAGS)) + r')\s*\]'
+    r'|\(\s*(?:' + '|'.join(map(re.escape, NON_SPEECH_TAGS)) + r')\s*\)'
+    r'|[♪♫♬♩]+',
+    re.IGNORECASE
+)
+SPEAKER_MARK_PATTERN = re.compile(r'(?:^|\s)>>+\s*')
+# 항상 군말인 단어
+FILLER_WORDS = {'음음', '어어', '으음', 'um', 'umm', 'uh', 'uhh', 'erm', 'hmm', 'mm', 'mhm'}
+# 단어로도 쓰이므로("어", "음") 쉼표/말줄임표가 붙었을 때만 군말로 보는 단어
+PAUSE_FILLER_WORDS = {'음', '어', '그'}
+PAUSE_MARKS = (',', '…', '...', '，')
+# 말더듬으로 바로 반복되기 쉬운 짧은 기능어 (이 밖의 반복은 강조일 수 있으므로 그대로 둠)
+STUTTER_WORDS = {
+    '그', '이', '저', '그게', '이게', '저는', '제가', '뭐', '좀', '막', '이제', '근데',
+    'i', 'the', 'a', 'an', 'and', 'to', 'of', 'in', 'it', 'that', 'we', 'you', 'is', 'but', 'this',
+}
+SENTENCE_END = ('.', '?', '!', '…', '。', '？', '！')
+_PUNCTUATION = '.,?!…。，？！"\'“”‘’'
+
+def estimate_tokens(text):
+    """
+    토큰 수 추정 (tokenizer 없이 근사)
+    한글 등 비ASCII 문자는 글자당 약 1토큰, ASCII는 4글자당 약 1토큰으로 계산
+    """
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii) // 4 + 1
+
+def _normalize(word):
+    return word.strip(_PUNCTUATION).lower()
+
+def _clean_words(line, stats):
+    """한 자막 항목에서 비음성 태그/군말/말더듬 반복을 뺀 단어 목록"""
+    line, tags = NON_SPEECH_PATTERN.subn(' ', line)
+    stats['removed_tags'] += tags
+    line = SPEAKER_MARK_PATTERN.sub(' ', line)
+    words = []
+    for word in line.split():
+        key = _normalize(word)
+        if not key and not word.endswith(SENTENCE_END):
+            continue
+        if key in FILLER_WORDS or (key in PAUSE_FILLER_WORDS and word.endswith(PAUSE_MARKS)):
+            stats['removed_fillers'] += 1
+            continue
+        if words and key in STUTTER_WORDS and key == _normalize(words[-1]):
+            # 말더듬/반복 ("그 그", "the the"): 문장 부호는 뒤쪽 단어 것을 남김
+            words[-1] = word
+            stats['removed_repeats'] += 1
+            continue
+        words.append(word)
+    return words
+
+def _overlap(tail, words):
+    """tail의 끝과 words의 앞이 겹치는 단어 수 (정규화해서 비교)"""
+    limit = min(len(tail), len(words), MAX_OVERLAP_WORDS)
+    tail_keys = [_normalize(word) for word in tail[-limit:]] if limit else []
+    for size in range(limit, 0, -1):
+        if size < MIN_OVERLAP_WORDS and size < len(words):
+            break
+        if tail_keys[-size:] == [_normalize(word) for word in words[:size]]:
+            return size
+    return 0
+
+def _sentences(lines, stats):
+    """자막 항목들을 롤링 겹침을 없앤 뒤 문장 단위로 합침"""
+    sentences = []
+    current = []
+    current_chars = 0
+    tail = []
+    for line in lines:
+        words = _clean_words(line, stats)
+        overlap = _overlap(tail, words)
+        stats['removed_overlap_words'] += overlap
+        words = words[overlap:]
+        for word in words:
+            current.append(word)
+            current_chars += len(word) + 1
+            if word.endswith(SENTENCE_END):
+                sentences.append(" ".join(current))
+                current = []
+                current_chars = 0
+        tail = (tail + words)[-MAX_OVERLAP_WORDS:]
+        # 문장 부호가 없는 자동 자막은 항목 경계에서 적당한 길이로 끊음
+        if current_chars >= LINE_CHARS:
+            sentences.append(" ".join(current))
+            current = []
+            current_chars = 0
+    if current:
+        sentences.append(" ".join(current))
+    return sentences
+
+def _drop_duplicate_sentences(sentences, stats):
+    seen = set()
+    kept = []
+    for sentence in sentences:
+        key = " ".join(_normalize(word) for word in sentence.split())
+        if len(key) >= MIN_DUPLICATE_SENTENCE_CHARS:
+            if key in seen:
+                stats['removed_sentences'] += 1
+                continue
+            seen.add(key)
+        kept.append(sentence)
+    return kept
+
+def _fit_budget(sentences, token_budget, stats):
+    """앞부분만 남기지 않도록, 영상 전체에서 고르게 문장을 골라 token_budget 이하로 줄임"""
+    tokens = [estimate_tokens(sentence) for sentence in sentences]
+    total = sum(tokens)
+    if total <= token_budget:
+        return sentences
+    kept = []
+    used = 0
+    seen = 0
+    for sentence, count in zip(sentences, tokens):
+        seen += count
+        # 지금까지 읽은 분량에 비례한 예산 안에 들어갈 때만 남김
+        if used + count <= token_budget * seen / total:
+            kept.append(sentence)
+            used += count
+    stats['trimmed_sentences'] = len(sentences) - len(kept)
+    return kept
+
+def compact_transcript(transcript_text, token_budget=None):
+    """
+    자막 텍스트(항목마다 한 줄)를 GPT 입력용으로 압축
+    token_budget: 압축한 뒤에도 이 토큰 수(추정치)를 넘으면 문장을 골라 줄임 (None이면 줄이지 않음)
+    반환값: (압축된 텍스트(문장마다 한 줄), 통계 dict)
+    """
+    stats = {
+        'original_tokens': estimate_tokens(transcript_text),
+        'removed_tags': 0,
+        'removed_fillers': 0,
+        'removed_repeats': 0,
+        'removed_overlap_words': 0,
+        'removed_sentences': 0,
+        'trimmed_sentences': 0,
+    }
+    sentences = _sentences(transcript_text.splitlines(), stats)
+    sentences = _drop_duplicate_sentences(sentences, stats)
+    if token_budget:
+        sentences = _fit_budget(sentences, token_budget, stats)
+    compacted = "\n".join(sentences)
+    stats['compacted_tokens'] = estimate_tokens(compacted)
+    stats['reduction'] = round(1 - stats['compacted_tokens'] / stats['original_tokens'], 4)
+    return compacted, stats
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        print("사용법: python compactor.py <자막 파일> [토큰 예산]")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        text = f.read()
+    token_budget = int(sys.argv[2]) if len(sys.argv) == 3 else DEFAULT_TOKEN_BUDGET
+    compacted, stats = compact_transcript(text, token_budget)
+    print(compacted)
+    print(
+        f"\n🗜️ {stats['original_tokens']:,} → {stats['compacted_tokens']:,} 토큰 ({stats['reduction']:.0%} 감소)",
+        file=sys.stderr
+    )
+    for key, value in stats.items():
+        if key.startswith(('removed_', 'trimmed_')):
+            print(f"  {key}: {value:,}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+거의 같은 자막 찾기 (MinHash + LSH)
+
+재업로드 영상, 긴 영상에서 잘라 낸 쇼츠, 미러 채널처럼 자막이 거의 같은 영상을
+다시 GPT로 분석하지 않도록, 처리한 모든 자막의 MinHash 서명을 SQLite에 저장해 두고
+분석 전에 비슷한 자막을 찾는다.
+
+- 자막을 compactor로 정리(롤링 겹침, [음악] 태그 제거)한 뒤 단어 SHINGLE_WORDS개 묶음(shingle)의 집합으로 본다.
+- 서명: shingle 해시에 NUM_PERM개의 마스크를 XOR한 값의 최솟값들 (같은 칸의 비율 ≈ Jaccard 유사도)
+- LSH: 서명을 BANDS개 띠로 나눠 띠마다 해시한 값(bucket)을 색인해 두고, bucket이 하나라도 같은 항목만 후보로 비교
+  → 저장된 서명 수와 관계없이 조회는 bucket BANDS개를 찾는 색인 조회 한 번
+- 긴 자막은 WINDOW_SHINGLES개짜리 구간 서명을 WINDOW_STRIDE(구간의 절반)씩 겹치게 함께 저장한다.
+  쇼츠처럼 짧은 자막은 전체 서명과는 Jaccard 유사도가 낮으므로, 조회할 때는 자막을 WINDOW_STRIDE개씩
+  나눈 조각(piece)의 서명으로도 bucket을 찾는다. 어디서 잘라 낸 조각이든 저장된 구간 하나에 통째로
+  들어가므로, 조각마다 가장 많이 겹치는 구간으로 "이 자막이 기존 영상에 포함된 비율"을 추정한다.
+- shingle이 MIN_SHINGLES개보다 적은 자막("시청해 주셔서 감사합니다"처럼 짧은 자막)은 서명을 만들지 않는다.
+
+사용법:
+    python duplicate_index.py subtitles/xxx_trans.txt   # 저장된 자막 중 비슷한 영상 찾기
+"""
+import hashlib
+import operator
+import os
+import random
+import re
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from cache import CACHE_DIR
+from compactor import compact_transcript
+
+# 서명 설정 (바꾸면 SIGNATURE_VERSION을 올릴 것 → 기존 서명은 비교하지 않음)
+SIGNATURE_VERSION = 2
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_WORDS = 5
+WINDOW_SHINGLES = 100
+WINDOW_STRIDE = WINDOW_SHINGLES // 2
+# 이보다 shingle이 적은 자막은 서로 관계없어도 쉽게 같아지므로 비교하지 않음
+MIN_SHINGLES = 20
+# 조회할 때 bucket을 찾고 포함 비율을 계산할 조각 수 상한 (긴 자막은 고르게 골라 씀)
+MAX_PROBES = 16
+# SQLite 변수 개수 제한(오래된 버전 999) 안에서 bucket/video_id 목록을 나눠 조회
+_QUERY_CHUNK = 500
+# 이 유사도 이상이면 같은 내용의 영상으로 봄 (Jaccard 또는 기존 영상에 포함된 비율)
+DEFAULT_THRESHOLD = 0.7
+
+_SIGNATURE = struct.Struct(f'<{NUM_PERM}I')
+_MASKS = [random.Random(20240601 + i).getrandbits(32) for i in range(NUM_PERM)]
+_WORD_PATTERN = re.compile(r'\w+')
+
+def _hash32(text):
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=4).digest(), 'little')
+
+def shingle_hashes(text):
+    """자막 텍스트의 shingle 해시 목록 (자막 순서대로, 중복 포함)"""
+    compacted, _ = compact_transcript(text)
+    words = _WORD_PATTERN.findall(compacted.lower())
+    if len(words) < SHINGLE_WORDS:
+        return []
+    return [_hash32(" ".join(words[i:i + SHINGLE_WORDS])) for i in range(len(words) - SHINGLE_WORDS + 1)]
+
+def minhash(hashes):
+    """shingle 해시 집합의 MinHash 서명 (NUM_PERM개 정수 tuple)"""
+    hashes = set(hashes)
+    return tuple(min(map(mask.__xor__, hashes)) for mask in _MASKS)
+
+def similarity(a, b):
+    """두 서명의 추정 Jaccard 유사도"""
+    return sum(map(operator.eq, a, b)) / NUM_PERM
+
+def band_buckets(signature):
+    """LSH bucket 값 BANDS개 (SQLite INTEGER에 들어가도록 63비트)"""
+    buckets = []
+    for band in range(BANDS):
+        rows = struct.pack(f'<H{ROWS}I', band, *signature[band * ROWS:(band + 1) * ROWS])
+        buckets.append(int.from_bytes(hashlib.blake2b(rows, digest_size=8).digest(), 'little') >> 1)
+    return buckets
+
+def _chunks(items, size=_QUERY_CHUNK):
+    """IN (...) 조회용으로 items를 size개씩 나눔"""
+    items = list(items)
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def _spread(items, limit):
+    """items 중 최대 limit개를 고르게 고름"""
+    if len(items) <= limit:
+        return list(items)
+    return [items[i * len(items) // limit] for i in range(limit)]
+
+class TranscriptSketch:
+    """자막 하나의 서명 (전체 서명 + 긴 자막이면 저장용 구간 서명 + 조회용 조각 서명)"""
+
+    def __init__(self, size, signature, windows=(), pieces=()):
+        self.size = size            # 서로 다른 shingle 수
+        self.signature = signature
+        self.windows = list(windows)  # 저장용 [(shingle 수, 서명), ...] (WINDOW_STRIDE씩 겹침)
+        self.pieces = list(pieces)    # 조회용 [(shingle 수, 서명), ...] (겹치지 않는 WINDOW_STRIDE개씩)
+        self._probe_buckets = None
+
+    @classmethod
+    def from_text(cls, text):
+        """자막 텍스트로 서명 계산 (shingle이 MIN_SHINGLES개보다 적으면 None)"""
+        hashes = shingle_hashes(text)
+        if len(set(hashes)) < MIN_SHINGLES:
+            return None
+        windows = []
+        pieces = []
+        # 구간 하나보다 긴 자막만 구간/조각 서명을 만듦 (짧은 자막은 전체 서명이 곧 구간)
+        if len(hashes) > WINDOW_SHINGLES:
+            starts = list(range(0, len(hashes) - WINDOW_SHINGLES + 1, WINDOW_STRIDE))
+            if starts[-1] + WINDOW_SHINGLES < len(hashes):
+                starts.append(len(hashes) - WINDOW_SHINGLES)
+            for start in starts:
+                window = hashes[start:start + WINDOW_SHINGLES]
+                windows.append((len(set(window)), minhash(window)))
+        if len(hashes) > WINDOW_STRIDE:
+            for start in range(0, len(hashes), WINDOW_STRIDE):
+                piece = hashes[start:start + WINDOW_STRIDE]
+                pieces.append((len(set(piece)), minhash(piece)))
+        return cls(len(set(hashes)), minhash(hashes), windows, pieces)
+
+    def probes(self):
+        """조회에 쓸 (shingle 수, 서명) 목록: 조각이 없으면 전체 서명 하나"""
+        return _spread(self.pieces, MAX_PROBES) or [(self.size, self.signature)]
+
+    def probe_buckets(self):
+        """전체 서명과 조회용 조각 서명의 LSH bucket (서명과 함께 한 번만 계산)"""
+        if self._probe_buckets is None:
+            buckets = set(band_buckets(self.signature))
+            for _, signature in self.probes():
+                buckets.update(band_buckets(signature))
+            self._probe_buckets = list(buckets)
+        return self._probe_buckets
+
+class DuplicateIndex:
+    """video_id → 자막 서명 LSH 색인 (스레드 안전)"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # 서명은 자막에서 다시 계산할 수 있으므로 커밋마다 fsync하지 않음 (WAL에서는 손상 없이 마지막 커밋만 잃을 수 있음)
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            " video_id TEXT PRIMARY KEY,"
+            " title TEXT,"
+            " channel TEXT,"
+            " video_url TEXT,"
+            " analysis_path TEXT,"
+            " notion_url TEXT,"
+            " version INTEGER NOT NULL,"
+            " updated_at REAL NOT NULL)"
+        )
+        # position: -1이면 자막 전체, 0 이상이면 구간 번호
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " id INTEGER PRIMARY KEY,"
+            " video_id TEXT NOT NULL,"
+            " position INTEGER NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " signature BLOB NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_video ON entries (video_id)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " bucket INTEGER NOT NULL,"
+            " entry_id INTEGER NOT NULL,"
+            " PRIMARY KEY (bucket, entry_id)) WITHOUT ROWID"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS buckets_entry ON buckets (entry_id)")
+
+    def _delete_entries(self, video_id):
+        self._conn.execute(
+            "DELETE FROM buckets WHERE entry_id IN (SELECT id FROM entries WHERE video_id = ?)", (video_id,)
+        )
+        self._conn.execute("DELETE FROM entries WHERE video_id = ?", (video_id,))
+
+    def add(self, video_id, sketch, title=None, channel=None, video_url=None):
+        """자막 서명 등록 또는 교체 (분석 결과 정보는 유지)"""
+        entries = [(-1, sketch.size, sketch.signature)]
+        entries += [(i, size, signature) for i, (size, signature) in enumerate(sketch.windows)]
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._conn.execute(
+                    "INSERT INTO videos (video_id, title, channel, video_url, version, updated_at) VALUES (?, ?, ?, ?, ?, ?)"
+                    " ON CONFLICT (video_id) DO UPDATE SET title = excluded.title, channel = excluded.channel,"
+                    " video_url = excluded.video_url, version = excluded.version, updated_at = excluded.updated_at",
+                    (video_id, title, channel, video_url, SIGNATURE_VERSION, time.time())
+                )
+                self._delete_entries(video_id)
+                for position, size, signature in entries:
+                    entry_id = self._conn.execute(
+                        "INSERT INTO entries (video_id, position, size, signature) VALUES (?, ?, ?, ?)",
+                        (video_id, position, size, _SIGNATURE.pack(*signature))
+                    ).lastrowid
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO buckets (bucket, entry_id) VALUES (?, ?)",
+                        [(bucket, entry_id) for bucket in band_buckets(signature)]
+                    )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def set_analysis(self, video_id, analysis_path=None, notion_url=None):
+        """영상의 분석 리포트 파일/Notion 페이지 기록 (None인 값은 그대로 둠)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE videos SET analysis_path = COALESCE(?, analysis_path), notion_url = COALESCE(?, notion_url)"
+                " WHERE video_id = ?",
+                (analysis_path, notion_url, video_id)
+            )
+
+    def remove(self, video_id):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._delete_entries(video_id)
+                self._conn.execute("DELETE FROM videos WHERE video_id = ?", (video_id,))
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def find(self, sketch, threshold=DEFAULT_THRESHOLD, exclude=None):
+        """
+        sketch와 거의 같은 자막의 영상 찾기
+        전체 서명과 조각 서명으로 bucket을 찾아 후보 영상을 모은 뒤, 후보 영상의 서명을 모두 읽어 비교한다.
+        유사도는 자막 전체 서명끼리의 Jaccard 유사도가 threshold 이상이면 그 값('duplicate'),
+        아니면 이 자막이 기존 영상에 포함된 비율('clip')
+        반환값: [{'video_id', 'title', 'channel', 'video_url', 'analysis_path', 'notion_url',
+                 'similarity', 'kind'('duplicate' | 'clip')}, ...] (유사도 높은 순)
+        """
+        probes = sketch.probes()
+        buckets = sketch.probe_buckets()
+
+        candidates = set()
+        with self._lock:
+            for chunk in _chunks(buckets):
+                candidates.update(row[0] for row in self._conn.execute(
+                    "SELECT DISTINCT e.video_id FROM buckets b JOIN entries e ON e.id = b.entry_id"
+                    f" WHERE b.bucket IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ))
+            candidates.discard(exclude)
+            if not candidates:
+                return []
+            entries = {}
+            for chunk in _chunks(candidates):
+                for video_id, position, size, blob in self._conn.execute(
+                    "SELECT video_id, position, size, signature FROM entries"
+                    f" WHERE video_id IN ({', '.join('?' * len(chunk))})",
+                    chunk
+                ):
+                    entries.setdefault(video_id, []).append((position, size, _SIGNATURE.unpack(blob)))
+
+        matches = []
+        for video_id, video_entries in entries.items():
+            whole = [signature for position, _, signature in video_entries if position < 0]
+            jaccard = similarity(sketch.signature, whole[0]) if whole else 0.0
+            if jaccard >= threshold:
+                matches.append((video_id, round(jaccard, 3), 'duplicate'))
+                continue
+            contained = self._contained(probes, video_entries)
+            if contained >= threshold:
+                matches.append((video_id, round(contained, 3), 'clip'))
+        if not matches:
+            return []
+
+        info = {}
+        with self._lock:
+            for chunk in _chunks(video_id for video_id, _, _ in matches):
+                info.update(
+                    (row[0], row[1:]) for row in self._conn.execute(
+                        "SELECT video_id, title, channel, video_url, analysis_path, notion_url FROM videos"
+                        f" WHERE version = ? AND video_id IN ({', '.join('?' * len(chunk))})",
+                        [SIGNATURE_VERSION] + chunk
+                    )
+                )
+        results = []
+        for video_id, value, kind in sorted(matches, key=lambda match: -match[1]):
+            if video_id not in info:
+                continue
+            title, channel, video_url, analysis_path, notion_url = info[video_id]
+            results.append({
+                'video_id': video_id, 'title': title, 'channel': channel, 'video_url': video_url,
+                'analysis_path': analysis_path, 'notion_url': notion_url,
+                'similarity': value, 'kind': kind,
+            })
+        return results
+
+    @staticmethod
+    def _contained(probes, video_entries):
+        """
+        조회 자막 조각들이 영상의 구간에 들어 있는 비율 추정
+        조각마다 가장 많이 겹치는 구간의 겹침 수 |A∩B| = J(|A|+|B|)/(1+J)를 더해 조각 크기 합으로 나눔
+        (구간 서명이 없는 짧은 영상은 전체 서명을 구간 하나로 봄. 긴 영상의 전체 서명은 크기 차이가 커서
+        추정 오차가 크므로 쓰지 않음)
+        """
+        windows = [(size, signature) for position, size, signature in video_entries if position >= 0]
+        if not windows:
+            windows = [(size, signature) for _, size, signature in video_entries]
+        overlap = 0.0
+        total = 0
+        for piece_size, piece in probes:
+            best = 0.0
+            for size, signature in windows:
+                jaccard = similarity(piece, signature)
+                if jaccard:
+                    best = max(best, min(piece_size, jaccard * (piece_size + size) / (1 + jaccard)))
+            overlap += best
+            total += piece_size
+        return overlap / total if total else 0.0
+
+    def stats(self):
+        with self._lock:
+            videos = self._conn.execute("SELECT COUNT(*) FROM videos").fetchone()[0]
+            entries = self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        return {'videos': videos, 'signatures': entries}
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_duplicate_index():
+    """프로세스 전체에서 공유하는 자막 서명 색인"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = DuplicateIndex(os.path.join(CACHE_DIR, 'duplicate_index.sqlite3'))
+        return _index
+
+def main():
+    if len(sys.argv) != 2:
+        print("사용법: python duplicate_index.py <자막 파일>")
+        sys.exit(1)
+    with open(sys.argv[1], 'r', encoding='utf-8') as f:
+        sketch = TranscriptSketch.from_text(f.read())
+    if sketch is None:
+        print("자막 내용이 없습니다.")
+        return
+    index = get_duplicate_index()
+    started = time.perf_counter()
+    matches = index.find(sketch)
+    elapsed = (time.perf_counter() - started) * 1000
+    print(f"🔎 서명 {index.stats()['signatures']:,}개 중 조회: {elapsed:.2f}ms")
+    for match in matches:
+        label = "재업로드/미러" if match['kind'] == 'duplicate' else "포함된 구간"
+        print(f"- [{match['similarity']:.0%} {label}] {match['title']} ({match['video_url']})")
+        if match['analysis_path'] or match['notion_url']:
+            print(f"  분석: {match['notion_url'] or match['analysis_path']}")
+    if not matches:
+        print("비슷한 자막이 없습니다.")
+
+if __name__ == "__main__":
+    main()
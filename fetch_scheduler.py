@@ -0,0 +1,306 @@
+"""
+자막 요청 스케줄러 (재시도, 프록시 풀, 서킷 브레이커, 적응형 동시 실행 수)
+
+YouTube는 요청이 몰리면 429(Too Many Requests)나 IP 차단으로 응답한다.
+고정 간격 재시도로는 배치 전체가 같이 실패하므로 요청마다 다음을 적용한다.
+
+- 지수 백오프 + full jitter 재시도 (자막 없음/영상 없음 같은 영구 오류는 재시도하지 않음)
+- 프록시 풀: 프록시마다 건강 점수(최근 성공률)를 두고 점수에 비례해 골라 돌려 쓴다.
+  429/차단을 받은 프록시는 잠시 쉬게 한다.
+- 서킷 브레이커: 429/차단이 연속으로 나면 잠시 모든 요청을 멈추고, 시간이 지나면 요청 하나로 상태를 확인
+- 적응형 동시 실행 수(AIMD): 성공하면 조금씩 늘리고, 429/차단을 받으면 절반으로 줄임
+
+프록시 목록은 YOUNOTION_PROXIES 환경 변수(쉼표로 구분)로 지정한다.
+시각(clock), 대기(sleep), 난수(rng)는 바꿔 넣을 수 있어 가짜 자막 서비스로 상태 변화를 그대로 재현할 수 있다
+(tests/test_fetch_scheduler.py).
+"""
+import os
+import random
+import threading
+import time
+import metrics
+
+# 재시도 설정
+DEFAULT_MAX_ATTEMPTS = 4
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30.0
+
+# 서킷 브레이커: 연속 429/차단 횟수, 처음 쉬는 시간(초, 다시 열리면 두 배씩 최대 BREAKER_MAX_COOLDOWN)
+BREAKER_THRESHOLD = 5
+BREAKER_COOLDOWN = 30.0
+BREAKER_MAX_COOLDOWN = 600.0
+# 브레이커가 열려 있을 때 이 시간(초)까지는 기다렸다가 보내고, 더 길면 바로 실패
+BREAKER_MAX_WAIT = 120.0
+
+# 동시 실행 수 범위
+DEFAULT_CONCURRENCY = 4
+MIN_CONCURRENCY = 1
+MAX_CONCURRENCY = 16
+
+# 429/차단을 받은 프록시를 쉬게 하는 시간(초, 연속으로 받으면 두 배씩 최대 PROXY_MAX_COOLDOWN)
+PROXY_COOLDOWN = 5.0
+PROXY_MAX_COOLDOWN = 300.0
+# 건강 점수 지수 이동 평균 가중치
+HEALTH_ALPHA = 0.3
+# 점수가 0이 된 프록시도 가끔은 다시 시도되도록 하는 최소 가중치
+MIN_PROXY_WEIGHT = 0.05
+
+# 재시도해도 결과가 같은 youtube_transcript_api 예외
+PERMANENT_ERRORS = {
+    'TranscriptsDisabled', 'NoTranscriptFound', 'NoTranscriptAvailable', 'VideoUnavailable',
+    'InvalidVideoId', 'TranslationLanguageNotAvailable', 'NotTranslatable', 'AgeRestricted',
+    'VideoUnplayable', 'CookiePathInvalid', 'CookiesInvalid', 'FailedToCreateConsentCookie',
+}
+# 요청 한도 초과/차단을 뜻하는 예외
+THROTTLE_ERRORS = {'TooManyRequests', 'IpBlocked', 'RequestBlocked'}
+
+class PermanentError(Exception):
+    """재시도하지 않는 오류 (예: 요청한 조건에 맞는 자막이 없음)"""
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 요청을 보내지 않음"""
+
+def classify_error(error):
+    """오류 분류: 'permanent' | 'throttle' | 'transient'"""
+    name = type(error).__name__
+    if isinstance(error, PermanentError) or name in PERMANENT_ERRORS:
+        return 'permanent'
+    status = getattr(error, 'status', None) or getattr(getattr(error, 'response', None), 'status_code', None)
+    message = str(error)
+    if name in THROTTLE_ERRORS or status == 429 or '429' in message or 'Too Many Requests' in message:
+        return 'throttle'
+    return 'transient'
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP, rng=random):
+    """attempt번째 재시도 전 대기 시간 (지수 백오프 + full jitter)"""
+    return rng.uniform(0, min(cap, base * (2 ** attempt)))
+
+def proxies_from_env():
+    """
+    환경 변수에서 프록시 목록 읽기
+    YOUNOTION_PROXIES가 없으면 Streamlit Cloud에서만 HTTP(S)_PROXY를 사용 (기존 동작)
+    반환값: 프록시 URL 목록 (비어 있으면 직접 연결)
+    """
+    configured = [p.strip() for p in os.getenv('YOUNOTION_PROXIES', '').split(',') if p.strip()]
+    if configured:
+        return configured
+    if 'STREAMLIT_SERVER' in os.environ and (os.getenv('HTTPS_PROXY') or os.getenv('HTTP_PROXY')):
+        return [os.getenv('HTTPS_PROXY') or os.getenv('HTTP_PROXY')]
+    return []
+
+class ProxyPool:
+    """건강 점수 기반 프록시 선택 (프록시가 없으면 직접 연결 하나만 있는 풀)"""
+
+    def __init__(self, proxies=None, cooldown=PROXY_COOLDOWN, max_cooldown=PROXY_MAX_COOLDOWN, rng=None, clock=time.monotonic):
+        self._proxies = list(proxies or []) or [None]
+        self._health = {proxy: 1.0 for proxy in self._proxies}
+        self._cooling_until = {proxy: 0.0 for proxy in self._proxies}
+        self._throttled = {proxy: 0 for proxy in self._proxies}
+        self._cooldown = cooldown
+        self._max_cooldown = max_cooldown
+        self._random = rng or random.Random()
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def choose(self):
+        """
+        쉬는 중이 아닌 프록시 중에서 건강 점수에 비례해 하나 선택
+        반환값: (프록시, 기다려야 하는 시간) - 모두 쉬는 중이면 가장 먼저 풀리는 프록시와 남은 시간
+        """
+        now = self._clock()
+        with self._lock:
+            available = [proxy for proxy in self._proxies if self._cooling_until[proxy] <= now]
+            if not available:
+                proxy = min(self._proxies, key=lambda proxy: self._cooling_until[proxy])
+                return proxy, self._cooling_until[proxy] - now
+            weights = [max(self._health[proxy], MIN_PROXY_WEIGHT) for proxy in available]
+            return self._random.choices(available, weights=weights)[0], 0.0
+
+    def report(self, proxy, outcome):
+        """요청 결과 반영 (outcome: 'ok' | 'throttle' | 'transient' | 'permanent')"""
+        with self._lock:
+            if proxy not in self._health:
+                return
+            # 영구 오류는 영상 문제이므로 프록시 점수에 반영하지 않음
+            if outcome == 'permanent':
+                return
+            success = 1.0 if outcome == 'ok' else 0.0
+            self._health[proxy] = (1 - HEALTH_ALPHA) * self._health[proxy] + HEALTH_ALPHA * success
+            if outcome == 'throttle':
+                cooldown = min(self._cooldown * (2 ** self._throttled[proxy]), self._max_cooldown)
+                self._throttled[proxy] += 1
+                self._cooling_until[proxy] = self._clock() + cooldown
+            elif outcome == 'ok':
+                self._throttled[proxy] = 0
+
+    @staticmethod
+    def requests_proxies(proxy):
+        """youtube_transcript_api(requests)에 넘길 proxies dict"""
+        return {'http': proxy, 'https': proxy} if proxy else None
+
+    def stats(self):
+        now = self._clock()
+        with self._lock:
+            return [
+                {
+                    'proxy': proxy or 'direct',
+                    'health': round(self._health[proxy], 3),
+                    'cooling': self._cooling_until[proxy] > now,
+                }
+                for proxy in self._proxies
+            ]
+
+class CircuitBreaker:
+    """연속 429/차단이 threshold번 나면 열리고, cooldown 뒤에 요청 하나로 상태를 확인 (half-open)"""
+
+    def __init__(self, threshold=BREAKER_THRESHOLD, cooldown=BREAKER_COOLDOWN, max_cooldown=BREAKER_MAX_COOLDOWN,
+                 clock=time.monotonic):
+        self.threshold = threshold
+        self.base_cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.cooldown = cooldown
+        self.opened = 0
+        self._failures = 0
+        self._open_until = 0.0
+        self._probing = False
+        self._clock = clock
+        self._lock = threading.Lock()
+
+    def wait_time(self):
+        """요청을 보내기 전 기다려야 하는 시간(초), 0이면 바로 보내도 됨"""
+        with self._lock:
+            remaining = self._open_until - self._clock()
+            if remaining > 0:
+                return remaining
+            if self._open_until and self._probing:
+                # half-open: 확인 요청이 끝날 때까지 나머지는 잠시 대기
+                return min(1.0, self.cooldown)
+            if self._open_until:
+                self._probing = True
+            return 0.0
+
+    def record(self, outcome):
+        with self._lock:
+            if outcome == 'throttle':
+                self._failures += 1
+                if self._probing or self._failures >= self.threshold:
+                    if self._probing:
+                        self.cooldown = min(self.cooldown * 2, self.max_cooldown)
+                    self._open_until = self._clock() + self.cooldown
+                    self._probing = False
+                    self._failures = 0
+                    self.opened += 1
+                    print(f"🚧 YouTube 요청 한도 초과가 계속되어 {self.cooldown:.0f}초 동안 자막 요청을 멈춥니다.")
+            elif outcome == 'ok':
+                self._failures = 0
+                if self._open_until:
+                    self._open_until = 0.0
+                    self._probing = False
+                    self.cooldown = self.base_cooldown
+            elif self._probing:
+                # 확인 요청이 다른 이유로 실패하면 다음 요청이 다시 확인
+                self._probing = False
+
+    @property
+    def state(self):
+        with self._lock:
+            if self._open_until > self._clock():
+                return 'open'
+            return 'half-open' if self._open_until else 'closed'
+
+class AdaptiveLimiter:
+    """오류율에 따라 동시 실행 수를 조절하는 AIMD 리미터"""
+
+    def __init__(self, initial=DEFAULT_CONCURRENCY, minimum=MIN_CONCURRENCY, maximum=MAX_CONCURRENCY):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def release(self, outcome):
+        with self._cond:
+            self._in_flight -= 1
+            if outcome == 'ok':
+                # 한 "라운드"(limit개 성공)마다 1씩 증가
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            elif outcome == 'throttle':
+                self.limit = max(self.minimum, self.limit / 2)
+            self._cond.notify_all()
+
+    @property
+    def in_flight(self):
+        with self._cond:
+            return self._in_flight
+
+class FetchScheduler:
+    """프록시 풀 + 서킷 브레이커 + 적응형 동시 실행 수 + 백오프 재시도"""
+
+    def __init__(self, service='youtube_transcript', proxies=None, max_attempts=DEFAULT_MAX_ATTEMPTS,
+                 breaker=None, limiter=None, rng=None, sleep=time.sleep, clock=time.monotonic):
+        self.service = service
+        self.max_attempts = max_attempts
+        self.pool = ProxyPool(proxies, rng=rng, clock=clock)
+        self.breaker = breaker or CircuitBreaker(clock=clock)
+        self.limiter = limiter or AdaptiveLimiter()
+        self._random = rng or random.Random()
+        self._sleep = sleep
+
+    def call(self, func):
+        """
+        func(proxies)를 실행 (proxies: requests 형식 dict 또는 직접 연결이면 None)
+        재시도할 수 있는 오류면 백오프 후 다른 프록시로 다시 시도하고, 마지막 오류를 그대로 던진다.
+        """
+        for attempt in range(self.max_attempts):
+            wait = self.breaker.wait_time()
+            if wait > BREAKER_MAX_WAIT:
+                raise CircuitOpenError(f"YouTube 요청 한도 초과로 {wait:.0f}초 동안 자막 요청이 중지되었습니다.")
+            while wait > 0:
+                self._sleep(wait)
+                wait = self.breaker.wait_time()
+
+            proxy, wait = self.pool.choose()
+            if wait > 0:
+                self._sleep(wait)
+            self.limiter.acquire()
+            outcome = 'ok'
+            try:
+                return func(self.pool.requests_proxies(proxy))
+            except Exception as e:
+                outcome = classify_error(e)
+                if outcome == 'permanent' or attempt == self.max_attempts - 1:
+                    raise
+                delay = backoff_delay(attempt, rng=self._random)
+                metrics.count_retry(self.service, reason=outcome)
+                print(f"⏳ 자막 요청 실패({outcome}), {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_attempts - 1}): {e}")
+            finally:
+                self.pool.report(proxy, outcome)
+                self.breaker.record(outcome)
+                self.limiter.release(outcome)
+            self._sleep(delay)
+
+    def stats(self):
+        return {
+            'concurrency_limit': round(self.limiter.limit, 2),
+            'in_flight': self.limiter.in_flight,
+            'breaker': self.breaker.state,
+            'breaker_opened': self.breaker.opened,
+            'proxies': self.pool.stats(),
+        }
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+def get_transcript_scheduler():
+    """프로세스 전체에서 공유하는 자막 요청 스케줄러 (CLI, 배치, 웹 앱 공통)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = FetchScheduler(proxies=proxies_from_env())
+        return _scheduler
@@ -0,0 +1,292 @@
+"""
+웹 앱의 영상 분석 작업
+
+Streamlit은 버튼 클릭, 다운로드, 페이지 이동마다 스크립트 전체를 다시 실행한다.
+분석을 (video_id, 옵션) 단위의 작업으로 만들어 상태와 결과를 저장해 두면,
+재실행 시에는 저장된 결과만 다시 그리고 자막/GPT/Notion 호출은 반복하지 않는다.
+
+작업은 프로세스 전체에서 공유하는 JobManager의 백그라운드 워커에서 실행된다.
+- 같은 작업 키로 동시에 들어온 요청은 실행 중인 작업 하나로 합친다 (single-flight)
+- 동시 GPT 호출 수는 전역으로 제한하고, 먼저 온 작업부터 순서대로 처리한다 (FIFO)
+- 앱은 작업 상태(대기 순번, 진행 단계, 생성 중인 텍스트)를 주기적으로 조회해서 보여준다
+
+작업 상태: pending → running → done | failed
+(GPT 분석이나 Notion 저장에 실패한 작업도 failed: 자막 등 받은 결과는 result에 남기고, 다시 제출하면 새로 실행)
+"""
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+from main import resolve_transcript, get_video_info_async, analyze_with_gpt, save_to_notion_async
+from search_index import TRANSCRIPT, ANALYSIS, index_document
+from prefetch import claim_prefetched
+import metrics
+
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# 진행 단계 (UI 표시용)
+STAGE_LABELS = {
+    'queued': "작업 대기",
+    'transcript': "자막 다운로드",
+    'metadata': "영상 정보 조회",
+    'analysis_queue': "AI 분석 대기",
+    'analysis': "AI 분석",
+    'notion': "Notion 저장",
+}
+
+# JobManager 기본 설정
+DEFAULT_WORKERS = 4
+DEFAULT_GPT_SLOTS = 2
+# 끝난 작업 결과를 다른 세션과 공유하는 시간(초)
+FINISHED_JOB_TTL = 3600
+
+def job_key(video_id, options):
+    """video_id와 분석 옵션으로 작업 키 생성"""
+    digest = hashlib.sha1(json.dumps(options, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()[:12]
+    return f"{video_id}:{digest}"
+
+class AnalysisJob:
+    """영상 하나의 분석 작업 (상태, 진행 단계, 결과, 사용자에게 보여줄 알림)"""
+
+    def __init__(self, video_id, video_url, options):
+        self.key = job_key(video_id, options)
+        self.video_id = video_id
+        self.video_url = video_url
+        self.options = options
+        self.state = PENDING
+        self.stage = None
+        self.result = None
+        self.error = None
+        # (종류, 메시지) 목록: 종류는 'info' | 'success' | 'warning' | 'error'
+        self.notices = []
+        # 생성 중인 GPT 응답 조각 (진행 중 화면 표시용)
+        self.partial = []
+        self.created_at = time.time()
+        self.finished_at = None
+
+    def notify(self, level, message):
+        self.notices.append((level, message))
+
+    @property
+    def partial_text(self):
+        return "".join(self.partial)
+
+def run_analysis_job(job, api_keys, on_delta=None, gpt_gate=None):
+    """
+    작업 실행: 자막(+동시에 영상 정보) → GPT 분석 → Notion 저장
+    api_keys: {'openai': ..., 'notion': ..., 'notion_db': ...}
+    on_delta: GPT 응답 조각을 받을 때마다 호출되는 함수 (스트리밍 표시용)
+    gpt_gate: job을 받아 GPT 호출 구간을 감싸는 context manager (동시 GPT 호출 수 제한용)
+    결과와 오류는 job에 저장되며 예외는 밖으로 던지지 않는다.
+    GPT 분석이나 Notion 저장에 실패하면 받은 결과는 job.result에 남기고 상태는 FAILED로 둔다
+    (일시적인 오류 하나로 같은 영상의 재분석이 FINISHED_JOB_TTL 동안 막히지 않도록).
+    """
+    job.state = RUNNING
+    job.error = None
+    job.notices = []
+    job.partial = []
+    try:
+        # 영상 정보는 백그라운드에서 가져오고, 그동안 자막 다운로드 (서로 독립적인 요청)
+        info_future = get_video_info_async(job.video_url, job.video_id)
+        job.stage = 'transcript'
+        # 검색 결과에서 미리 받는 중이면 그 요청을 기다림 (끝나면 아래 자막 조회는 캐시에서 바로 반환)
+        claim_prefetched(job.video_id)
+        with metrics.span('transcript', video_id=job.video_id):
+            transcript, used_language, _ = resolve_transcript(
+                job.video_id,
+                priority=[tuple(item) for item in job.options['priority']],
+                log=lambda message: job.notify('info', message)
+            )
+
+        # 영상 정보 (아직 끝나지 않았으면 기다림)
+        job.stage = 'metadata'
+        title, channel = info_future.result()
+        transcript_text = transcript.plain_text()
+        # 파일로 저장하지 않는 웹 앱 분석도 로컬 검색에서 찾을 수 있도록 색인
+        index_document(job.video_id, TRANSCRIPT, title, channel, transcript_text)
+
+        analysis_text = None
+        notion_url = None
+        failure = None
+        if api_keys['openai']:
+            # 생성되는 대로 전달하고, 스트림이 끝까지 완료된 뒤에만 색인/Notion에 저장
+            job.stage = 'analysis_queue'
+            queued_at = time.perf_counter()
+            completed = False
+            try:
+                with gpt_gate(job) if gpt_gate else nullcontext():
+                    metrics.record_stage('analysis_queue', time.perf_counter() - queued_at, video_id=job.video_id)
+                    job.stage = 'analysis'
+                    with metrics.span('analysis', video_id=job.video_id):
+                        for delta in analyze_with_gpt(transcript_text, title, channel, job.video_url, api_keys['openai'], stream=True):
+                            job.partial.append(delta)
+                            if on_delta:
+                                on_delta(delta)
+                completed = True
+            except Exception as e:
+                # 스트림 도중 실패: 지금까지 받은 조각은 잘린 리포트이므로 저장하지 않음
+                failure = f"AI 분석에 실패했습니다: {e}"
+            analysis_text = (job.partial_text or None) if completed else None
+
+            if not analysis_text:
+                failure = failure or "AI 분석에 실패했습니다."
+            else:
+                # Notion 저장을 쓰기 큐에 먼저 넣고, 기다리는 동안 로컬 검색 색인 갱신
+                notion_future = None
+                if api_keys['notion'] and api_keys['notion_db']:
+                    job.stage = 'notion'
+                    notion_started = time.perf_counter()
+                    notion_future = save_to_notion_async(
+                        analysis_text,
+                        title,
+                        channel,
+                        job.video_url,
+                        api_keys['notion_db'],
+                        api_keys['notion']
+                    )
+                index_document(job.video_id, ANALYSIS, title, channel, analysis_text)
+                if notion_future:
+                    notion_url = notion_future.result()
+                    metrics.record_stage('notion', time.perf_counter() - notion_started, 'ok' if notion_url else 'error', video_id=job.video_id)
+                    if notion_url:
+                        job.notify('success', "✅ Notion에 저장되었습니다. 결과에서 링크를 확인하세요.")
+                    else:
+                        failure = "Notion 저장에 실패했습니다."
+
+        job.result = {
+            # 자막은 열 단위 형식(TranscriptSegments) 하나만 저장하고 일반 텍스트는 필요할 때 만든다
+            'transcript': transcript,
+            'analysis_text': analysis_text,
+            'notion_url': notion_url,
+            'language': used_language,
+            'title': title,
+            'channel': channel
+        }
+        if failure:
+            job.error = failure
+            job.state = FAILED
+        else:
+            job.state = DONE
+    except Exception as e:
+        job.error = str(e)
+        job.state = FAILED
+    finally:
+        job.stage = None
+        job.finished_at = time.time()
+    return job
+
+class FairSemaphore:
+    """먼저 기다린 쪽부터 슬롯을 얻는 세마포어 (대기 순번 조회 가능)"""
+
+    def __init__(self, value):
+        self._value = value
+        self._waiters = deque()
+        self._cond = threading.Condition()
+
+    def acquire(self, owner):
+        with self._cond:
+            self._waiters.append(owner)
+            while self._waiters[0] is not owner or self._value == 0:
+                self._cond.wait()
+            self._waiters.popleft()
+            self._value -= 1
+            self._cond.notify_all()
+
+    def release(self):
+        with self._cond:
+            self._value += 1
+            self._cond.notify_all()
+
+    def position(self, owner):
+        """대기열에서의 순번 (1부터), 대기 중이 아니면 None"""
+        with self._cond:
+            for i, waiter in enumerate(self._waiters):
+                if waiter is owner:
+                    return i + 1
+        return None
+
+    @contextmanager
+    def slot(self, owner):
+        self.acquire(owner)
+        try:
+            yield
+        finally:
+            self.release()
+
+class JobManager:
+    """프로세스 전체에서 공유하는 백그라운드 분석 작업 실행기"""
+
+    def __init__(self, workers=DEFAULT_WORKERS, gpt_slots=DEFAULT_GPT_SLOTS):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="analysis-job")
+        self._gpt = FairSemaphore(gpt_slots)
+        self._jobs = {}
+        self._queued = deque()
+        self._lock = threading.Lock()
+
+    def submit(self, video_id, video_url, options, api_keys):
+        """
+        작업 제출 (같은 키의 작업이 대기/실행 중이거나 최근에 끝났으면 그 작업을 반환)
+        실패한 작업은 다시 실행한다.
+        """
+        key = job_key(video_id, options)
+        with self._lock:
+            self._evict_finished()
+            job = self._jobs.get(key)
+            if job is not None and job.state != FAILED:
+                return job
+
+            job = AnalysisJob(video_id, video_url, options)
+            job.stage = 'queued'
+            self._jobs[key] = job
+            self._queued.append(job)
+        self._executor.submit(self._run, job, api_keys)
+        return job
+
+    def get(self, key):
+        with self._lock:
+            return self._jobs.get(key)
+
+    def queue_position(self, job):
+        """작업 대기열 또는 GPT 대기열에서의 순번 (대기 중이 아니면 None)"""
+        with self._lock:
+            for i, queued in enumerate(self._queued):
+                if queued is job:
+                    return i + 1
+        if job.stage == 'analysis_queue':
+            return self._gpt.position(job)
+        return None
+
+    def _run(self, job, api_keys):
+        with self._lock:
+            try:
+                self._queued.remove(job)
+            except ValueError:
+                pass
+        run_analysis_job(job, api_keys, gpt_gate=self._gpt.slot)
+
+    def _evict_finished(self):
+        """오래된 완료 작업 정리 (lock 안에서 호출)"""
+        now = time.time()
+        stale = [
+            key for key, job in self._jobs.items()
+            if job.finished_at is not None and now - job.finished_at > FINISHED_JOB_TTL
+        ]
+        for key in stale:
+            del self._jobs[key]
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_job_manager():
+    """프로세스 전체에서 공유하는 JobManager (Streamlit 세션 간 공유)"""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager()
+        return _manager
@@ -1,27 +1,74 @@
+import hashlib
+import importlib.util
+import json
 import os
 import re
-from youtube_transcript_api import YouTubeTranscriptApi
-from youtube_transcript_api.formatters import TextFormatter
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse, parse_qs
-import yt_dlp
-from openai import OpenAI
 from datetime import datetime
-from dotenv import load_dotenv
-from notion_client import Client
-from googleapiclient.discovery import build
-from googleapiclient.errors import HttpError
-import streamlit as st
 from zoneinfo import ZoneInfo
+from cache import CACHE_DIR, DiskCache, MemoryCache
+from segments import TranscriptSegments, get_transcript_cache
+from video_metadata import fetch_video_details_batch, fetch_video_metadata
+from clients import get_openai_client, get_notion_client, get_youtube_client
+from notion_writer import get_notion_writer, to_paragraph_blocks, to_rich_text
+from notion_index import get_notion_index
+from search_index import TRANSCRIPT, ANALYSIS, index_document
+from fetch_scheduler import CircuitOpenError, PermanentError, get_transcript_scheduler
+from compactor import COMPACTOR_VERSION, DEFAULT_TOKEN_BUDGET, compact_transcript, estimate_tokens
+from duplicate_index import TranscriptSketch, get_duplicate_index
+import metrics
 
-def analyze_with_gpt(transcript_text, title, channel, video_url, api_key):
-    """
-    GPT API를 사용해서 YouTube 자막 분석 및 인사이트 추출
-    """
-    try:
-        # OpenAI 클라이언트 초기화 (문제 해결 버전)
-        client = OpenAI(api_key=api_key)
-        
-        prompt = f"""
+# 무거운 외부 라이브러리(youtube_transcript_api, yt_dlp, openai, notion_client, googleapiclient)는
+# 실제로 필요한 함수 안에서 import한다. 자막만 받는 CLI 실행이나 check_dependencies()가
+# 쓰지 않는 라이브러리의 import 비용을 치르지 않도록 하기 위함 (benchmarks/startup.py 참고)
+
+# GPT 분석 설정
+GPT_MODEL = "gpt-4o"
+GPT_TEMPERATURE = 0.3
+GPT_MAX_TOKENS = 2000
+SYSTEM_PROMPT = "You are a helpful assistant that analyzes YouTube video transcripts and extracts key insights."
+
+# 프롬프트 템플릿 버전 (템플릿을 바꾸면 반드시 올릴 것 → 이전 버전의 분석 캐시가 무효화됨)
+PROMPT_TEMPLATE_VERSION = "2"
+# 프롬프트를 결정적으로 유지하기 위해 분석 일시는 응답을 받은 뒤 채워 넣는다
+ANALYSIS_TIME_PLACEHOLDER = "{{ANALYSIS_TIME}}"
+
+# 장문 자막 map-reduce 분석 설정
+LONG_TRANSCRIPT_TOKENS = 24000  # 이보다 긴 자막은 자동으로 나눠서 분석
+DEFAULT_CHUNK_TOKENS = 6000
+DEFAULT_MAP_CONCURRENCY = 4
+MAP_MAX_TOKENS = 800
+
+# 자막 다운로드와 겹쳐서 영상 정보를 조회하는 백그라운드 스레드 수 (프로세스 전체 공유)
+INFO_WORKERS = 4
+
+# 분석 전에 자막을 압축할지 (롤링 자막 겹침, [음악] 태그, 군말 제거 → compactor.py)
+# 자막 내용을 일부 지우므로 YOUNOTION_COMPACT=1이거나 토큰 예산(YOUNOTION_TOKEN_BUDGET)을 지정했을 때만 사용
+COMPACT_TRANSCRIPTS = os.getenv('YOUNOTION_COMPACT') == '1' or DEFAULT_TOKEN_BUDGET is not None
+
+def split_transcript(transcript_text, chunk_tokens=DEFAULT_CHUNK_TOKENS):
+    """자막 텍스트를 줄(자막 항목) 경계에서 chunk_tokens 이하 조각으로 나누기"""
+    chunks = []
+    current = []
+    current_tokens = 0
+    for line in transcript_text.splitlines():
+        line_tokens = estimate_tokens(line)
+        if current and current_tokens + line_tokens > chunk_tokens:
+            chunks.append("\n".join(current))
+            current = []
+            current_tokens = 0
+        current.append(line)
+        current_tokens += line_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def build_analysis_prompt(content, title, channel, video_url, content_label="자막 내용"):
+    """분석 리포트 프롬프트 생성 (content_label: 자막 원문 또는 구간별 메모)"""
+    return f"""
 너는 영상자막을 분석하는 AI 연구전문가야. Youtube 영상내용을 분석해서, 연구결과 및 인사이트를 도출해.
 
 **영상 정보:**
@@ -29,8 +76,8 @@ def analyze_with_gpt(transcript_text, title, channel, video_url, api_key):
 - 채널명: {channel}
 - URL: {video_url}
 
-**자막 내용:**
-{transcript_text}
+**{content_label}:**
+{content}
 
 
 **요청사항:**
@@ -41,7 +88,7 @@ def analyze_with_gpt(transcript_text, title, channel, video_url, api_key):
 **📺 영상 제목:** {title}
 **🔗 URL:** {video_url}  
 **👤 채널명:** {channel}
-**📅 분석 일시:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}
+**📅 분석 일시:** {ANALYSIS_TIME_PLACEHOLDER}
 
 ### 🔍 주요 인사이트
 
@@ -57,22 +104,179 @@ def analyze_with_gpt(transcript_text, title, channel, video_url, api_key):
  - 영상 내용을 잘 반영하는 형태로 작성
 
 """
-        
-        # API 호출
+
+def build_chunk_prompt(chunk, index, total, title, channel):
+    """자막 구간(map 단계) 분석 프롬프트 생성"""
+    return f"""
+너는 영상자막을 분석하는 AI 연구전문가야. 아래는 긴 YouTube 영상 자막의 {index}/{total} 구간이야.
+나중에 모든 구간의 메모를 합쳐 최종 리포트를 작성할 거야.
+
+**영상 정보:**
+- 제목: {title}
+- 채널명: {channel}
+
+**자막 구간:**
+{chunk}
+
+
+**요청사항:**
+이 구간에서 다음 내용을 빠짐없이 찾아 불릿 메모로 정리해 (없으면 "없음"):
+
+- 구체적인 숫자, 통계, 퍼센티지 (출처 함께 기재)
+- 연구 결과나 실험 데이터 (연구기관, 연구자 이름 포함)
+- 기존 상식과 다른 새로운 관점이나 발견
+- 놀랍거나 반직관적인 사실들
+"""
+
+def _complete(client, prompt, max_tokens):
+    """chat completion 1회 호출 후 응답 텍스트 반환"""
+    try:
         response = client.chat.completions.create(
-            model="gpt-4o",
+            model=GPT_MODEL,
             messages=[
-                {"role": "system", "content": "You are a helpful assistant that analyzes YouTube video transcripts and extracts key insights."},
+                {"role": "system", "content": SYSTEM_PROMPT},
                 {"role": "user", "content": prompt}
             ],
-            temperature=0.3,
-            max_tokens=2000
+            temperature=GPT_TEMPERATURE,
+            max_tokens=max_tokens
         )
+    except Exception:
+        metrics.count_request('openai', 'error')
+        raise
+    metrics.count_request('openai')
+    metrics.record_openai_usage(GPT_MODEL, getattr(response, 'usage', None))
+    return response.choices[0].message.content
+
+_analysis_cache = None
+_analysis_cache_lock = threading.Lock()
+
+def get_analysis_cache():
+    """GPT 분석 결과 캐시 (최대 50MB, 처음 열 때 다른 템플릿 버전의 항목은 정리)"""
+    global _analysis_cache
+    with _analysis_cache_lock:
+        if _analysis_cache is None:
+            _analysis_cache = DiskCache(os.path.join(CACHE_DIR, 'analysis.sqlite3'), max_bytes=50 * 1024 * 1024)
+            invalidate_analysis_cache(_analysis_cache)
+        return _analysis_cache
+
+_tracks_cache = None
+
+def get_tracks_cache():
+    """영상별 제공 자막 목록 캐시 (TTL 1일, 자막은 나중에 추가될 수 있음)"""
+    global _tracks_cache
+    with _analysis_cache_lock:
+        if _tracks_cache is None:
+            _tracks_cache = DiskCache(
+                os.path.join(CACHE_DIR, 'transcript_tracks.sqlite3'),
+                ttl=24 * 3600,
+                max_bytes=10 * 1024 * 1024
+            )
+        return _tracks_cache
+
+def invalidate_analysis_cache(cache=None, all_versions=False):
+    """현재 템플릿 버전이 아닌 분석 캐시 항목 삭제 (all_versions=True면 전부 삭제)"""
+    cache = cache or get_analysis_cache()
+    if all_versions:
+        cache.clear()
+        return
+    removed = cache.delete_except_prefix(f"v{PROMPT_TEMPLATE_VERSION}:")
+    if removed:
+        print(f"🧹 이전 템플릿 버전의 분석 캐시 {removed}개를 삭제했습니다.")
+
+def analysis_cache_key(transcript_text, title, channel, video_url, chunk_tokens, compaction=None):
+    """(템플릿 버전, 모델, temperature, max_tokens, 자막 해시, 영상 정보, 압축 설정) 기반 캐시 키"""
+    transcript_hash = hashlib.sha256(transcript_text.encode('utf-8')).hexdigest()
+    payload = json.dumps(
+        [GPT_MODEL, GPT_TEMPERATURE, GPT_MAX_TOKENS, transcript_hash, title, channel, video_url, chunk_tokens, compaction],
+        ensure_ascii=False
+    )
+    return f"v{PROMPT_TEMPLATE_VERSION}:{hashlib.sha256(payload.encode('utf-8')).hexdigest()}"
+
+def stamp_analysis_time(analysis_text, when=None):
+    """리포트의 분석 일시 자리에 실제 시각 채워 넣기"""
+    stamp = (when or datetime.now()).strftime('%Y-%m-%d %H:%M:%S')
+    if ANALYSIS_TIME_PLACEHOLDER in analysis_text:
+        return analysis_text.replace(ANALYSIS_TIME_PLACEHOLDER, stamp)
+    # 모델이 자리표시자를 바꿔 쓴 경우 해당 줄의 값을 교체
+    return re.sub(r'(\*\*📅 분석 일시:\*\*).*', lambda m: f"{m.group(1)} {stamp}", analysis_text, count=1)
+
+def _compaction_settings(compact, token_budget):
+    """압축 설정 (캐시 키에 들어가는 값, 압축하지 않으면 None)"""
+    if compact is None:
+        # 토큰 예산을 넘겼으면 압축해야 예산에 맞출 수 있음
+        compact = COMPACT_TRANSCRIPTS or bool(token_budget)
+    if not compact:
+        return None
+    return [COMPACTOR_VERSION, token_budget or DEFAULT_TOKEN_BUDGET]
+
+def _compact_for_analysis(transcript_text, compaction):
+    """분석 전 자막 압축 (compaction이 None이면 그대로 반환)"""
+    if compaction is None:
+        return transcript_text
+    compacted, stats = compact_transcript(transcript_text, compaction[1])
+    metrics.record_compaction(stats)
+    message = f"🗜️ 자막 압축: {stats['original_tokens']:,} → {stats['compacted_tokens']:,} 토큰 ({stats['reduction']:.0%} 감소)"
+    if stats['trimmed_sentences']:
+        message += f", 토큰 예산에 맞춰 {stats['trimmed_sentences']:,}개 문장 생략"
+    print(message)
+    return compacted
+
+def _prepare_analysis_prompt(client, transcript_text, title, channel, video_url, chunk_tokens, map_concurrency, compaction=None):
+    """최종 리포트 프롬프트 준비 (자막 압축 후, 긴 자막이면 map 단계까지 실행)"""
+    transcript_text = _compact_for_analysis(transcript_text, compaction)
+    transcript_tokens = estimate_tokens(transcript_text)
+    if chunk_tokens is None:
+        chunk_tokens = DEFAULT_CHUNK_TOKENS if transcript_tokens > LONG_TRANSCRIPT_TOKENS else None
+    
+    if not (chunk_tokens and transcript_tokens > chunk_tokens):
+        return build_analysis_prompt(transcript_text, title, channel, video_url)
+    
+    # map: 구간별 메모를 동시에 추출
+    chunks = split_transcript(transcript_text, chunk_tokens)
+    print(f"🧩 긴 자막을 {len(chunks)}개 구간으로 나눠 분석합니다. (약 {transcript_tokens:,} 토큰)")
+    prompts = [build_chunk_prompt(chunk, i + 1, len(chunks), title, channel) for i, chunk in enumerate(chunks)]
+    with ThreadPoolExecutor(max_workers=max(1, map_concurrency)) as executor:
+        notes = list(executor.map(lambda p: _complete(client, p, MAP_MAX_TOKENS), prompts))
+    
+    # reduce: 구간별 메모로 기존 형식의 리포트 작성
+    content = "\n\n".join(f"[구간 {i + 1}/{len(notes)}]\n{note or '없음'}" for i, note in enumerate(notes))
+    return build_analysis_prompt(content, title, channel, video_url, content_label="자막 구간별 메모")
+
+def analyze_with_gpt(transcript_text, title, channel, video_url, api_key, chunk_tokens=None, map_concurrency=DEFAULT_MAP_CONCURRENCY, stream=False,
+                     compact=None, token_budget=None):
+    """
+    GPT API를 사용해서 YouTube 자막 분석 및 인사이트 추출
+    chunk_tokens: 자막이 이 토큰 수보다 길면 구간별로 나눠 동시에 분석(map)한 뒤 하나의 리포트로 합친다(reduce).
+                  None이면 LONG_TRANSCRIPT_TOKENS를 넘는 자막만 DEFAULT_CHUNK_TOKENS 단위로 나눈다.
+    map_concurrency: map 단계 동시 호출 수
+    stream: True면 리포트 텍스트 조각(delta)을 생성되는 대로 내보내는 generator를 반환
+            (실패하면 generator가 예외를 던짐, stream=False는 실패 시 None 반환)
+    compact: 분석 전에 자막을 압축할지 (None이면 COMPACT_TRANSCRIPTS, token_budget을 넘기면 압축)
+    token_budget: 압축한 자막의 토큰 예산 (None이면 YOUNOTION_TOKEN_BUDGET, 그것도 없으면 줄이지 않음)
+    """
+    compaction = _compaction_settings(compact, token_budget)
+    if stream:
+        return _stream_analysis(transcript_text, title, channel, video_url, api_key, chunk_tokens, map_concurrency, compaction)
+    
+    try:
+        # 같은 자막/설정으로 분석한 결과가 있으면 재사용
+        cache = get_analysis_cache()
+        cache_key = analysis_cache_key(transcript_text, title, channel, video_url, chunk_tokens, compaction)
+        cached = cache.get(cache_key)
+        if cached:
+            print("⚡ 캐시된 분석 결과 사용")
+            return stamp_analysis_time(cached)
+        
+        # 공유 OpenAI 클라이언트 (연결 풀 재사용)
+        client = get_openai_client(api_key)
+        prompt = _prepare_analysis_prompt(client, transcript_text, title, channel, video_url, chunk_tokens, map_concurrency, compaction)
         
-        result = response.choices[0].message.content
+        # API 호출
+        result = _complete(client, prompt, GPT_MAX_TOKENS)
         if not result:
             raise Exception("GPT API가 빈 응답을 반환했습니다.")
-        return result
+        cache.set(cache_key, result)
+        return stamp_analysis_time(result)
         
     except Exception as e:
         print(f"❌ GPT API 분석 실패: {str(e)}")
@@ -81,8 +285,73 @@ def analyze_with_gpt(transcript_text, title, channel, video_url, api_key):
             print(f"API 응답: {e.response}")
         return None
 
-def save_analysis_report(analysis_text, title, video_id, output_dir="subtitles"):
-    """분석 결과를 별도 파일로 저장"""
+def _stream_analysis(transcript_text, title, channel, video_url, api_key, chunk_tokens, map_concurrency, compaction):
+    """
+    analyze_with_gpt(stream=True)의 본체: 응답 조각을 받는 즉시 yield
+    실패하면(스트림 도중 포함) 에러를 출력한 뒤 예외를 다시 던진다. generator가 예외 없이 끝났을 때만
+    완성된 리포트이므로, 호출한 쪽은 그때만 저장해야 한다 (그때까지 받은 조각은 잘린 리포트).
+    """
+    try:
+        cache = get_analysis_cache()
+        cache_key = analysis_cache_key(transcript_text, title, channel, video_url, chunk_tokens, compaction)
+        cached = cache.get(cache_key)
+        if cached:
+            yield stamp_analysis_time(cached)
+            return
+        
+        client = get_openai_client(api_key)
+        prompt = _prepare_analysis_prompt(client, transcript_text, title, channel, video_url, chunk_tokens, map_concurrency, compaction)
+        
+        try:
+            response = client.chat.completions.create(
+                model=GPT_MODEL,
+                messages=[
+                    {"role": "system", "content": SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=GPT_TEMPERATURE,
+                max_tokens=GPT_MAX_TOKENS,
+                stream=True,
+                # 마지막 조각에 토큰 사용량(usage)을 받음
+                stream_options={"include_usage": True}
+            )
+        except Exception:
+            metrics.count_request('openai', 'error')
+            raise
+        metrics.count_request('openai')
+        # 자리표시자가 조각 사이에 걸쳐 올 수 있으므로 줄 단위로 분석 일시를 채워서 내보냄
+        stamp = datetime.now()
+        parts = []
+        pending = ""
+        for chunk in response:
+            if getattr(chunk, 'usage', None):
+                metrics.record_openai_usage(GPT_MODEL, chunk.usage)
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if not delta:
+                continue
+            parts.append(delta)
+            pending += delta
+            if "\n" in pending:
+                ready, pending = pending.rsplit("\n", 1)
+                yield stamp_analysis_time(ready + "\n", stamp)
+        if pending:
+            yield stamp_analysis_time(pending, stamp)
+        
+        result = "".join(parts)
+        if not result:
+            raise Exception("GPT API가 빈 응답을 반환했습니다.")
+        cache.set(cache_key, result)
+        
+    except Exception as e:
+        print(f"❌ GPT API 분석 실패: {str(e)}")
+        if hasattr(e, 'response'):
+            print(f"API 응답: {e.response}")
+        raise
+
+def save_analysis_report(analysis_text, title, video_id, output_dir="subtitles", channel=None):
+    """분석 결과를 별도 파일로 저장 (로컬 검색 색인도 갱신)"""
     try:
         clean_title = sanitize_filename(title)
         report_filename = f"{clean_title}_{video_id}_analysis.txt"
@@ -91,6 +360,7 @@ def save_analysis_report(analysis_text, title, video_id, output_dir="subtitles")
         with open(report_filepath, 'w', encoding='utf-8') as f:
             f.write(analysis_text)
         
+        index_document(video_id, ANALYSIS, title, channel, analysis_text, report_filepath)
         return report_filepath
         
     except Exception as e:
@@ -98,8 +368,20 @@ def save_analysis_report(analysis_text, title, video_id, output_dir="subtitles")
         return None
 
 def get_video_info(video_url):
-    """YouTube 영상의 제목과 채널명 가져오기"""
+    """YouTube 영상의 제목과 채널명 가져오기 (캐시 → oEmbed/Data API → yt_dlp 순서)"""
+    video_id = extract_video_id(video_url)
+    if video_id:
+        metadata = fetch_video_metadata(video_id)
+        if metadata:
+            return metadata['title'], metadata['channel']
+        # fetch_video_metadata가 이미 yt_dlp 전체 extract_info까지 시도했으므로 다시 호출하지 않음
+        print("⚠️ 영상 정보 가져오기 실패: 모든 조회 경로가 실패했습니다.")
+        return 'Unknown_Title', 'Unknown_Channel'
+    
+    # video_id를 알 수 없는 URL만 yt_dlp 전체 경로로 처리
     try:
+        import yt_dlp
+        
         ydl_opts = {
             'quiet': True,
             'no_warnings': True,
@@ -117,6 +399,24 @@ def get_video_info(video_url):
         print(f"⚠️ 영상 정보 가져오기 실패: {e}")
         return 'Unknown_Title', 'Unknown_Channel'
 
+_info_pool = None
+_info_pool_lock = threading.Lock()
+
+def get_video_info_async(video_url, video_id=None):
+    """
+    get_video_info를 백그라운드 스레드에서 실행 (자막 다운로드와 겹쳐서 실행하기 위함)
+    반환값: (제목, 채널명)을 결과로 갖는 Future
+    """
+    global _info_pool
+    with _info_pool_lock:
+        if _info_pool is None:
+            _info_pool = ThreadPoolExecutor(max_workers=INFO_WORKERS, thread_name_prefix="video-info")
+    
+    def run():
+        with metrics.span('metadata', video_id=video_id):
+            return get_video_info(video_url)
+    return _info_pool.submit(run)
+
 def sanitize_filename(text, max_length=50):
     """파일명으로 사용할 수 있도록 텍스트 정리"""
     # 특수문자 제거 및 공백을 언더스코어로 변경
@@ -154,15 +454,19 @@ def extract_video_id(url):
     
     return None
 
-def save_to_notion(analysis_text, title, channel, video_url, database_id, notion_api_key):
+def save_to_notion(analysis_text, title, channel, video_url, database_id, notion_api_key, writer=None):
     """
     분석 결과를 Notion 데이터베이스에 저장
+    긴 리포트도 잘라내지 않고 2000자 단위 블록으로 나눠 전부 저장한다.
+    같은 영상의 페이지가 이미 있으면(로컬 인덱스 기준) 새로 만들지 않고 내용을 갱신한다.
+    writer: 사용할 NotionWriter (None이면 공유 writer, 속도 제한/재시도 적용)
     """
     try:
         if not analysis_text:
             raise Exception("분석 텍스트가 비어있습니다.")
             
-        notion = Client(auth=notion_api_key)
+        notion = get_notion_client(notion_api_key)
+        writer = writer or get_notion_writer()
         
         # 현재 날짜와 시간 (한국시간)
         korea_now = datetime.now(ZoneInfo("Asia/Seoul"))
@@ -175,38 +479,20 @@ def save_to_notion(analysis_text, title, channel, video_url, database_id, notion
         else:
             insights = analysis_text  # 전체 텍스트를 인사이트로 사용
         
-        # 텍스트 길이 제한 (Notion API 제한 고려)
-        if len(insights) > 2000:
-            insights = insights[:2000] + "..."
-        if len(analysis_text) > 2000:
-            analysis_text = analysis_text[:2000] + "..."
-        
         print(f"📝 Notion 저장 시도 중...")
         print(f"- 데이터베이스 ID: {database_id}")
         print(f"- 제목: {title}")
         print(f"- 채널명: {channel}")
         
-        # Notion 데이터베이스에 새 페이지 생성
+        # Notion 데이터베이스에 새 페이지 생성 (텍스트는 Notion 제한에 맞게 2000자 단위로 분할)
         new_page = {
             "parent": {"database_id": database_id},
             "properties": {
                 "제목": {
-                    "title": [
-                        {
-                            "text": {
-                                "content": title
-                            }
-                        }
-                    ]
+                    "title": to_rich_text(title)
                 },
                 "채널명": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": channel
-                            }
-                        }
-                    ]
+                    "rich_text": to_rich_text(channel)
                 },
                 "URL": {
                     "url": video_url
@@ -217,37 +503,41 @@ def save_to_notion(analysis_text, title, channel, video_url, database_id, notion
                     }
                 },
                 "주요 인사이트": {
-                    "rich_text": [
-                        {
-                            "text": {
-                                "content": insights
-                            }
-                        }
-                    ]
+                    "rich_text": to_rich_text(insights)
                 }
             },
-            "children": [
-                {
-                    "object": "block",
-                    "type": "paragraph",
-                    "paragraph": {
-                        "rich_text": [
-                            {
-                                "type": "text",
-                                "text": {
-                                    "content": analysis_text
-                                }
-                            }
-                        ]
-                    }
-                }
-            ]
+            "children": to_paragraph_blocks(analysis_text)
         }
         
         try:
-            response = notion.pages.create(**new_page)
+            # 같은 영상의 페이지가 이미 있으면 새로 만들지 않고 갱신
+            index = get_notion_index()
+            video_id = extract_video_id(video_url)
+            try:
+                index.sync(notion, database_id, extract_video_id, writer)
+            except Exception as sync_error:
+                print(f"⚠️ Notion 페이지 인덱스 동기화 실패 (로컬 인덱스로 계속 진행): {sync_error}")
+            existing = index.lookup(database_id, video_id) if video_id else None
+            
+            response = None
+            if existing:
+                try:
+                    print(f"♻️ 기존 Notion 페이지 갱신: {existing[1]}")
+                    response = writer.update_page(notion, existing[0], new_page)
+                    if response.get("archived"):
+                        raise Exception("보관된 페이지입니다.")
+                except Exception as update_error:
+                    # 삭제/보관된 페이지면 인덱스에서 지우고 새로 생성
+                    print(f"⚠️ 기존 페이지 갱신 실패, 새 페이지를 만듭니다: {update_error}")
+                    index.forget(database_id, video_id)
+                    response = None
+            if response is None:
+                response = writer.create_page(notion, new_page)
+            
             if not response or "url" not in response:
                 raise Exception("Notion API가 유효한 응답을 반환하지 않았습니다.")
+            if video_id:
+                index.record(database_id, video_id, response["id"], response["url"], response.get("last_edited_time"))
             return response["url"]
         except Exception as api_error:
             print(f"❌ Notion API 호출 실패: {str(api_error)}")
@@ -262,135 +552,314 @@ def save_to_notion(analysis_text, title, channel, video_url, database_id, notion
             print(f"API 응답: {e.response}")
         return None
 
-def download_youtube_transcript(video_url, output_dir="subtitles", language='ko', openai_api_key=None, notion_api_key=None, notion_database_id=None):
+def save_to_notion_async(analysis_text, title, channel, video_url, database_id, notion_api_key, writer=None):
     """
-    YouTube 자막을 텍스트 파일로 다운로드 및 분석
+    save_to_notion을 Notion 쓰기 큐에 넣고 바로 반환 (호출한 스레드는 Notion 응답을 기다리지 않음)
+    반환값: Notion 페이지 URL(실패 시 None)을 결과로 갖는 Future
+    """
+    writer = writer or get_notion_writer()
+    return writer.submit(save_to_notion, analysis_text, title, channel, video_url, database_id, notion_api_key, writer)
+
+# 자막 선택 기본 우선순위: (언어 코드, 자동 생성 여부)
+DEFAULT_TRANSCRIPT_PRIORITY = [('ko', False), ('ko', True), ('en', False), ('en', True)]
+
+def build_transcript_priority(language='ko', fallback_languages=('ko', 'en'), prefer_generated=False):
     """
+    언어 순서로 자막 선택 우선순위 생성
+    예) language='ja' → [('ja', 수동), ('ja', 자동), ('ko', 수동), ('ko', 자동), ('en', 수동), ('en', 자동)]
+    """
+    kinds = (True, False) if prefer_generated else (False, True)
+    languages = dict.fromkeys([language, *fallback_languages])
+    return [(code, is_generated) for code in languages for is_generated in kinds]
+
+def _translated_language(language):
+    """번역 자막을 캐시에 저장할 때 사용하는 언어 표기"""
+    return f"{language}.translated"
+
+def _list_and_fetch_transcript(video_id, priority, translate_to, proxies, log):
+    """
+    자막 목록 조회 → 우선순위에 맞는 자막 선택 → 다운로드 (스케줄러의 재시도 한 번 단위)
+    반환값: (자막 원본 항목, 선택한 자막, 사용된 언어, 캐시 언어 표기, 제공 자막 목록 [(언어 코드, 자동 생성 여부), ...])
+    """
+    from youtube_transcript_api import YouTubeTranscriptApi
     try:
-        video_id = extract_video_id(video_url)
-        if not video_id:
-            raise ValueError("유효하지 않은 YouTube URL입니다.")
-        
-        print(f"📹 비디오 ID: {video_id}")
-        
-        # 영상 정보 가져오기 (제목, 채널명)
-        print("📋 영상 정보 가져오는 중...")
-        title, uploader = get_video_info(video_url)
-        print(f"📺 제목: {title}")
-        print(f"👤 채널: {uploader}")
-        
-        # 사용 가능한 언어 목록 확인
-        try:
-            available_transcripts = YouTubeTranscriptApi.list_transcripts(video_id)
-            print("📋 사용 가능한 자막 언어:")
-            for transcript in available_transcripts:
-                print(f"  - {transcript.language}: {transcript.language_code}")
-        except Exception as e:
-            print(f"⚠️ 자막 목록 조회 실패: {e}")
-        
-        # 자막 다운로드 시도 (언어 우선순위: 지정언어 → 한국어 → 영어)
-        transcript = None
-        used_language = language
-        
-        try:
-            # 먼저 일반 자막 시도
-            transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=[language])
-            print(f"✅ {language} 자막 다운로드 성공")
-        except:
-            try:
-                # 자동 생성 자막 시도
-                transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=[language], preserve_formatting=True)
-                print(f"✅ {language} 자동 생성 자막 다운로드 성공")
-            except:
-                try:
-                    # 한국어 자막 시도
-                    transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['ko'])
-                    used_language = 'ko'
-                    print("✅ 한국어 자막 다운로드 성공")
-                except:
-                    try:
-                        # 한국어 자동 생성 자막 시도
-                        transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['ko'], preserve_formatting=True)
-                        used_language = 'ko'
-                        print("✅ 한국어 자동 생성 자막 다운로드 성공")
-                    except:
-                        try:
-                            # 영어 자막 시도
-                            transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'])
-                            used_language = 'en'
-                            print("✅ 영어 자막 다운로드 성공")
-                        except:
-                            try:
-                                # 영어 자동 생성 자막 시도
-                                transcript = YouTubeTranscriptApi.get_transcript(video_id, languages=['en'], preserve_formatting=True)
-                                used_language = 'en'
-                                print("✅ 영어 자동 생성 자막 다운로드 성공")
-                            except Exception as e:
-                                raise Exception(f"사용 가능한 자막을 찾을 수 없습니다: {e}")
-        
-        if not transcript:
-            raise Exception("자막 데이터를 가져올 수 없습니다.")
-        
-        # 텍스트 포맷터로 변환
-        formatter = TextFormatter()
-        text_formatted = formatter.format_transcript(transcript)
-        
-        # 출력 디렉토리 생성
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # 파일명 생성 - {제목}_{채널명}_{video_id}_trans.txt
-        clean_title = sanitize_filename(title)
-        clean_uploader = sanitize_filename(uploader)
+        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id, proxies=proxies)
+    except Exception:
+        metrics.count_request('youtube_transcript', 'error')
+        raise
+    metrics.count_request('youtube_transcript')
+    
+    tracks = {}
+    for track in transcript_list:
+        tracks.setdefault((track.language_code, track.is_generated), track)
+    
+    # 우선순위에 맞는 자막 선택
+    selected = None
+    cache_language = None
+    for code, is_generated in priority:
+        if (code, is_generated) in tracks:
+            selected = tracks[(code, is_generated)]
+            used_language = cache_language = code
+            break
+    
+    # 우선순위에 맞는 자막이 없으면 번역 자막 사용 (수동 자막 우선)
+    if selected is None and translate_to:
+        translatable = sorted(
+            (track for track in tracks.values() if track.is_translatable),
+            key=lambda track: track.is_generated
+        )
+        for track in translatable:
+            if any(lang['language_code'] == translate_to for lang in track.translation_languages):
+                log(f"🌐 {track.language_code} 자막을 {translate_to}(으)로 번역합니다.")
+                selected = track.translate(translate_to)
+                used_language = translate_to
+                cache_language = _translated_language(translate_to)
+                break
+    
+    if selected is None:
+        available = ", ".join(f"{code}{'(자동)' if gen else ''}" for code, gen in tracks) or "없음"
+        raise PermanentError(f"사용 가능한 자막을 찾을 수 없습니다. (제공 자막: {available})")
+    
+    # 선택한 자막 하나만 다운로드 (목록 조회와 같은 프록시 세션 사용)
+    try:
+        transcript = selected.fetch()
+    except Exception:
+        metrics.count_request('youtube_transcript', 'error')
+        raise
+    metrics.count_request('youtube_transcript')
+    return transcript, selected, used_language, cache_language, list(tracks)
+
+def resolve_transcript(video_id, priority=None, translate_to=None, log=print):
+    """
+    자막 목록을 한 번만 조회한 뒤 우선순위에 맞는 자막 하나만 다운로드
+    priority: [(언어 코드, 자동 생성 여부), ...] 앞쪽일수록 우선
+    translate_to: 우선순위에 맞는 자막이 없을 때 번역할 언어 (None이면 번역하지 않음)
+    log: 진행 메시지 출력 함수
+    반환값: (자막 항목(TranscriptSegments), 사용된 언어, 자동 생성 여부)
+    """
+    priority = priority or DEFAULT_TRANSCRIPT_PRIORITY
+    
+    # 1) 캐시 확인 (네트워크 요청 없음)
+    # 저장된 자막이 있어도 더 우선하는 자막이 제공될 수 있으므로, 캐시된 제공 자막 목록으로 고른 자막만 사용
+    # (목록이 없으면 가장 우선하는 자막만 그대로 사용)
+    cache = get_transcript_cache()
+    tracks = get_tracks_cache().get(video_id)
+    available = {(code, bool(is_generated)) for code, is_generated in tracks} if tracks is not None else None
+    best = priority[:1] if available is None else [entry for entry in priority if tuple(entry) in available][:1]
+    for code, is_generated in best:
+        cached = cache.get_transcript(video_id, code, is_generated)
+        if cached:
+            log(f"⚡ 캐시된 {code} {'자동 생성 ' if is_generated else ''}자막 사용")
+            return cached, code, is_generated
+    if translate_to and available is not None and not best:
+        for is_generated in (False, True):
+            cached = cache.get_transcript(video_id, _translated_language(translate_to), is_generated)
+            if cached:
+                log(f"⚡ 캐시된 {translate_to} 번역 자막 사용")
+                return cached, translate_to, is_generated
+    
+    # 2) 자막 목록 조회 + 선택한 자막 하나만 다운로드 (요청 2회)
+    # 429/차단 등 일시적인 오류는 스케줄러가 백오프 후 다른 프록시로 목록 조회부터 다시 시도
+    try:
+        transcript, selected, used_language, cache_language, tracks = get_transcript_scheduler().call(
+            lambda proxies: _list_and_fetch_transcript(video_id, priority, translate_to, proxies, log)
+        )
+    except (PermanentError, CircuitOpenError):
+        raise
+    except Exception as e:
+        raise Exception(f"자막을 가져올 수 없습니다: {e}")
+    if not transcript:
+        raise Exception("자막 데이터를 가져올 수 없습니다.")
+    
+    log(f"✅ {used_language} {'자동 생성 ' if selected.is_generated else ''}자막 다운로드 성공")
+    
+    # 항목마다 dict를 들고 있지 않도록 열 단위 형식으로 바꿔서 저장/반환
+    get_tracks_cache().set(video_id, tracks)
+    transcript = cache.set_transcript(video_id, cache_language, selected.is_generated, transcript)
+    return transcript, used_language, selected.is_generated
+
+def fetch_transcript(video_id, language='ko'):
+    """
+    자막 다운로드 (언어 우선순위: 지정언어 → 한국어 → 영어, 없으면 지정언어로 번역)
+    반환값: (자막 항목(TranscriptSegments), 사용된 언어)
+    """
+    transcript, used_language, _ = resolve_transcript(
+        video_id,
+        priority=build_transcript_priority(language),
+        translate_to=language
+    )
+    return transcript, used_language
+
+def write_transcript_file(transcript, title, uploader, video_id, output_dir="subtitles"):
+    """
+    자막을 텍스트 파일로 저장 (로컬 검색 색인도 갱신)
+    반환값: (파일 경로, 포맷된 텍스트)
+    """
+    # 일반 텍스트로 변환 (TextFormatter와 같은 형식: 항목마다 한 줄)
+    text_formatted = TranscriptSegments.from_transcript(transcript).plain_text()
+    
+    # 출력 디렉토리 생성
+    os.makedirs(output_dir, exist_ok=True)
+    
+    # 파일명 생성 - {제목}_{채널명}_{video_id}_trans.txt
+    clean_title = sanitize_filename(title)
+    clean_uploader = sanitize_filename(uploader)
+    filename = f"{clean_title}_{clean_uploader}_{video_id}_trans.txt"
+    filepath = os.path.join(output_dir, filename)
+    
+    # 파일명이 너무 길면 조정
+    if len(filename) > 200:  # Windows 파일명 길이 제한 고려
+        clean_title = sanitize_filename(title, 30)
+        clean_uploader = sanitize_filename(uploader, 20)
         filename = f"{clean_title}_{clean_uploader}_{video_id}_trans.txt"
         filepath = os.path.join(output_dir, filename)
-        
-        # 파일명이 너무 길면 조정
-        if len(filename) > 200:  # Windows 파일명 길이 제한 고려
-            clean_title = sanitize_filename(title, 30)
-            clean_uploader = sanitize_filename(uploader, 20)
-            filename = f"{clean_title}_{clean_uploader}_{video_id}_trans.txt"
-            filepath = os.path.join(output_dir, filename)
-        
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(text_formatted)
-        
-        print(f"🎉 자막 다운로드 완료!")
-        print(f"📄 파일: {filename}")
-        print(f"📊 텍스트 길이: {len(text_formatted):,} 글자")
-        print(f"📝 자막 항목 수: {len(transcript):,} 개")
-        
-        # GPT API 분석 (API 키가 제공된 경우)
-        analysis_filepath = None
-        notion_url = None
-        if openai_api_key:
-            print(f"\n🤖 GPT API로 내용 분석 중...")
-            analysis_result = analyze_with_gpt(text_formatted, title, uploader, video_url, openai_api_key)
-            
-            if analysis_result:
-                # 로컬 파일로 저장
-                analysis_filepath = save_analysis_report(analysis_result, title, video_id, output_dir)
-                if analysis_filepath:
-                    print(f"📊 분석 리포트 저장: {os.path.basename(analysis_filepath)}")
-                
-                # Notion에 저장 (API 키가 제공된 경우)
-                if notion_api_key and notion_database_id:
-                    print(f"\n📝 Notion에 저장 중...")
-                    notion_url = save_to_notion(analysis_result, title, uploader, video_url, notion_database_id, notion_api_key)
-                    if notion_url:
-                        print(f"✅ Notion 저장 완료: {notion_url}")
-        
-        return filepath, analysis_filepath, notion_url
-        
+    
+    with open(filepath, 'w', encoding='utf-8') as f:
+        f.write(text_formatted)
+    
+    index_document(video_id, TRANSCRIPT, title, uploader, text_formatted, filepath)
+    return filepath, text_formatted
+
+# 이미 분석한 영상과 자막이 거의 같을 때의 처리 방법
+# 'reuse': 기존 리포트를 이 영상의 리포트로 저장(+Notion), 'link': 기존 리포트/페이지만 알려 줌, 'analyze': 다시 분석
+DUPLICATE_ACTIONS = ('reuse', 'link', 'analyze')
+
+def find_analyzed_duplicate(video_id, transcript_text, title, channel, video_url):
+    """
+    자막 서명을 거의 같은 자막 색인에 등록하고, 이미 분석한 영상 중 자막이 거의 같은 영상 찾기
+    반환값: duplicate_index.DuplicateIndex.find()의 항목 하나 (분석 리포트나 Notion 페이지가 있는 것) 또는 None
+    """
+    sketch = TranscriptSketch.from_text(transcript_text)
+    if sketch is None:
+        return None
+    index = get_duplicate_index()
+    matches = index.find(sketch, exclude=video_id)
+    index.add(video_id, sketch, title, channel, video_url)
+    for match in matches:
+        if (match['analysis_path'] and os.path.exists(match['analysis_path'])) or match['notion_url']:
+            return match
+    return None
+
+def describe_duplicate(match):
+    """거의 같은 영상 안내 문구"""
+    relation = "자막이 거의 같은 영상" if match['kind'] == 'duplicate' else "이 자막을 포함하는 영상"
+    return f"{relation} '{match['title']}' ({match['video_url']}, 유사도 {match['similarity']:.0%})"
+
+def reused_analysis(match):
+    """기존 영상의 분석 리포트 앞에 재사용 안내를 붙여 반환 (리포트 파일이 없으면 None)"""
+    path = match['analysis_path']
+    if not (path and os.path.exists(path)):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        analysis_text = f.read()
+    return f"> 🔁 {describe_duplicate(match)}의 분석 리포트를 재사용했습니다.\n\n{analysis_text}"
+
+def ask_duplicate_action(match):
+    """CLI에서 거의 같은 영상을 찾았을 때 처리 방법 묻기"""
+    print(f"🔁 {describe_duplicate(match)}을 이미 분석했습니다.")
+    if match['notion_url']:
+        print(f"📝 기존 Notion 페이지: {match['notion_url']}")
+    answer = input("기존 분석을 [r]재사용 / [l]링크만 / [a]다시 분석 (기본값: r): ").strip().lower()
+    return {'l': 'link', 'a': 'analyze'}.get(answer[:1], 'reuse')
+
+def download_youtube_transcript(video_url, output_dir="subtitles", language='ko', openai_api_key=None, notion_api_key=None, notion_database_id=None,
+                                on_duplicate='reuse'):
+    """
+    YouTube 자막을 텍스트 파일로 다운로드 및 분석
+    on_duplicate: 이미 분석한 영상과 자막이 거의 같을 때의 처리 (DUPLICATE_ACTIONS 중 하나, 또는 찾은 영상을 받아 그중 하나를 반환하는 함수)
+    단계별 소요 시간은 metrics 모듈에 기록된다.
+    """
+    try:
+        with metrics.span('download', video_url=video_url):
+            return _download_youtube_transcript(video_url, output_dir, language, openai_api_key, notion_api_key, notion_database_id, on_duplicate)
     except Exception as e:
         print(f"❌ 자막 다운로드 실패: {str(e)}")
         return None, None, None
 
+def _download_youtube_transcript(video_url, output_dir, language, openai_api_key, notion_api_key, notion_database_id, on_duplicate='reuse'):
+    """download_youtube_transcript의 본체 (실패하면 예외를 던짐)"""
+    video_id = extract_video_id(video_url)
+    if not video_id:
+        raise ValueError("유효하지 않은 YouTube URL입니다.")
+    
+    print(f"📹 비디오 ID: {video_id}")
+    
+    # 영상 정보(제목, 채널명)는 백그라운드에서 가져오고, 그동안 자막 다운로드 (서로 독립적인 요청)
+    print("📋 영상 정보와 자막 가져오는 중...")
+    info_future = get_video_info_async(video_url, video_id)
+    with metrics.span('transcript', video_id=video_id):
+        transcript, used_language = fetch_transcript(video_id, language)
+    title, uploader = info_future.result()
+    print(f"📺 제목: {title}")
+    print(f"👤 채널: {uploader}")
+    
+    # 자막 파일 저장
+    with metrics.span('transcript_file', video_id=video_id):
+        filepath, text_formatted = write_transcript_file(transcript, title, uploader, video_id, output_dir)
+    filename = os.path.basename(filepath)
+    
+    print(f"🎉 자막 다운로드 완료!")
+    print(f"📄 파일: {filename}")
+    print(f"📊 텍스트 길이: {len(text_formatted):,} 글자")
+    print(f"📝 자막 항목 수: {len(transcript):,} 개")
+    
+    # 거의 같은 자막의 영상을 이미 분석했는지 확인 (재업로드, 쇼츠, 미러 채널)
+    with metrics.span('duplicate_check', video_id=video_id):
+        duplicate = find_analyzed_duplicate(video_id, text_formatted, title, uploader, video_url)
+    
+    # GPT API 분석 (API 키가 제공된 경우)
+    analysis_filepath = None
+    notion_url = None
+    if openai_api_key:
+        analysis_result = None
+        action = 'analyze'
+        if duplicate:
+            action = on_duplicate(duplicate) if callable(on_duplicate) else on_duplicate
+        if action == 'link':
+            print(f"🔗 {describe_duplicate(duplicate)}의 분석을 사용합니다. (분석 생략)")
+            return filepath, duplicate['analysis_path'], duplicate['notion_url']
+        if action == 'reuse':
+            analysis_result = reused_analysis(duplicate)
+            if analysis_result:
+                print(f"🔁 {describe_duplicate(duplicate)}의 분석 리포트를 재사용합니다.")
+        if not analysis_result:
+            print(f"\n🤖 GPT API로 내용 분석 중...")
+            with metrics.span('analysis', video_id=video_id):
+                analysis_result = analyze_with_gpt(text_formatted, title, uploader, video_url, openai_api_key)
+        
+        if analysis_result:
+            # Notion 저장(API 키가 제공된 경우)을 쓰기 큐에 먼저 넣고, 기다리는 동안 로컬 파일 저장
+            notion_future = None
+            if notion_api_key and notion_database_id:
+                print(f"\n📝 Notion에 저장 중...")
+                notion_started = time.perf_counter()
+                notion_future = save_to_notion_async(analysis_result, title, uploader, video_url, notion_database_id, notion_api_key)
+            
+            with metrics.span('report', video_id=video_id):
+                analysis_filepath = save_analysis_report(analysis_result, title, video_id, output_dir, uploader)
+            if analysis_filepath:
+                print(f"📊 분석 리포트 저장: {os.path.basename(analysis_filepath)}")
+            
+            if notion_future:
+                notion_url = notion_future.result()
+                metrics.record_stage('notion', time.perf_counter() - notion_started, 'ok' if notion_url else 'error', video_id=video_id)
+                if notion_url:
+                    print(f"✅ Notion 저장 완료: {notion_url}")
+            
+            # 다음에 거의 같은 영상이 들어오면 이 분석을 재사용할 수 있도록 기록
+            get_duplicate_index().set_analysis(
+                video_id, os.path.abspath(analysis_filepath) if analysis_filepath else None, notion_url
+            )
+    
+    return filepath, analysis_filepath, notion_url
+
 def main():
     """메인 함수"""
     print("🎬 YouTube 자막 다운로더 + AI 분석 + Notion 저장")
     print("=" * 50)
     
     # Load environment variables
+    from dotenv import load_dotenv
     load_dotenv()
     
     # YouTube URL 입력받기
@@ -423,7 +892,8 @@ def main():
         "ko", 
         openai_api_key,
         notion_api_key,
-        notion_database_id
+        notion_database_id,
+        on_duplicate=ask_duplicate_action
     )
     
     if transcript_file:
@@ -433,52 +903,148 @@ def main():
             print(f"📊 분석 파일: {os.path.basename(analysis_file)}")
         if notion_url:
             print(f"📝 Notion 페이지: {notion_url}")
+    
+    # YOUNOTION_METRICS_FILE이 설정되어 있으면 단계별 지표를 Prometheus 텍스트로 저장
+    metrics_path = metrics.write_prometheus()
+    if metrics_path:
+        print(f"📈 지표 저장: {metrics_path}")
 
 def check_dependencies():
-    """필요한 라이브러리 확인"""
-    try:
-        import youtube_transcript_api
-        import yt_dlp
-        print("✅ 기본 라이브러리가 설치되어 있습니다.")
-        
-        # OpenAI API 라이브러리 확인
-        try:
-            from openai import OpenAI
-            print("✅ OpenAI API 라이브러리도 설치되어 있습니다.")
-        except ImportError:
-            print("⚠️ OpenAI API 라이브러리가 없습니다. 분석 기능을 사용하려면:")
-            print("   pip install openai")
-            print("   (자막 다운로드는 가능합니다)")
-            
-        return True
-    except ImportError as e:
+    """필요한 라이브러리 확인 (import하지 않고 설치 여부만 확인)"""
+    missing = [name for name in ('youtube_transcript_api', 'yt_dlp', 'dotenv') if importlib.util.find_spec(name) is None]
+    if missing:
         print("❌ 필요한 라이브러리를 설치해주세요:")
         print("pip install youtube-transcript-api yt-dlp openai python-dotenv notion-client")
-        print(f"누락된 모듈: {e}")
+        print(f"누락된 모듈: {', '.join(missing)}")
         return False
+    print("✅ 기본 라이브러리가 설치되어 있습니다.")
+    
+    # OpenAI API 라이브러리 확인
+    if importlib.util.find_spec('openai') is not None:
+        print("✅ OpenAI API 라이브러리도 설치되어 있습니다.")
+    else:
+        print("⚠️ OpenAI API 라이브러리가 없습니다. 분석 기능을 사용하려면:")
+        print("   pip install openai")
+        print("   (자막 다운로드는 가능합니다)")
+        
+    return True
+
+# search.list 호출 1회당 소모되는 YouTube Data API 쿼터
+SEARCH_QUOTA_UNITS = 100
+# videos.list 호출 1회당 소모되는 쿼터 (검색 결과 길이/자막 여부 보강, 페이지당 1회)
+DETAILS_QUOTA_UNITS = 1
+
+# 검색 결과 정렬 기준 (filter_search_results의 sort_by)
+SEARCH_SORT_KEYS = ('relevance', 'duration_asc', 'duration_desc', 'captions_first')
+
+# 검색어별 페이지 캐시 (Streamlit 세션 간 공유, 30분 TTL)
+_search_pages = MemoryCache(max_entries=256, ttl=30 * 60)
+_search_pages_lock = threading.Lock()
+_search_quota = {'api_calls': 0, 'quota_units': 0}
+
+def get_search_quota_stats():
+    """검색 API 호출 수, 소모 쿼터, 페이지 캐시 통계"""
+    with _search_pages_lock:
+        stats = dict(_search_quota)
+    stats['cache'] = _search_pages.stats()
+    return stats
+
+def format_duration(seconds):
+    """영상 길이 표시 (예: 3:05, 1:02:03, 0이면 라이브, None이면 빈 문자열)"""
+    if seconds is None:
+        return ""
+    if seconds == 0:
+        return "LIVE"
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+def _enrich_search_page(videos):
+    """
+    검색 결과 한 페이지에 영상 길이/자막 여부 추가 (videos.list 한 번, 캐시에 있는 영상은 제외)
+    조회하지 못한 영상은 duration_seconds/has_captions가 None
+    """
+    details, api_calls = fetch_video_details_batch([video['video_id'] for video in videos])
+    if api_calls:
+        with _search_pages_lock:
+            _search_quota['api_calls'] += api_calls
+            _search_quota['quota_units'] += api_calls * DETAILS_QUOTA_UNITS
+    for video in videos:
+        info = details.get(video['video_id'], {})
+        video['duration_seconds'] = info.get('duration_seconds')
+        video['duration'] = format_duration(video['duration_seconds'])
+        video['has_captions'] = info.get('has_captions')
+
+def filter_search_results(videos, captions_only=False, max_duration=None, sort_by='relevance'):
+    """
+    검색 결과 거르기/정렬
+    captions_only: 업로더가 올린 자막이 있는 영상만 (자막 여부를 모르는 영상은 남김)
+    max_duration: 이 길이(초)를 넘는 영상과 라이브 제외 (길이를 모르는 영상은 남김)
+    sort_by: SEARCH_SORT_KEYS 중 하나 (길이를 모르는 영상은 맨 뒤)
+    """
+    if captions_only:
+        videos = [video for video in videos if video.get('has_captions') is not False]
+    if max_duration:
+        videos = [
+            video for video in videos
+            if video.get('duration_seconds') is None or 0 < video['duration_seconds'] <= max_duration
+        ]
+    if sort_by in ('duration_asc', 'duration_desc'):
+        known = [video for video in videos if video.get('duration_seconds') is not None]
+        unknown = [video for video in videos if video.get('duration_seconds') is None]
+        known.sort(key=lambda video: video['duration_seconds'], reverse=sort_by == 'duration_desc')
+        videos = known + unknown
+    elif sort_by == 'captions_first':
+        videos = sorted(videos, key=lambda video: {True: 0, None: 1, False: 2}[video.get('has_captions')])
+    return list(videos)
+
+def _get_search_entry(query, max_results):
+    """검색어별 페이지 목록 (없으면 새로 생성)"""
+    key = (query, max_results)
+    with _search_pages_lock:
+        entry = _search_pages.get(key)
+        if entry is None:
+            # pages[i]: i번째 페이지 결과, next_tokens[i]: i+1번째 페이지를 가져올 pageToken
+            entry = {'pages': [], 'next_tokens': [], 'lock': threading.Lock()}
+            _search_pages.set(key, entry)
+        return entry
 
 def search_youtube_videos(query, max_results=3, offset=0):
     """
     YouTube Data API를 사용하여 비디오 검색 (페이지네이션 지원)
     offset: 0, 10, 20 ...
+    이미 본 페이지는 캐시에서 반환하고, 다음 페이지는 저장해 둔 pageToken으로 한 번만 요청한다.
+    새 페이지는 videos.list(part=contentDetails) 한 번으로 길이(duration_seconds, duration)와
+    자막 여부(has_captions)를 붙여서 저장한다.
     """
+    from googleapiclient.errors import HttpError
     try:
-        youtube = build('youtube', 'v3', developerKey=os.getenv('YOUTUBE_API_KEY'))
-        page_token = None
-        results_to_skip = offset
-        videos = []
-        while results_to_skip >= 0:
-            search_response = youtube.search().list(
-                q=query,
-                part='snippet',
-                maxResults=max_results,
-                type='video',
-                pageToken=page_token
-            ).execute()
-            items = search_response.get('items', [])
-            if results_to_skip < max_results:
-                items = items[results_to_skip:]
-                for item in items:
+        page_index, results_to_skip = divmod(offset, max_results)
+        entry = _get_search_entry(query, max_results)
+        
+        with entry['lock']:
+            youtube = None
+            while len(entry['pages']) <= page_index:
+                page_token = entry['next_tokens'][-1] if entry['pages'] else None
+                if entry['pages'] and not page_token:
+                    break  # 마지막 페이지
+                
+                if youtube is None:
+                    youtube = get_youtube_client(os.getenv('YOUTUBE_API_KEY'))
+                search_response = youtube.search().list(
+                    q=query,
+                    part='snippet',
+                    maxResults=max_results,
+                    type='video',
+                    pageToken=page_token
+                ).execute()
+                metrics.count_request('youtube_data_api')
+                with _search_pages_lock:
+                    _search_quota['api_calls'] += 1
+                    _search_quota['quota_units'] += SEARCH_QUOTA_UNITS
+                
+                videos = []
+                for item in search_response.get('items', []):
                     video_data = {
                         'title': item['snippet']['title'],
                         'channel': item['snippet']['channelTitle'],
@@ -487,14 +1053,16 @@ def search_youtube_videos(query, max_results=3, offset=0):
                         'url': f"https://www.youtube.com/watch?v={item['id']['videoId']}"
                     }
                     videos.append(video_data)
-                break
-            else:
-                results_to_skip -= max_results
-                page_token = search_response.get('nextPageToken')
-                if not page_token:
-                    break
-        return videos[:max_results]
+                if videos:
+                    _enrich_search_page(videos)
+                entry['pages'].append(videos)
+                entry['next_tokens'].append(search_response.get('nextPageToken'))
+            
+            if page_index >= len(entry['pages']):
+                return []
+            return entry['pages'][page_index][results_to_skip:][:max_results]
     except HttpError as e:
+        metrics.count_request('youtube_data_api', 'error')
         print(f"❌ YouTube API 오류: {str(e)}")
         return []
     except Exception as e:
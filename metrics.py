@@ -0,0 +1,229 @@
+"""
+단계별 소요 시간, OpenAI 토큰/비용, 서비스별 재시도/실패 지표
+
+- span(stage): 단계 하나의 소요 시간과 성공/실패를 기록하는 context manager (비동기 단계는 record_stage)
+- record_openai_usage(): 응답의 usage 토큰 수와 예상 비용(USD) 누적
+- count_request() / count_retry(): 외부 서비스별 요청 결과와 재시도 횟수
+- record_compaction(): GPT 분석 전 자막 압축으로 줄어든 토큰 수
+- 모든 지표는 Prometheus 텍스트 형식으로 내보낼 수 있다 (파일 또는 HTTP 엔드포인트)
+- YOUNOTION_METRICS_LOG가 설정되어 있으면 각 이벤트를 JSON 한 줄로 기록한다 ('-'이면 표준에러)
+
+진행 상황을 사람에게 보여주는 print 메시지는 그대로 두고, 지표는 이 모듈로만 모은다.
+"""
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# 히스토그램 구간 (초)
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+# 모델별 100만 토큰당 가격 (USD, 입력/출력)
+MODEL_PRICING = {
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4o-mini': (0.15, 0.60),
+}
+
+METRICS_LOG_PATH = os.getenv('YOUNOTION_METRICS_LOG')
+METRICS_FILE_PATH = os.getenv('YOUNOTION_METRICS_FILE')
+
+_lock = threading.Lock()
+_counters = {}    # (이름, 라벨) → 값
+_histograms = {}  # (이름, 라벨) → {'buckets': [...], 'sum': 초, 'count': 횟수}
+_log_lock = threading.Lock()
+
+_HELP = {
+    'younotion_stage_duration_seconds': ('histogram', "단계별 소요 시간"),
+    'younotion_stage_total': ('counter', "단계 실행 횟수 (결과별)"),
+    'younotion_service_requests_total': ('counter', "외부 서비스 요청 수 (결과별)"),
+    'younotion_service_retries_total': ('counter', "외부 서비스 재시도 횟수"),
+    'younotion_openai_tokens_total': ('counter', "OpenAI 사용 토큰 수"),
+    'younotion_openai_cost_usd_total': ('counter', "OpenAI 예상 비용 (USD)"),
+    'younotion_transcript_tokens_total': ('counter', "GPT 분석 전 자막 토큰 수 추정치 (압축 전/후)"),
+    'younotion_prefetch_total': ('counter', "검색 결과 자막 미리 받기 결과 (hit/late_hit/miss/wasted/cancelled/error)"),
+}
+
+def _labels(labels):
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+def _inc(name, value=1, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        _counters[key] = _counters.get(key, 0) + value
+
+def _observe(name, seconds, **labels):
+    key = (name, _labels(labels))
+    with _lock:
+        histogram = _histograms.get(key)
+        if histogram is None:
+            histogram = _histograms[key] = {'buckets': [0] * len(DURATION_BUCKETS), 'sum': 0.0, 'count': 0}
+        for i, bound in enumerate(DURATION_BUCKETS):
+            if seconds <= bound:
+                histogram['buckets'][i] += 1
+        histogram['sum'] += seconds
+        histogram['count'] += 1
+
+def log_event(event, **fields):
+    """구조화된 JSON 로그 한 줄 기록 (YOUNOTION_METRICS_LOG가 없으면 아무것도 하지 않음)"""
+    if not METRICS_LOG_PATH:
+        return
+    line = json.dumps({'ts': round(time.time(), 3), 'event': event, **fields}, ensure_ascii=False, default=str)
+    with _log_lock:
+        if METRICS_LOG_PATH == '-':
+            sys.stderr.write(line + "\n")
+        else:
+            with open(METRICS_LOG_PATH, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+
+def record_stage(stage, seconds, status='ok', **fields):
+    """단계 하나의 소요 시간과 결과 기록 (span으로 감쌀 수 없는 비동기 단계용)"""
+    _observe('younotion_stage_duration_seconds', seconds, stage=stage)
+    _inc('younotion_stage_total', stage=stage, status=status)
+    log_event('stage', stage=stage, status=status, duration_ms=round(seconds * 1000, 3), **fields)
+
+@contextmanager
+def span(stage, **fields):
+    """
+    단계 하나의 소요 시간 기록
+    예외가 나면 실패로 기록하고 예외는 그대로 다시 던진다.
+    fields: JSON 로그에만 남길 추가 정보 (video_id 등)
+    """
+    started = time.perf_counter()
+    status = 'ok'
+    try:
+        yield
+    except BaseException as e:
+        status = 'error'
+        fields['error'] = str(e)
+        raise
+    finally:
+        record_stage(stage, time.perf_counter() - started, status, **fields)
+
+def count_request(service, status='ok'):
+    """외부 서비스 요청 결과 기록 (status: 'ok' | 'error')"""
+    _inc('younotion_service_requests_total', service=service, status=status)
+
+def count_retry(service, reason=''):
+    """외부 서비스 재시도 기록"""
+    _inc('younotion_service_retries_total', service=service)
+    log_event('retry', service=service, reason=reason)
+
+def estimate_cost(model, prompt_tokens, completion_tokens):
+    """토큰 수로 예상 비용(USD) 계산 (가격을 모르는 모델은 0)"""
+    input_price, output_price = MODEL_PRICING.get(model, (0.0, 0.0))
+    return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+
+def record_openai_usage(model, usage):
+    """OpenAI 응답의 usage(토큰 수) 기록, 반환값: 예상 비용(USD)"""
+    if usage is None:
+        return 0.0
+    prompt_tokens = getattr(usage, 'prompt_tokens', 0) or 0
+    completion_tokens = getattr(usage, 'completion_tokens', 0) or 0
+    cost = estimate_cost(model, prompt_tokens, completion_tokens)
+    _inc('younotion_openai_tokens_total', prompt_tokens, model=model, kind='prompt')
+    _inc('younotion_openai_tokens_total', completion_tokens, model=model, kind='completion')
+    _inc('younotion_openai_cost_usd_total', cost, model=model)
+    log_event('openai_usage', model=model, prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, cost_usd=round(cost, 6))
+    return cost
+
+def record_compaction(stats):
+    """자막 압축 결과 기록 (compactor.compact_transcript의 통계 dict)"""
+    _inc('younotion_transcript_tokens_total', stats['original_tokens'], kind='original')
+    _inc('younotion_transcript_tokens_total', stats['compacted_tokens'], kind='compacted')
+    log_event('compaction', **stats)
+
+def count_prefetch(result):
+    """검색 결과 자막 미리 받기 결과 기록"""
+    _inc('younotion_prefetch_total', result=result)
+
+def snapshot():
+    """현재 지표 복사본 (counters, histograms)"""
+    with _lock:
+        counters = dict(_counters)
+        histograms = {key: {'buckets': list(h['buckets']), 'sum': h['sum'], 'count': h['count']} for key, h in _histograms.items()}
+    return counters, histograms
+
+def reset():
+    """모든 지표 초기화"""
+    with _lock:
+        _counters.clear()
+        _histograms.clear()
+
+def _format_labels(labels, extra=()):
+    pairs = list(labels) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+def render_prometheus():
+    """Prometheus 텍스트 형식(0.0.4)으로 모든 지표 출력"""
+    counters, histograms = snapshot()
+    lines = []
+    for name, (kind, description) in _HELP.items():
+        if kind == 'histogram':
+            series = sorted((labels, h) for (metric, labels), h in histograms.items() if metric == name)
+        else:
+            series = sorted((labels, value) for (metric, labels), value in counters.items() if metric == name)
+        if not series:
+            continue
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in series:
+            if kind == 'histogram':
+                for bound, count in zip(DURATION_BUCKETS, value['buckets']):
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', str(bound))])} {count}")
+                lines.append(f"{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {value['count']}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {value['sum']:.6f}")
+                lines.append(f"{name}_count{_format_labels(labels)} {value['count']}")
+            else:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+    return "\n".join(lines) + "\n"
+
+def write_prometheus(path=None):
+    """Prometheus 텍스트를 파일로 저장 (node_exporter textfile collector 용), 경로가 없으면 저장하지 않음"""
+    path = path or METRICS_FILE_PATH
+    if not path:
+        return None
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    # 수집기가 쓰는 중인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        f.write(render_prometheus())
+    os.replace(temp_path, path)
+    return path
+
+_server = None
+_server_lock = threading.Lock()
+
+def start_metrics_server(port, host='0.0.0.0'):
+    """/metrics 엔드포인트를 제공하는 HTTP 서버를 백그라운드 스레드로 시작 (프로세스당 한 번)"""
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return _server
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = render_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        _server = ThreadingHTTPServer((host, int(port)), MetricsHandler)
+        threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+        print(f"📈 지표 엔드포인트: http://{host}:{port}/metrics")
+        return _server
@@ -0,0 +1,129 @@
+"""
+video_id → Notion 페이지 로컬 인덱스
+
+같은 영상을 다시 분석했을 때 새 페이지를 만들지 않고 기존 페이지를 갱신하기 위해
+(데이터베이스 ID, video_id) → 페이지 ID를 SQLite에 저장한다.
+
+처음에는 databases.query를 끝까지 한 번 훑어서 인덱스를 만들고,
+이후에는 마지막 동기화 시점 이후에 수정된 페이지(last_edited_time 필터)만 가져와 갱신한다.
+"""
+import os
+import sqlite3
+import threading
+import time
+from cache import CACHE_DIR
+
+# 이 시간(초) 안에 동기화했다면 다시 동기화하지 않음
+DEFAULT_SYNC_INTERVAL = 300
+
+class NotionPageIndex:
+    """(데이터베이스 ID, video_id) → (페이지 ID, URL) 인덱스 (스레드 안전)"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " database_id TEXT NOT NULL,"
+            " video_id TEXT NOT NULL,"
+            " page_id TEXT NOT NULL,"
+            " url TEXT,"
+            " last_edited_time TEXT,"
+            " PRIMARY KEY (database_id, video_id))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " database_id TEXT PRIMARY KEY,"
+            " watermark TEXT,"
+            " synced_at REAL NOT NULL)"
+        )
+
+    def lookup(self, database_id, video_id):
+        """인덱스에서 페이지 조회, 반환값: (페이지 ID, URL) 또는 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_id, url FROM pages WHERE database_id = ? AND video_id = ?",
+                (database_id, video_id)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def record(self, database_id, video_id, page_id, url, last_edited_time=None):
+        """페이지 등록 또는 갱신"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO pages (database_id, video_id, page_id, url, last_edited_time) VALUES (?, ?, ?, ?, ?)",
+                (database_id, video_id, page_id, url, last_edited_time)
+            )
+
+    def forget(self, database_id, video_id):
+        """인덱스에서 페이지 삭제 (페이지가 지워졌거나 보관된 경우)"""
+        with self._lock:
+            self._conn.execute("DELETE FROM pages WHERE database_id = ? AND video_id = ?", (database_id, video_id))
+
+    def sync(self, notion, database_id, video_id_for_url, writer=None, max_age=DEFAULT_SYNC_INTERVAL):
+        """
+        Notion 데이터베이스와 인덱스 동기화
+        처음에는 전체를, 이후에는 마지막 동기화 이후 수정된 페이지만 조회한다.
+        video_id_for_url: 페이지의 URL 속성에서 video_id를 뽑는 함수
+        writer: 요청에 속도 제한/재시도를 적용할 NotionWriter (None이면 직접 호출)
+        반환값: 이번에 반영한 페이지 수
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT watermark, synced_at FROM sync_state WHERE database_id = ?", (database_id,)
+            ).fetchone()
+        watermark, synced_at = row if row else (None, 0)
+        if row and time.time() - synced_at < max_age:
+            return 0
+
+        query = {
+            'database_id': database_id,
+            'page_size': 100,
+            'sorts': [{'timestamp': 'last_edited_time', 'direction': 'ascending'}],
+        }
+        if watermark:
+            query['filter'] = {'timestamp': 'last_edited_time', 'last_edited_time': {'on_or_after': watermark}}
+
+        call = writer.call if writer else (lambda func, **kwargs: func(**kwargs))
+        updated = 0
+        cursor = None
+        while True:
+            if cursor:
+                query['start_cursor'] = cursor
+            response = call(notion.databases.query, **query)
+            for page in response.get('results', []):
+                url = ((page.get('properties') or {}).get('URL') or {}).get('url')
+                video_id = video_id_for_url(url) if url else None
+                if video_id and not page.get('archived'):
+                    self.record(database_id, video_id, page['id'], page.get('url'), page.get('last_edited_time'))
+                    updated += 1
+                # last_edited_time은 ISO 8601 문자열이라 문자열 비교로 최댓값을 구할 수 있음
+                edited = page.get('last_edited_time')
+                if edited and (watermark is None or edited > watermark):
+                    watermark = edited
+            if not response.get('has_more'):
+                break
+            cursor = response.get('next_cursor')
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (database_id, watermark, synced_at) VALUES (?, ?, ?)",
+                (database_id, watermark, time.time())
+            )
+        return updated
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_notion_index():
+    """프로세스 전체에서 공유하는 Notion 페이지 인덱스"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = NotionPageIndex(os.path.join(CACHE_DIR, 'notion_index.sqlite3'))
+        return _index
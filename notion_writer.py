@@ -0,0 +1,182 @@
+"""
+Notion 쓰기 전용 모듈
+
+- 긴 텍스트를 2000자 이하 rich_text 조각으로 나눠 전체 리포트를 저장 (잘라내지 않음)
+- pages.create는 자식 블록을 100개까지만 받으므로 나머지는 100개씩 blocks.children.append
+- 프로세스 전체에서 공유하는 토큰 버킷으로 Notion 요청 속도 제한 (기본 초당 3회)
+- 429 응답이면 Retry-After만큼 기다렸다가 재시도, 5xx는 지수 백오프로 재시도
+- 백그라운드 큐(submit)로 분석 워커가 Notion 응답을 기다리지 않도록 처리
+- 이미 있는 페이지는 속성을 갱신하고 본문 블록을 교체(update_page)
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+
+# Notion API 제한
+NOTION_TEXT_LIMIT = 2000
+NOTION_RICH_TEXT_MAX_ITEMS = 100
+NOTION_CHILDREN_BATCH = 100
+# Notion 통합(integration)당 평균 요청 한도
+NOTION_REQUESTS_PER_SECOND = 3.0
+
+def split_text(text, limit=NOTION_TEXT_LIMIT):
+    """
+    텍스트를 limit 이하 조각으로 나누기 (가능하면 줄바꿈 경계에서 자름)
+    줄바꿈은 앞 조각 끝에 남기므로 "".join(조각들) == text
+    """
+    chunks = []
+    while len(text) > limit:
+        cut = text.rfind("\n", 0, limit) + 1
+        if cut <= 0:
+            cut = limit
+        chunks.append(text[:cut])
+        text = text[cut:]
+    if text:
+        chunks.append(text)
+    return chunks
+
+def to_rich_text(text):
+    """
+    텍스트를 rich_text 배열로 변환 (조각당 2000자, 최대 100조각)
+    100조각을 넘으면 내용을 잘라내지 않고 ValueError
+    """
+    chunks = split_text(text)
+    if len(chunks) > NOTION_RICH_TEXT_MAX_ITEMS:
+        raise ValueError(
+            f"rich_text 최대 {NOTION_RICH_TEXT_MAX_ITEMS}조각({NOTION_RICH_TEXT_MAX_ITEMS * NOTION_TEXT_LIMIT}자)을 "
+            f"넘는 텍스트입니다: {len(text)}자"
+        )
+    return [{"type": "text", "text": {"content": chunk}} for chunk in chunks]
+
+def to_paragraph_blocks(text):
+    """텍스트를 2000자 이하 paragraph 블록 목록으로 변환 (블록 경계가 줄바꿈이므로 조각 끝 줄바꿈은 뺌)"""
+    return [
+        {
+            "object": "block",
+            "type": "paragraph",
+            "paragraph": {"rich_text": [{"type": "text", "text": {"content": chunk[:-1] if chunk.endswith("\n") else chunk}}]}
+        }
+        for chunk in split_text(text)
+    ]
+
+class TokenBucket:
+    """초당 rate개의 토큰을 채우는 토큰 버킷 (스레드 안전)"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """토큰 하나를 얻을 때까지 대기"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """서버가 Retry-After를 준 경우 모든 요청이 그 시간만큼 쉬도록 토큰을 비움"""
+        with self._lock:
+            self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+# 모든 Notion 요청이 공유하는 속도 제한기
+_rate_limiter = TokenBucket(NOTION_REQUESTS_PER_SECOND)
+
+class NotionWriter:
+    """속도 제한 + 재시도 + 백그라운드 큐를 갖춘 Notion 쓰기 도우미"""
+
+    def __init__(self, workers=2, max_retries=5, limiter=None):
+        self.max_retries = max_retries
+        self.limiter = limiter or _rate_limiter
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="notion-writer")
+
+    def call(self, func, *args, **kwargs):
+        """Notion API 호출 1회 (속도 제한 적용, 429/5xx 재시도)"""
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire()
+            try:
+                response = func(*args, **kwargs)
+            except Exception as e:
+                metrics.count_request('notion', 'error')
+                status = getattr(e, 'status', None)
+                if attempt >= self.max_retries or not (status == 429 or (status and status >= 500)):
+                    raise
+                metrics.count_retry('notion', reason=status)
+                if status == 429:
+                    headers = getattr(e, 'headers', None) or {}
+                    delay = float(headers.get('retry-after') or headers.get('Retry-After') or 1)
+                    print(f"⏳ Notion 요청 한도 초과, {delay:.1f}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                    self.limiter.pause(delay)
+                else:
+                    delay = min(2 ** attempt, 30)
+                    print(f"⏳ Notion 서버 오류({status}), {delay}초 후 재시도 ({attempt + 1}/{self.max_retries})")
+                    time.sleep(delay)
+            else:
+                metrics.count_request('notion')
+                return response
+
+    def append_children(self, notion, block_id, children):
+        """자식 블록을 100개씩 나눠 추가"""
+        for i in range(0, len(children), NOTION_CHILDREN_BATCH):
+            self.call(notion.blocks.children.append, block_id=block_id, children=children[i:i + NOTION_CHILDREN_BATCH])
+
+    def create_page(self, notion, page):
+        """페이지 생성 (자식 블록이 100개를 넘으면 나머지는 이어서 추가), 생성된 페이지 응답 반환"""
+        page = dict(page)
+        children = page.pop("children", [])
+        response = self.call(notion.pages.create, children=children[:NOTION_CHILDREN_BATCH], **page)
+        if children[NOTION_CHILDREN_BATCH:]:
+            self.append_children(notion, response["id"], children[NOTION_CHILDREN_BATCH:])
+        return response
+
+    def replace_children(self, notion, block_id, children):
+        """기존 자식 블록을 모두 지우고 새 블록으로 교체"""
+        existing = []
+        cursor = None
+        while True:
+            kwargs = {'block_id': block_id, 'page_size': 100}
+            if cursor:
+                kwargs['start_cursor'] = cursor
+            response = self.call(notion.blocks.children.list, **kwargs)
+            existing.extend(block['id'] for block in response.get('results', []))
+            if not response.get('has_more'):
+                break
+            cursor = response.get('next_cursor')
+
+        for child_id in existing:
+            self.call(notion.blocks.delete, block_id=child_id)
+        self.append_children(notion, block_id, children)
+
+    def update_page(self, notion, page_id, page):
+        """기존 페이지의 속성과 본문을 교체, 갱신된 페이지 응답 반환"""
+        response = self.call(notion.pages.update, page_id=page_id, properties=page["properties"])
+        self.replace_children(notion, page_id, page.get("children", []))
+        return response
+
+    def submit(self, func, *args, **kwargs):
+        """작업을 백그라운드 큐에 넣고 Future 반환"""
+        return self._executor.submit(func, *args, **kwargs)
+
+    def shutdown(self, wait=True):
+        """큐에 남은 작업을 마치고 종료"""
+        self._executor.shutdown(wait=wait)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_notion_writer():
+    """프로세스 전체에서 공유하는 기본 NotionWriter"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = NotionWriter()
+        return _writer
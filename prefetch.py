@@ -0,0 +1,159 @@
+"""
+검색 결과 자막/영상 정보 미리 받기 (웹 앱)
+
+검색 결과 카드가 보이는 동안 백그라운드에서 각 영상의 자막을 미리 받아 자막 캐시에 넣고,
+영상 정보는 검색 결과의 제목/채널명으로 메타데이터 캐시를 채워 둔다.
+사용자가 "이 영상 분석하기"를 누르면 분석 작업은 claim()으로 미리 받은 결과를 확인하고
+(아직 받는 중이면 그 요청이 끝나기를 기다림) 바로 GPT 분석으로 넘어간다.
+
+- 동시 요청 수는 프로세스 전체에서 PREFETCH_WORKERS개로 제한 (자막 요청은 fetch_scheduler도 거침)
+- 세션에서 새로 검색하면 그 세션의 이전 검색 결과 중 아직 시작하지 않은 요청은 취소
+- SESSION_TTL 동안 검색하지 않은 세션(브라우저를 닫은 세션 등)은 잊고 그 세션의 요청도 정리
+- 적중(hit), 받는 중에 클릭(late_hit), 미스(miss), 쓰이지 않은 요청(wasted), 취소(cancelled) 횟수를 기록
+"""
+import html
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from main import resolve_transcript
+from video_metadata import get_metadata_cache
+import metrics
+
+PREFETCH_WORKERS = 3
+# 이 시간(초) 동안 검색하지 않은 세션은 정리
+SESSION_TTL = 30 * 60
+
+HIT = 'hit'
+LATE_HIT = 'late_hit'
+MISS = 'miss'
+WASTED = 'wasted'
+CANCELLED = 'cancelled'
+ERROR = 'error'
+
+class Prefetcher:
+    """검색 결과 영상의 자막 미리 받기 (프로세스 전체 공유, 스레드 안전)"""
+
+    def __init__(self, workers=PREFETCH_WORKERS):
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="prefetch")
+        self._tasks = {}     # video_id → {'future': Future, 'sessions': {세션 ID, ...}}
+        self._sessions = {}  # 세션 ID → 마지막 검색에서 미리 받는 video_id 목록
+        self._last_seen = {}  # 세션 ID → 마지막 검색 시각 (time.monotonic)
+        self._counts = {HIT: 0, LATE_HIT: 0, MISS: 0, WASTED: 0, CANCELLED: 0, ERROR: 0}
+        self._lock = threading.Lock()
+
+    def _count(self, result):
+        """lock 안에서 호출"""
+        self._counts[result] += 1
+        metrics.count_prefetch(result)
+
+    def prefetch(self, session_id, videos, priority):
+        """
+        검색 결과(videos: search_youtube_videos 반환값)의 자막을 미리 받기 시작
+        같은 세션의 이전 검색 결과 중 이번 결과에 없는 영상의 요청은 취소한다.
+        """
+        # 영상 정보는 검색 결과에 이미 있으므로 요청 없이 캐시에 넣음 (API 응답의 제목은 HTML 이스케이프되어 있음)
+        cache = get_metadata_cache()
+        for video in videos:
+            if not cache.get(video['video_id']):
+                cache.set(video['video_id'], {'title': html.unescape(video['title']), 'channel': html.unescape(video['channel'])})
+
+        video_ids = [video['video_id'] for video in videos]
+        with self._lock:
+            self._evict_idle_sessions()
+            for video_id in self._sessions.get(session_id, []):
+                if video_id not in video_ids:
+                    self._release(video_id, session_id)
+            if not video_ids:
+                self._sessions.pop(session_id, None)
+                self._last_seen.pop(session_id, None)
+                return
+            self._sessions[session_id] = video_ids
+            self._last_seen[session_id] = time.monotonic()
+            for video_id in video_ids:
+                task = self._tasks.get(video_id)
+                if task is None:
+                    future = self._executor.submit(self._fetch, video_id, [tuple(item) for item in priority])
+                    task = self._tasks[video_id] = {'future': future, 'sessions': set()}
+                task['sessions'].add(session_id)
+
+    def _evict_idle_sessions(self):
+        """SESSION_TTL 동안 검색하지 않은 세션과 그 세션만 기다리던 요청 정리 (lock 안에서 호출)"""
+        now = time.monotonic()
+        for session_id in [key for key, seen in self._last_seen.items() if now - seen > SESSION_TTL]:
+            for video_id in self._sessions.pop(session_id, []):
+                self._release(video_id, session_id)
+            del self._last_seen[session_id]
+
+    def _release(self, video_id, session_id):
+        """세션이 더 이상 보지 않는 영상의 요청 정리 (lock 안에서 호출)"""
+        task = self._tasks.get(video_id)
+        if task is None:
+            return
+        task['sessions'].discard(session_id)
+        if task['sessions']:
+            return
+        del self._tasks[video_id]
+        if task['future'].cancel():
+            self._count(CANCELLED)
+        else:
+            # 이미 시작했거나 끝난 요청은 결과가 쓰이지 않음 (자막 캐시에는 남음)
+            self._count(WASTED)
+
+    @staticmethod
+    def _fetch(video_id, priority):
+        with metrics.span('prefetch', video_id=video_id):
+            resolve_transcript(video_id, priority=priority, log=lambda message: None)
+
+    def claim(self, video_id):
+        """
+        분석을 시작하기 전에 호출: 미리 받는 중이면 끝날 때까지 기다림
+        반환값: HIT | LATE_HIT | MISS | ERROR (ERROR면 분석 작업이 자막을 다시 요청해서 오류를 보여줌)
+        """
+        with self._lock:
+            self._evict_idle_sessions()
+            task = self._tasks.pop(video_id, None)
+            if task is not None:
+                for video_ids in self._sessions.values():
+                    if video_id in video_ids:
+                        video_ids.remove(video_id)
+        if task is None:
+            result = MISS
+        else:
+            result = HIT if task['future'].done() else LATE_HIT
+            if task['future'].cancelled() or task['future'].exception() is not None:
+                result = ERROR
+        with self._lock:
+            self._count(result)
+        return result
+
+    def stats(self):
+        """미리 받기 통계 (hit_rate: 분석한 영상 중 미리 받아 둔 자막을 쓴 비율)"""
+        with self._lock:
+            counts = dict(self._counts)
+            counts['in_flight'] = len(self._tasks)
+            counts['sessions'] = len(self._sessions)
+        claimed = counts[HIT] + counts[LATE_HIT] + counts[MISS] + counts[ERROR]
+        counts['hit_rate'] = round((counts[HIT] + counts[LATE_HIT]) / claimed, 3) if claimed else None
+        return counts
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def cancel_prefetch(session_id):
+    """세션의 미리 받기 요청 정리 (미리 받기를 쓰지 않은 프로세스에서는 아무것도 하지 않음)"""
+    prefetcher = _prefetcher
+    if prefetcher:
+        prefetcher.prefetch(session_id, [], ())
+
+def claim_prefetched(video_id):
+    """미리 받기를 한 번이라도 사용한 프로세스에서만 Prefetcher.claim() 호출 (아니면 None)"""
+    prefetcher = _prefetcher
+    return prefetcher.claim(video_id) if prefetcher else None
+
+def get_prefetcher():
+    """프로세스 전체에서 공유하는 Prefetcher (Streamlit 세션 간 공유)"""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = Prefetcher()
+        return _prefetcher
@@ -0,0 +1,337 @@
+"""
+저장된 자막/분석 리포트 로컬 전문 검색 (SQLite FTS5)
+
+write_transcript_file, save_analysis_report가 파일을 쓸 때와 웹 앱 분석 작업이 끝날 때
+해당 문서를 색인에 추가/갱신한다. 이미 디스크에 있는 *_trans.txt, *_analysis.txt는
+sync_directory()로 수정 시각이 바뀐 파일만 다시 색인한다.
+
+- 한국어는 조사가 붙어 띄어쓰기 단위로는 잘 찾아지지 않으므로 trigram 토크나이저를 사용
+  (부분 문자열 검색, SQLite 3.34 미만이면 unicode61로 대체)
+- 검색어의 각 단어는 모두 포함(AND)해야 하고, 따옴표로 묶은 부분은 구문으로 검색
+- bm25 점수로 정렬하고(제목 > 채널 > 본문 가중치) 본문 일치 부분을 snippet으로 반환
+
+사용법:
+    python search_index.py "검색어"
+    python search_index.py --reindex subtitles
+"""
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from cache import CACHE_DIR
+
+TRANSCRIPT = 'transcript'
+ANALYSIS = 'analysis'
+
+# 파일명: {제목}_{채널명}_{video_id}_trans.txt, {제목}_{video_id}_analysis.txt
+FILENAME_PATTERN = re.compile(r'^(?P<stem>.*)_(?P<video_id>[0-9A-Za-z_-]{11})_(?P<kind>trans|analysis)\.txt$')
+
+# bm25 가중치 (title, channel, body)
+RANK_WEIGHTS = (10.0, 2.0, 1.0)
+# snippet 강조 표시 (호출한 쪽에서 HTML 등으로 바꿀 수 있도록 제어 문자 사용)
+HIGHLIGHT_START = "\x02"
+HIGHLIGHT_END = "\x03"
+SNIPPET_TOKENS = 24
+# 이 시간(초) 안에 같은 디렉토리를 동기화했다면 다시 훑지 않음
+DEFAULT_SYNC_INTERVAL = 300
+
+def _fts_tokenizer(conn):
+    """trigram 토크나이저 지원 여부 확인"""
+    try:
+        conn.execute("CREATE VIRTUAL TABLE temp.tokenizer_probe USING fts5(x, tokenize='trigram')")
+        conn.execute("DROP TABLE temp.tokenizer_probe")
+        return 'trigram'
+    except sqlite3.OperationalError:
+        return 'unicode61'
+
+def build_match_query(query):
+    """
+    검색어를 FTS5 MATCH 식으로 변환
+    '인공지능 "딥 러닝"' → '"인공지능" "딥 러닝"' (모든 단어/구문을 포함)
+    """
+    terms = [phrase or word for phrase, word in re.findall(r'"([^"]+)"|(\S+)', query)]
+    terms = [term.replace('"', '""').strip() for term in terms]
+    return " ".join(f'"{term}"' for term in terms if term)
+
+class SearchIndex:
+    """자막/분석 리포트 전문 검색 색인 (스레드 안전)"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " id INTEGER PRIMARY KEY,"
+            " video_id TEXT NOT NULL,"
+            " kind TEXT NOT NULL,"
+            " path TEXT,"
+            " mtime REAL,"
+            " indexed_at REAL NOT NULL,"
+            " UNIQUE (video_id, kind))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS documents_path ON documents (path)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sync_state ("
+            " directory TEXT PRIMARY KEY,"
+            " synced_at REAL NOT NULL)"
+        )
+        row = self._conn.execute("SELECT sql FROM sqlite_master WHERE name = 'documents_fts'").fetchone()
+        if row:
+            self.tokenizer = 'trigram' if 'trigram' in row[0] else 'unicode61'
+        else:
+            self.tokenizer = _fts_tokenizer(self._conn)
+            self._conn.execute(
+                f"CREATE VIRTUAL TABLE documents_fts USING fts5(title, channel, body, tokenize='{self.tokenizer}')"
+            )
+
+    def add(self, video_id, kind, title, channel, body, path=None, mtime=None):
+        """문서 추가 또는 갱신 ((video_id, kind)마다 하나)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT id FROM documents WHERE video_id = ? AND kind = ?", (video_id, kind)
+                ).fetchone()
+                if row:
+                    doc_id = row[0]
+                    self._conn.execute(
+                        "UPDATE documents SET path = ?, mtime = ?, indexed_at = ? WHERE id = ?",
+                        (path, mtime, time.time(), doc_id)
+                    )
+                    self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (doc_id,))
+                else:
+                    doc_id = self._conn.execute(
+                        "INSERT INTO documents (video_id, kind, path, mtime, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                        (video_id, kind, path, mtime, time.time())
+                    ).lastrowid
+                self._conn.execute(
+                    "INSERT INTO documents_fts (rowid, title, channel, body) VALUES (?, ?, ?, ?)",
+                    (doc_id, title or "", channel or "", body or "")
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def add_file(self, path, video_id, kind, title, channel):
+        """파일 내용을 색인에 추가 (수정 시각이 같으면 건너뜀), 반환값: 색인했으면 True"""
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT path, mtime FROM documents WHERE video_id = ? AND kind = ?", (video_id, kind)
+            ).fetchone()
+        if row and row[0] == os.path.abspath(path) and row[1] == mtime:
+            return False
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            body = f.read()
+        self.add(video_id, kind, title, channel, body, os.path.abspath(path), mtime)
+        return True
+
+    def remove(self, video_id, kind):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id FROM documents WHERE video_id = ? AND kind = ?", (video_id, kind)
+            ).fetchone()
+            if row:
+                self._conn.execute("DELETE FROM documents_fts WHERE rowid = ?", (row[0],))
+                self._conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+
+    def sync_directory(self, directory, max_age=DEFAULT_SYNC_INTERVAL, title_for=None):
+        """
+        디렉토리의 *_trans.txt, *_analysis.txt 중 새로 생겼거나 바뀐 파일만 색인하고, 사라진 파일은 색인에서 제거
+        title_for: video_id → (제목, 채널명) 또는 None을 반환하는 함수 (없으면 파일명에서 추정)
+        반환값: 이번에 색인한 파일 수
+        """
+        directory = os.path.abspath(directory)
+        with self._lock:
+            row = self._conn.execute("SELECT synced_at FROM sync_state WHERE directory = ?", (directory,)).fetchone()
+        if row and time.time() - row[0] < max_age:
+            return 0
+
+        indexed = 0
+        seen = set()
+        names = os.listdir(directory) if os.path.isdir(directory) else []
+        for name in names:
+            match = FILENAME_PATTERN.match(name)
+            if not match:
+                continue
+            video_id = match.group('video_id')
+            kind = TRANSCRIPT if match.group('kind') == 'trans' else ANALYSIS
+            path = os.path.join(directory, name)
+            seen.add(path)
+            known = title_for(video_id) if title_for else None
+            title, channel = known or (match.group('stem').replace('_', ' '), "")
+            try:
+                if self.add_file(path, video_id, kind, title, channel):
+                    indexed += 1
+            except OSError as e:
+                print(f"⚠️ 색인 실패: {name} ({e})")
+
+        with self._lock:
+            stale = [
+                (video_id, kind) for video_id, kind, path in self._conn.execute(
+                    "SELECT video_id, kind, path FROM documents WHERE path LIKE ?", (os.path.join(directory, '%'),)
+                ).fetchall()
+                if os.path.dirname(path) == directory and path not in seen
+            ]
+        for video_id, kind in stale:
+            self.remove(video_id, kind)
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sync_state (directory, synced_at) VALUES (?, ?)", (directory, time.time())
+            )
+        return indexed
+
+    def search(self, query, limit=10, kind=None):
+        """
+        검색 (bm25 순)
+        반환값: [{'video_id', 'kind', 'title', 'channel', 'path', 'snippet', 'score'}, ...]
+        snippet의 일치 부분은 HIGHLIGHT_START/HIGHLIGHT_END로 감싸져 있다.
+        """
+        match = build_match_query(query)
+        if not match:
+            return []
+        # trigram은 3글자 미만 단어를 찾지 못하므로 LIKE로 대체
+        short_terms = self.tokenizer == 'trigram' and any(len(term) < 3 for term in re.findall(r'"((?:[^"]|"")*)"', match))
+        if short_terms:
+            return self._search_like(query, limit, kind)
+
+        sql = (
+            "SELECT d.video_id, d.kind, f.title, f.channel, d.path,"
+            " snippet(documents_fts, 2, ?, ?, '…', ?),"
+            f" bm25(documents_fts, {', '.join(str(w) for w in RANK_WEIGHTS)}) AS score"
+            " FROM documents_fts f JOIN documents d ON d.id = f.rowid"
+            " WHERE documents_fts MATCH ?"
+        )
+        params = [HIGHLIGHT_START, HIGHLIGHT_END, SNIPPET_TOKENS, match]
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        try:
+            with self._lock:
+                rows = self._conn.execute(sql, params).fetchall()
+        except sqlite3.OperationalError as e:
+            print(f"⚠️ 검색어를 해석할 수 없습니다: {e}")
+            return []
+        return [self._row(row) for row in rows]
+
+    def _search_like(self, query, limit, kind):
+        """짧은 검색어용 LIKE 검색 (모든 단어 포함, 제목 일치 우선)"""
+        terms = [phrase or word for phrase, word in re.findall(r'"([^"]+)"|(\S+)', query)]
+        conditions = []
+        params = []
+        for term in terms:
+            pattern = '%' + term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            conditions.append("(f.title LIKE ? ESCAPE '\\' OR f.channel LIKE ? ESCAPE '\\' OR f.body LIKE ? ESCAPE '\\')")
+            params.extend([pattern] * 3)
+        sql = (
+            "SELECT d.video_id, d.kind, f.title, f.channel, d.path, f.body,"
+            " CASE WHEN f.title LIKE ? ESCAPE '\\' THEN 0 ELSE 1 END AS score"
+            " FROM documents_fts f JOIN documents d ON d.id = f.rowid"
+            f" WHERE {' AND '.join(conditions)}"
+        )
+        first = '%' + terms[0].replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        params = [first] + params
+        if kind:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY score, d.indexed_at DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(sql, params).fetchall()
+        results = []
+        for video_id, doc_kind, title, channel, path, body, score in rows:
+            results.append(self._row((video_id, doc_kind, title, channel, path, _like_snippet(body, terms), score)))
+        return results
+
+    @staticmethod
+    def _row(row):
+        video_id, kind, title, channel, path, snippet, score = row
+        return {
+            'video_id': video_id,
+            'kind': kind,
+            'title': title,
+            'channel': channel,
+            'path': path,
+            'snippet': snippet,
+            'score': score,
+            'url': f"https://www.youtube.com/watch?v={video_id}",
+        }
+
+    def stats(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT kind, COUNT(*) FROM documents GROUP BY kind").fetchall()
+        return {'tokenizer': self.tokenizer, **{kind: count for kind, count in rows}}
+
+def _like_snippet(body, terms, width=60):
+    """LIKE 검색 결과용 snippet (첫 번째로 찾은 단어 주변)"""
+    lowered = body.lower()
+    for term in terms:
+        position = lowered.find(term.lower())
+        if position >= 0:
+            start = max(0, position - width)
+            end = min(len(body), position + len(term) + width)
+            return (
+                ("…" if start else "") + body[start:position] + HIGHLIGHT_START + body[position:position + len(term)]
+                + HIGHLIGHT_END + body[position + len(term):end] + ("…" if end < len(body) else "")
+            )
+    return body[:width * 2]
+
+_index = None
+_index_lock = threading.Lock()
+
+def get_search_index():
+    """프로세스 전체에서 공유하는 검색 색인"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = SearchIndex(os.path.join(CACHE_DIR, 'search_index.sqlite3'))
+        return _index
+
+def index_document(video_id, kind, title, channel, body, path=None):
+    """색인에 문서 추가 (실패해도 호출한 쪽 작업은 계속 진행)"""
+    try:
+        mtime = os.path.getmtime(path) if path else None
+        get_search_index().add(video_id, kind, title, channel, body, os.path.abspath(path) if path else None, mtime)
+    except Exception as e:
+        print(f"⚠️ 검색 색인 갱신 실패: {e}")
+
+def main():
+    args = sys.argv[1:]
+    index = get_search_index()
+    if len(args) == 2 and args[0] == '--reindex':
+        from video_metadata import get_metadata_cache
+        metadata = get_metadata_cache()
+
+        def title_for(video_id):
+            cached = metadata.get(video_id)
+            return (cached['title'], cached['channel']) if cached else None
+
+        count = index.sync_directory(args[1], max_age=0, title_for=title_for)
+        print(f"✅ {count}개 파일을 색인했습니다. {index.stats()}")
+        return
+    if not args:
+        print("사용법: python search_index.py \"검색어\" | --reindex <디렉토리>")
+        sys.exit(1)
+
+    started = time.perf_counter()
+    results = index.search(" ".join(args))
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"🔎 {len(results)}건 ({elapsed_ms:.1f}ms)")
+    for result in results:
+        snippet = result['snippet'].replace(HIGHLIGHT_START, "[").replace(HIGHLIGHT_END, "]").replace("\n", " ")
+        print(f"- [{result['kind']}] {result['title']} ({result['channel']}) {result['url']}")
+        print(f"    {snippet}")
+
+if __name__ == "__main__":
+    main()
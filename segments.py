@@ -0,0 +1,449 @@
+"""
+열(column) 단위 자막 저장소
+
+자막 항목 리스트([{'text', 'start', 'duration'}, ...])를 항목마다 dict로 들고 있지 않고
+다음과 같이 열 단위 배열로 저장한다.
+
+- start_ms, duration_ms: uint32 배열 (밀리초)
+- 텍스트: 항목 텍스트를 이어 붙인 UTF-8 덩어리를 BLOCK_SEGMENTS개 항목 단위 블록으로 zlib 압축
+- offsets: 각 항목 텍스트의 블록 안 시작 위치 (uint32)
+
+.seg 파일은 mmap으로 열어서 숫자 배열은 복사 없이 바로 읽고, 텍스트는 필요한 블록만 압축을 푼다.
+시작 시각 배열이 정렬되어 있으므로 "10:00~12:00 사이 텍스트" 같은 구간 조회는 이진 탐색(O(log n))으로 찾는다.
+(앞 항목이 길게 이어지는 자막도 찾도록, 처음 구간 조회할 때 "여기까지의 가장 늦은 끝 시각" 배열을 한 번 만든다)
+mmap으로 연 자막과 저장소는 close() 또는 with 문으로 바로 닫을 수 있다.
+
+TranscriptSegments는 기존 항목 리스트처럼 len(), 인덱싱, 반복(각 항목은 dict)을 지원하므로
+자막 리스트를 받던 코드에 그대로 넘길 수 있다.
+
+사용법:
+    python segments.py <video_id> 10:00 12:00   # 캐시된 자막에서 구간 텍스트 출력
+"""
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+import weakref
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from cache import CACHE_DIR
+
+# 파일 형식: MAGIC + HEADER(항목 수, 블록 크기, 블록 수) + start_ms + duration_ms + offsets + block_offsets + 압축 블록들
+MAGIC = b'YNSEG01\n'
+HEADER = struct.Struct('<III')
+# 블록 하나에 들어가는 항목 수 (구간 조회 시 압축을 푸는 단위)
+BLOCK_SEGMENTS = 128
+# 압축을 풀어 둔 블록을 몇 개까지 메모리에 둘지
+DECODED_BLOCKS = 8
+
+def _to_ms(seconds):
+    return max(0, int(round(float(seconds or 0) * 1000)))
+
+def _column(buffer, offset, count, typecode):
+    """buffer[offset:]에서 count개짜리 숫자 배열을 읽음 (리틀 엔디언 시스템이면 복사 없이 memoryview)"""
+    size = array(typecode).itemsize * count
+    view = memoryview(buffer)[offset:offset + size]
+    if sys.byteorder == 'little':
+        return view.cast(typecode), offset + size
+    column = array(typecode, view.tobytes())
+    column.byteswap()
+    return column, offset + size
+
+def _little_endian_bytes(column):
+    if sys.byteorder != 'little':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+def parse_timestamp(value):
+    """'12:34', '1:02:03', '95.5' 형식을 초 단위 float으로 변환"""
+    seconds = 0.0
+    for part in str(value).split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+class TranscriptSegments:
+    """열 단위로 저장된 자막 (읽기 전용, 항목 리스트와 같은 방식으로 사용 가능)"""
+
+    def __init__(self, starts, durations, offsets, block_offsets, blocks, block_size=BLOCK_SEGMENTS, source=None):
+        # starts/durations: 밀리초, offsets: 블록 안 텍스트 위치 (블록마다 항목 수 + 1개)
+        # blocks: 압축된 블록 데이터 (bytes 또는 mmap), block_offsets: blocks 안의 블록 시작 위치
+        self._starts = starts
+        self._durations = durations
+        self._offsets = offsets
+        self._block_offsets = block_offsets
+        self._blocks = blocks
+        self._block_size = block_size
+        self._source = source
+        self._decoded = {}
+        self._ends = None
+        self._mmap = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_transcript(cls, transcript, block_size=BLOCK_SEGMENTS):
+        """항목 리스트(dict 또는 text/start/duration 속성을 가진 객체)로 생성"""
+        if isinstance(transcript, cls):
+            return transcript
+        starts = array('I')
+        durations = array('I')
+        offsets = array('I')
+        block_offsets = array('Q', [0])
+        blocks = []
+        texts = []
+        position = 0
+
+        def flush():
+            blob = zlib.compress("".join(texts).encode('utf-8'))
+            blocks.append(blob)
+            block_offsets.append(block_offsets[-1] + len(blob))
+            texts.clear()
+
+        for i, item in enumerate(transcript):
+            if isinstance(item, dict):
+                text, start, duration = item.get('text', ''), item.get('start'), item.get('duration')
+            else:
+                text, start, duration = item.text, item.start, item.duration
+            if i % block_size == 0:
+                if i:
+                    offsets.append(position)
+                    flush()
+                position = 0
+            starts.append(_to_ms(start))
+            durations.append(_to_ms(duration))
+            offsets.append(position)
+            texts.append(text or "")
+            position += len((text or "").encode('utf-8'))
+        if starts:
+            offsets.append(position)
+            flush()
+
+        return cls(starts, durations, offsets, block_offsets, b"".join(blocks), block_size)
+
+    @classmethod
+    def from_bytes(cls, data, source=None):
+        """to_bytes()로 만든 데이터(bytes 또는 mmap)에서 복사 없이 생성"""
+        if bytes(data[:len(MAGIC)]) != MAGIC:
+            raise ValueError("자막 세그먼트 형식이 아닙니다.")
+        count, block_size, block_count = HEADER.unpack_from(data, len(MAGIC))
+        offset = len(MAGIC) + HEADER.size
+        starts, offset = _column(data, offset, count, 'I')
+        durations, offset = _column(data, offset, count, 'I')
+        offsets, offset = _column(data, offset, count + block_count, 'I')
+        block_offsets, offset = _column(data, offset, block_count + 1, 'Q')
+        blocks = memoryview(data)[offset:]
+        return cls(starts, durations, offsets, block_offsets, blocks, block_size, source)
+
+    @classmethod
+    def open(cls, path):
+        """.seg 파일을 mmap으로 열기"""
+        with open(path, 'rb') as f:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            segments = cls.from_bytes(data, source=path)
+        except Exception:
+            data.close()
+            raise
+        segments._mmap = data
+        return segments
+
+    def close(self):
+        """mmap으로 연 파일 닫기 (이후 텍스트/시각 조회 불가, 메모리에서 만든 자막은 아무것도 하지 않음)"""
+        with self._lock:
+            if self._mmap is None:
+                return
+            for column in (self._starts, self._durations, self._offsets, self._block_offsets, self._blocks):
+                if isinstance(column, memoryview):
+                    column.release()
+            self._mmap.close()
+            self._mmap = None
+            self._decoded.clear()
+            self._closed = True
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def to_bytes(self):
+        """파일 형식으로 직렬화"""
+        return b"".join([
+            MAGIC,
+            HEADER.pack(len(self._starts), self._block_size, len(self._block_offsets) - 1),
+            _little_endian_bytes(array('I', self._starts)),
+            _little_endian_bytes(array('I', self._durations)),
+            _little_endian_bytes(array('I', self._offsets)),
+            _little_endian_bytes(array('Q', self._block_offsets)),
+            bytes(self._blocks),
+        ])
+
+    def save(self, path):
+        """.seg 파일로 저장 (임시 파일에 쓴 뒤 교체)"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'wb') as f:
+            f.write(self.to_bytes())
+        os.replace(temp_path, path)
+        return path
+
+    # ----- 항목 리스트처럼 사용 -----
+
+    def __len__(self):
+        return len(self._starts)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return {'text': self.text(index), 'start': self._starts[index] / 1000, 'duration': self._durations[index] / 1000}
+
+    def __eq__(self, other):
+        try:
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        except TypeError:
+            return NotImplemented
+
+    def to_list(self):
+        """항목 리스트([{'text', 'start', 'duration'}, ...])로 변환"""
+        return list(self)
+
+    # ----- 텍스트 조회 -----
+
+    def _block(self, block):
+        """압축을 푼 블록 텍스트 (UTF-8 bytes), 최근 블록 몇 개는 메모리에 유지"""
+        with self._lock:
+            decoded = self._decoded.get(block)
+        if decoded is None:
+            start, end = self._block_offsets[block], self._block_offsets[block + 1]
+            decoded = zlib.decompress(self._blocks[start:end])
+            with self._lock:
+                if len(self._decoded) >= DECODED_BLOCKS:
+                    self._decoded.pop(next(iter(self._decoded)))
+                self._decoded[block] = decoded
+        return decoded
+
+    def text(self, index):
+        """index번째 항목의 텍스트"""
+        block, local = divmod(index, self._block_size)
+        # offsets는 블록마다 (항목 수 + 1)개씩 저장됨
+        base = block * (self._block_size + 1) + local
+        return self._block(block)[self._offsets[base]:self._offsets[base + 1]].decode('utf-8')
+
+    def texts(self, start=0, stop=None):
+        """start~stop번째 항목의 텍스트 목록"""
+        stop = len(self) if stop is None else min(stop, len(self))
+        return [self.text(i) for i in range(start, stop)]
+
+    def plain_text(self):
+        """모든 항목 텍스트를 줄바꿈으로 이은 일반 텍스트 (TextFormatter 출력과 같음)"""
+        return "\n".join(self.texts())
+
+    def _cumulative_ends(self):
+        """i번째 항목까지의 가장 늦은 끝 시각 배열 (밀리초, 정렬되어 있으므로 이진 탐색 가능)"""
+        with self._lock:
+            if self._ends is None:
+                ends = array('Q')
+                latest = 0
+                for start, duration in zip(self._starts, self._durations):
+                    latest = max(latest, start + duration)
+                    ends.append(latest)
+                self._ends = ends
+            return self._ends
+
+    def index_range(self, start_seconds, end_seconds):
+        """
+        [start_seconds, end_seconds) 구간에 걸친 항목의 인덱스 범위 (이진 탐색)
+        start_seconds에 이미 진행 중인 항목도 포함한다. 앞 항목이 길게 이어지면 그 사이의 짧은 항목도
+        범위에 들어가므로, 구간에 걸친 항목만 필요하면 segments_between()/text_between()을 쓴다.
+        """
+        start_ms, end_ms = _to_ms(start_seconds), _to_ms(end_seconds)
+        # 끝 시각이 start_ms보다 늦은 첫 항목 (가장 늦은 끝 시각이 처음으로 start_ms를 넘는 위치)
+        first = bisect_right(self._cumulative_ends(), start_ms)
+        last = bisect_left(self._starts, end_ms)
+        return first, max(first, last)
+
+    def _overlapping(self, start_seconds, end_seconds):
+        """구간에 걸친 항목의 인덱스 목록"""
+        first, last = self.index_range(start_seconds, end_seconds)
+        start_ms = _to_ms(start_seconds)
+        return [i for i in range(first, last) if self._starts[i] + self._durations[i] > start_ms]
+
+    def segments_between(self, start_seconds, end_seconds):
+        """구간에 걸친 항목 목록 (dict)"""
+        return [self[i] for i in self._overlapping(start_seconds, end_seconds)]
+
+    def text_between(self, start_seconds, end_seconds):
+        """구간에 걸친 항목의 텍스트를 줄바꿈으로 이은 문자열"""
+        return "\n".join(self.text(i) for i in self._overlapping(start_seconds, end_seconds))
+
+    def nbytes(self):
+        """직렬화했을 때의 크기 (bytes)"""
+        return (len(MAGIC) + HEADER.size + 4 * (len(self._starts) * 2 + len(self._offsets))
+                + 8 * len(self._block_offsets) + len(self._blocks))
+
+class SegmentStore:
+    """
+    (video_id, 언어, 자동 생성 여부) 단위로 .seg 파일을 저장하는 자막 캐시 (스레드 안전)
+    파일 수정 시각으로 TTL을, 접근 시각으로 LRU 정리 순서를 정한다.
+    """
+
+    def __init__(self, directory, ttl=None, max_bytes=200 * 1024 * 1024):
+        self.directory = directory
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 이 저장소에서 mmap으로 연 자막 (close()에서 함께 닫음, 쓰지 않게 된 자막은 자동으로 빠짐)
+        self._opened = weakref.WeakValueDictionary()
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def make_key(video_id, language, is_generated):
+        return f"{video_id}.{language}.{int(bool(is_generated))}"
+
+    def path_for(self, video_id, language, is_generated):
+        return os.path.join(self.directory, self.make_key(video_id, language, is_generated) + '.seg')
+
+    def get_transcript(self, video_id, language, is_generated):
+        """저장된 자막 조회 (없거나 만료되었으면 None)"""
+        path = self.path_for(video_id, language, is_generated)
+        now = time.time()
+        try:
+            stat = os.stat(path)
+            if self.ttl is not None and now - stat.st_mtime > self.ttl:
+                self._remove(path)
+                raise FileNotFoundError(path)
+            segments = TranscriptSegments.open(path)
+            # 수정 시각(TTL 기준)은 그대로 두고 접근 시각(LRU 기준)만 갱신
+            os.utime(path, (now, stat.st_mtime))
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+            self._opened[id(segments)] = segments
+        return segments
+
+    def set_transcript(self, video_id, language, is_generated, transcript):
+        """자막 저장 후 크기 제한을 넘으면 오래 사용하지 않은 파일부터 정리, 반환값: TranscriptSegments"""
+        segments = TranscriptSegments.from_transcript(transcript)
+        try:
+            segments.save(self.path_for(video_id, language, is_generated))
+        except OSError as e:
+            # mmap으로 열려 있는 파일은 일부 OS(Windows)에서 교체할 수 없음
+            print(f"⚠️ 자막 세그먼트 저장 실패: {e}")
+            return segments
+        self._evict()
+        return segments
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith('.seg'):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_atime, stat.st_size, path))
+        return entries
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        with self._lock:
+            entries = self._entries()
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in sorted(entries):
+                if total <= self.max_bytes:
+                    break
+                self._remove(path)
+                total -= size
+
+    def clear(self):
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+
+    def close(self):
+        """이 저장소에서 연 자막의 mmap을 모두 닫기 (닫은 자막은 더 이상 읽을 수 없음)"""
+        with self._lock:
+            opened = list(self._opened.values())
+            self._opened.clear()
+        for segments in opened:
+            segments.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def stats(self):
+        """항목 수, 총 크기(bytes), 적중/미스 횟수"""
+        with self._lock:
+            entries = self._entries()
+            return {
+                'entries': len(entries),
+                'bytes': sum(size for _, size, _ in entries),
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+_transcript_store = None
+_transcript_store_lock = threading.Lock()
+
+def get_transcript_cache():
+    """프로세스 전체에서 공유하는 자막 저장소 (자막은 거의 바뀌지 않으므로 TTL 7일, 최대 200MB)"""
+    global _transcript_store
+    with _transcript_store_lock:
+        if _transcript_store is None:
+            _transcript_store = SegmentStore(
+                os.path.join(CACHE_DIR, 'segments'),
+                ttl=7 * 24 * 3600,
+                max_bytes=200 * 1024 * 1024
+            )
+        return _transcript_store
+
+def main():
+    if len(sys.argv) != 4:
+        print("사용법: python segments.py <video_id> <시작 (mm:ss)> <끝 (mm:ss)>")
+        sys.exit(1)
+    video_id, start, end = sys.argv[1:]
+    store = get_transcript_cache()
+    for name in sorted(os.listdir(store.directory)):
+        if name.startswith(f"{video_id}.") and name.endswith('.seg'):
+            with TranscriptSegments.open(os.path.join(store.directory, name)) as segments:
+                print(f"📄 {name} ({len(segments):,}개 항목, {segments.nbytes():,} bytes)")
+                print(segments.text_between(parse_timestamp(start), parse_timestamp(end)))
+            return
+    print(f"❌ 캐시된 자막이 없습니다: {video_id}")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,358 @@
+"""
+채널/재생목록 증분 동기화
+
+구독 중인 채널과 재생목록을 yt_dlp flat 추출(영상별 상세 조회 없음)로 펼치고,
+지난번 동기화 이후 새로 올라온 영상만 배치 파이프라인(run_batch)으로 보낸다.
+
+- 채널 업로드 목록은 최신순이므로, 이미 본 영상이나 지난 기준점(watermark) 영상이 나오면 거기서 멈춘다
+  (보통 첫 페이지 요청 1회)
+- 재생목록은 순서가 업로드 순이 아니므로 flat 목록 전체를 본 영상 목록과 비교한다
+- 처음 동기화하는 채널은 최신 영상 --initial개만 처리한다 (과거 영상 전체를 분석하지 않도록)
+- 그 뒤로는 한 번에 --max-new개까지만 처리하고, 한도를 넘은 새 영상은 밀린 영상(pending)으로 기록해
+  다음 동기화 때 이어서 처리한다 (기준점 사이의 영상이 빠지지 않도록)
+- 분석에 실패한 영상은 다음 동기화 때 최대 MAX_ATTEMPTS회까지 다시 시도한다
+
+사용법:
+    python sync.py sources.txt
+    python sync.py sources.txt --initial 3 --dry-run
+"""
+import argparse
+import contextlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from urllib.parse import urlparse, parse_qs
+from cache import CACHE_DIR
+from batch import DEFAULT_CONCURRENCY, read_urls, run_batch
+
+CHANNEL = 'channel'
+PLAYLIST = 'playlist'
+
+# 처음 동기화하는 채널에서 가져올 최신 영상 수
+DEFAULT_INITIAL_VIDEOS = 5
+# 채널 하나에서 한 번에 가져올 최대 새 영상 수 (오래 동기화하지 않았을 때 폭주 방지)
+DEFAULT_MAX_NEW = 50
+# 실패한 영상 재시도 횟수
+MAX_ATTEMPTS = 3
+
+DONE = 'done'
+FAILED = 'failed'
+# 처음 동기화할 때 한도를 넘어서 처리하지 않고 넘긴 과거 영상
+SKIPPED = 'skipped'
+# 한도(max_new)를 넘어 다음 동기화로 미룬 새 영상
+PENDING = 'pending'
+
+# 채널 URL (@핸들, /channel/ID, /c/이름, /user/이름, 뒤에 탭이 붙을 수 있음)
+CHANNEL_PATH_PATTERN = re.compile(r'^/(@[^/]+|channel/[^/]+|c/[^/]+|user/[^/]+)(?:/(videos|streams|shorts))?/?$')
+
+def classify_source(url):
+    """
+    소스 URL 종류 판별 및 정규화
+    반환값: (CHANNEL | PLAYLIST, 정규화된 URL) 또는 지원하지 않는 URL이면 None
+    """
+    parsed = urlparse(url)
+    if 'youtube.com' not in parsed.netloc:
+        return None
+    playlist_id = parse_qs(parsed.query).get('list', [None])[0]
+    if playlist_id:
+        # 채널 업로드 재생목록(UU...)은 최신순이므로 채널처럼 처리
+        kind = CHANNEL if playlist_id.startswith('UU') else PLAYLIST
+        return kind, f"https://www.youtube.com/playlist?list={playlist_id}"
+    match = CHANNEL_PATH_PATTERN.match(parsed.path)
+    if match:
+        # 채널 홈은 여러 탭으로 나뉘므로 탭이 없으면 업로드 목록(최신순) 탭을 사용
+        return CHANNEL, f"https://www.youtube.com/{match.group(1)}/{match.group(2) or 'videos'}"
+    return None
+
+def iter_flat_entries(source_url):
+    """
+    yt_dlp flat 추출로 소스의 영상 목록을 순서대로 yield (영상별 상세 조회 없음)
+    목록은 필요한 만큼만 페이지 단위로 가져오므로, 중간에 멈추면 남은 페이지는 요청하지 않는다.
+    """
+    import yt_dlp
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+        'extract_flat': True,
+        'lazy_playlist': True,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(source_url, download=False, process=False)
+        for entry in info.get('entries') or []:
+            if not entry or not entry.get('id'):
+                continue
+            # 채널 탭 안에 다시 재생목록(탭)이 오는 경우는 건너뜀
+            if entry.get('ie_key') not in (None, 'Youtube'):
+                continue
+            yield {
+                'video_id': entry['id'],
+                'title': entry.get('title'),
+                'upload_date': entry.get('upload_date'),
+            }
+
+class SyncState:
+    """소스별 동기화 기준점(watermark)과 처리한 영상 목록 (스레드 안전)"""
+
+    def __init__(self, path):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sources ("
+            " source_url TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " last_video_id TEXT,"
+            " last_upload_date TEXT,"
+            " synced_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS videos ("
+            " source_url TEXT NOT NULL,"
+            " video_id TEXT NOT NULL,"
+            " status TEXT NOT NULL,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " updated_at REAL NOT NULL,"
+            " PRIMARY KEY (source_url, video_id))"
+        )
+
+    def watermark(self, source_url):
+        """마지막 동기화 기준점 (last_video_id, last_upload_date, synced_at) 또는 None"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_video_id, last_upload_date, synced_at FROM sources WHERE source_url = ?", (source_url,)
+            ).fetchone()
+        return tuple(row) if row else None
+
+    def known_videos(self, source_url):
+        """이 소스에서 이미 처리(또는 시도)한 video_id 집합"""
+        with self._lock:
+            rows = self._conn.execute("SELECT video_id FROM videos WHERE source_url = ?", (source_url,)).fetchall()
+        return {row[0] for row in rows}
+
+    def retryable(self, source_url):
+        """다시 시도할 실패 영상 목록"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT video_id FROM videos WHERE source_url = ? AND status = ? AND attempts < ?",
+                (source_url, FAILED, MAX_ATTEMPTS)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def pending(self, source_url):
+        """다음 동기화로 미룬 영상 목록 (기록한 순서, 최신 영상부터)"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT video_id FROM videos WHERE source_url = ? AND status = ? ORDER BY rowid",
+                (source_url, PENDING)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def record_pending(self, source_url, video_id):
+        """밀린 영상 기록 (처리 시도 횟수에는 넣지 않음, 이미 기록된 영상은 그대로 둠)"""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO videos (source_url, video_id, status, attempts, updated_at) VALUES (?, ?, ?, 0, ?)",
+                (source_url, video_id, PENDING, time.time())
+            )
+
+    def record_video(self, source_url, video_id, status):
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO videos (source_url, video_id, status, attempts, updated_at) VALUES (?, ?, ?, 1, ?)"
+                " ON CONFLICT (source_url, video_id) DO UPDATE SET"
+                " status = excluded.status, attempts = videos.attempts + 1, updated_at = excluded.updated_at",
+                (source_url, video_id, status, time.time())
+            )
+
+    def update_watermark(self, source_url, kind, newest):
+        """동기화 기준점 갱신 (newest: 이번에 본 가장 최신 항목, 없으면 이전 값 유지)"""
+        previous = self.watermark(source_url)
+        last_video_id = newest['video_id'] if newest else (previous[0] if previous else None)
+        last_upload_date = (newest or {}).get('upload_date') or (previous[1] if previous else None)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (source_url, kind, last_video_id, last_upload_date, synced_at) VALUES (?, ?, ?, ?, ?)",
+                (source_url, kind, last_video_id, last_upload_date, time.time())
+            )
+
+def get_sync_state():
+    return SyncState(os.path.join(CACHE_DIR, 'sync_state.sqlite3'))
+
+def find_new_videos(state, source_url, kind, initial=DEFAULT_INITIAL_VIDEOS, max_new=DEFAULT_MAX_NEW, entries=None):
+    """
+    소스에서 새 영상 찾기
+    entries: 영상 목록 iterator (None이면 yt_dlp flat 추출)
+    반환값: (이번에 처리할 새 영상 목록, 이번에 본 첫 항목 또는 None,
+             처음 동기화라 건너뛴 과거 영상 목록, 한도를 넘어 다음 동기화로 미룰 영상 목록)
+    """
+    known = state.known_videos(source_url)
+    watermark = state.watermark(source_url)
+    first_sync = watermark is None
+    limit = initial if first_sync else max_new
+    entries = entries if entries is not None else iter_flat_entries(source_url)
+
+    new_videos = []
+    newest = None
+    for entry in entries:
+        if newest is None:
+            newest = entry
+        if entry['video_id'] in known or (kind == CHANNEL and not first_sync and entry['video_id'] == watermark[0]):
+            if kind == CHANNEL:
+                # 최신순 목록이므로 이미 본 영상(또는 지난 기준점)부터는 모두 처리한 영상
+                break
+            continue
+        new_videos.append(entry)
+        if kind == CHANNEL and first_sync and len(new_videos) >= limit:
+            # 처음 동기화할 때는 과거 영상을 더 보지 않음
+            break
+    skipped = []
+    backlog = []
+    if len(new_videos) > limit:
+        # 채널은 최신 영상부터, 재생목록은 보통 뒤쪽에 새 영상이 추가되므로 목록 끝에서 limit개만 처리
+        if kind == CHANNEL:
+            new_videos, rest = new_videos[:limit], new_videos[limit:]
+        else:
+            cut = len(new_videos) - limit
+            new_videos, rest = new_videos[cut:], new_videos[:cut]
+        # 처음 동기화할 때 넘긴 재생목록 영상은 건너뛴 영상, 그 뒤로는 다음 동기화에서 이어서 처리
+        if first_sync:
+            skipped = rest
+        else:
+            backlog = rest
+    return new_videos, newest, skipped, backlog
+
+def sync_sources(sources, output_dir="subtitles", language='ko', openai_api_key=None, notion_api_key=None,
+                 notion_database_id=None, concurrency=None, out=None, initial=DEFAULT_INITIAL_VIDEOS,
+                 max_new=DEFAULT_MAX_NEW, dry_run=False, state=None):
+    """
+    소스 목록을 동기화하고 새 영상만 run_batch로 처리
+    반환값: {'sources': n, 'new': n, 'retried': n, 'resumed': n, 'pending': n, 'skipped_sources': n,
+             'batch': run_batch 요약 또는 None}
+    resumed: 지난 동기화에서 미뤘다가 이번에 처리한 영상 수, pending: 아직 남은 밀린 영상 수
+    """
+    state = state or get_sync_state()
+    out = out or sys.stdout
+    queued = {}  # video_id → 소스 URL 목록
+    summary = {'sources': 0, 'new': 0, 'retried': 0, 'resumed': 0, 'pending': 0, 'skipped_sources': 0, 'batch': None}
+    newest_by_source = {}
+
+    for source in sources:
+        classified = classify_source(source)
+        if not classified:
+            print(f"⚠️ 지원하지 않는 소스 URL입니다 (채널 또는 재생목록만 가능): {source}")
+            summary['skipped_sources'] += 1
+            continue
+        kind, source_url = classified
+        started = time.perf_counter()
+        try:
+            new_videos, newest, skipped, backlog = find_new_videos(state, source_url, kind, initial, max_new)
+        except Exception as e:
+            print(f"❌ 소스 목록 조회 실패: {source_url} ({e})")
+            summary['skipped_sources'] += 1
+            continue
+        retry = state.retryable(source_url)
+        # 지난번에 미룬 영상은 이번 한도에서 새 영상을 처리하고 남은 만큼 이어서 처리
+        pending = state.pending(source_url)
+        resumed = pending[:max(0, max_new - len(new_videos))]
+        remaining = len(pending) - len(resumed) + len(backlog)
+        summary['sources'] += 1
+        summary['new'] += len(new_videos)
+        summary['retried'] += len(retry)
+        summary['resumed'] += len(resumed)
+        summary['pending'] += remaining
+        newest_by_source[source_url] = (kind, newest)
+        print(
+            f"📡 {source_url}: 새 영상 {len(new_videos)}개, 이어서 처리 {len(resumed)}개, 재시도 {len(retry)}개, "
+            f"다음으로 미룸 {remaining}개, 건너뜀 {len(skipped)}개 ({time.perf_counter() - started:.1f}초)"
+        )
+        if not dry_run:
+            for entry in skipped:
+                state.record_video(source_url, entry['video_id'], SKIPPED)
+            for entry in backlog:
+                state.record_pending(source_url, entry['video_id'])
+
+        for video_id in [entry['video_id'] for entry in new_videos] + resumed + retry:
+            queued.setdefault(video_id, []).append(source_url)
+
+    if dry_run:
+        for video_id, source_urls in queued.items():
+            out.write(json.dumps({'video_id': video_id, 'url': f"https://www.youtube.com/watch?v={video_id}", 'sources': source_urls, 'status': 'pending'}, ensure_ascii=False) + "\n")
+        return summary
+
+    # run_batch가 내보내는 결과 줄을 가로채서 영상별 성공/실패를 기록
+    class RecordingOut:
+        def write(self, line):
+            out.write(line)
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return
+            for source_url in queued.get(record.get('video_id'), []):
+                state.record_video(source_url, record['video_id'], DONE if record.get('status') == 'ok' else FAILED)
+
+        def flush(self):
+            out.flush()
+
+    if queued:
+        urls = [f"https://www.youtube.com/watch?v={video_id}" for video_id in queued]
+        summary['batch'] = run_batch(urls, output_dir, language, openai_api_key, notion_api_key,
+                                     notion_database_id, concurrency=concurrency, out=RecordingOut())
+
+    # 영상 처리 결과와 관계없이 목록 조회가 끝난 소스는 기준점을 갱신 (실패 영상은 재시도 목록으로 관리)
+    for source_url, (kind, newest) in newest_by_source.items():
+        state.update_watermark(source_url, kind, newest)
+    return summary
+
+def main():
+    """동기화 모드 메인 함수"""
+    parser = argparse.ArgumentParser(description="채널/재생목록의 새 영상만 자막 다운로드 + AI 분석 + Notion 저장")
+    parser.add_argument('source', help="채널/재생목록 URL 목록 파일 경로 (표준입력은 '-')")
+    parser.add_argument('--output-dir', default="subtitles", help="자막/분석 파일 저장 디렉토리")
+    parser.add_argument('--language', default='ko', help="우선 자막 언어")
+    parser.add_argument('--initial', type=int, default=DEFAULT_INITIAL_VIDEOS, help="처음 동기화하는 소스에서 처리할 최신 영상 수")
+    parser.add_argument('--max-new', type=int, default=DEFAULT_MAX_NEW, help="소스 하나에서 한 번에 처리할 최대 새 영상 수 (넘는 영상은 다음 동기화 때 처리)")
+    parser.add_argument('--dry-run', action='store_true', help="새 영상 목록만 출력하고 처리하지 않음")
+    for stage, n in DEFAULT_CONCURRENCY.items():
+        parser.add_argument(f'--{stage}', type=int, default=n, help=f"{stage} 단계 동시 실행 수 (기본값: {n})")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    sources = read_urls(args.source)
+    concurrency = {stage: getattr(args, stage) for stage in DEFAULT_CONCURRENCY}
+
+    # NDJSON은 표준출력으로, 진행 메시지는 표준에러로 분리
+    out = sys.stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        summary = sync_sources(
+            sources,
+            args.output_dir,
+            args.language,
+            os.getenv('OPENAI_API_KEY'),
+            os.getenv('NOTION_API_KEY'),
+            os.getenv('NOTION_DATABASE_ID'),
+            concurrency=concurrency,
+            out=out,
+            initial=args.initial,
+            max_new=args.max_new,
+            dry_run=args.dry_run
+        )
+
+    print(
+        f"✅ 동기화 완료: 소스 {summary['sources']}개, 새 영상 {summary['new']}개, 이어서 처리 {summary['resumed']}개, "
+        f"재시도 {summary['retried']}개, 남은 밀린 영상 {summary['pending']}개, 건너뛴 소스 {summary['skipped_sources']}개",
+        file=sys.stderr
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""
+테스트 공통 설정
+
+- 캐시/색인은 임시 디렉토리에 만든다 (cache 모듈을 import하기 전에 YOUNOTION_CACHE_DIR 설정)
+- fake_services: benchmarks/fakes.py의 가짜 외부 서비스를 설치 (지연 없음, 서비스별 설정은 인자로 덮어씀)
+"""
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+os.environ['YOUNOTION_CACHE_DIR'] = tempfile.mkdtemp(prefix='younotion-test-')
+os.environ.pop('YOUTUBE_API_KEY', None)
+
+NO_LATENCY = {'latency': 0.0, 'jitter': 0.0}
+
+@pytest.fixture
+def fake_services():
+    """fake_services(config) → FakeServices (테스트가 끝나면 원래 모듈로 되돌림)"""
+    from fakes import DEFAULT_FAKE_CONFIG, FakeServices, install
+    import clients
+    installed = []
+
+    def setup(config=None):
+        merged = {name: dict(NO_LATENCY) for name in DEFAULT_FAKE_CONFIG}
+        for name, overrides in (config or {}).items():
+            merged[name].update(overrides)
+        services = FakeServices(merged)
+        # 이전 테스트의 가짜 모듈로 만든 클라이언트를 재사용하지 않도록 비움
+        clients._clients.clear()
+        getattr(clients._thread_local, 'clients', {}).clear()
+        installed.append(install(services))
+        return services
+
+    yield setup
+    for uninstall in installed:
+        uninstall()
+    clients._clients.clear()
@@ -0,0 +1,85 @@
+"""
+batch.run_batch 테스트
+
+가짜 외부 서비스로 배치를 돌려, 단계 중간이나 Notion 저장 콜백에서 예외가 나도
+영상마다 결과 한 줄(ok 또는 failed)이 나오고 run_batch가 끝나는지 확인한다.
+"""
+import io
+import json
+import threading
+
+import pytest
+
+import batch
+
+def video_urls(prefix, count):
+    return [f"https://www.youtube.com/watch?v={prefix}{i:04d}" for i in range(count)]
+
+def run_with_timeout(urls, tmp_path, timeout=30):
+    """run_batch를 별도 스레드에서 실행 (끝나지 않으면 테스트 실패)"""
+    out = io.StringIO()
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(summary=batch.run_batch(
+        urls, str(tmp_path), 'ko', 'sk-test', 'secret-test', 'db-test',
+        concurrency={'metadata': 2, 'transcript': 2, 'analysis': 2, 'notion': 1}, out=out
+    )), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "run_batch가 끝나지 않음"
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    return result['summary'], records
+
+class RaisingIndex:
+    """set_analysis에서 예외를 내는 중복 색인 (잠긴 SQLite 흉내)"""
+
+    def __init__(self, real, on_notion_only):
+        self._real = real
+        self._on_notion_only = on_notion_only
+
+    def __getattr__(self, name):
+        return getattr(self._real, name)
+
+    def set_analysis(self, video_id, analysis_path=None, notion_url=None):
+        if notion_url or not self._on_notion_only:
+            raise RuntimeError("database is locked")
+        return self._real.set_analysis(video_id, analysis_path, notion_url)
+
+def test_batch_processes_every_video(fake_services, tmp_path):
+    fake_services()
+    summary, records = run_with_timeout(video_urls('batchok', 3) + ["https://example.com/x"], tmp_path)
+    assert summary == {'total': 4, 'ok': 3, 'failed': 0, 'invalid': 1}
+    assert sorted(record['status'] for record in records) == ['invalid', 'ok', 'ok', 'ok']
+    assert all(record['notion_url'] for record in records if record['status'] == 'ok')
+
+@pytest.mark.parametrize('on_notion_only, stage', [(False, 'analysis'), (True, 'notion')])
+def test_index_error_fails_record_instead_of_hanging(fake_services, tmp_path, monkeypatch, on_notion_only, stage):
+    fake_services()
+    real = batch.get_duplicate_index()
+    monkeypatch.setattr(batch, 'get_duplicate_index', lambda: RaisingIndex(real, on_notion_only))
+
+    summary, records = run_with_timeout(video_urls(f'batch{stage[:3]}', 3), tmp_path)
+    assert summary['failed'] == 3 and summary['ok'] == 0
+    assert len(records) == 3
+    assert {record['stage'] for record in records} == {stage}
+    assert all("database is locked" in record['error'] for record in records)
+
+def test_notion_metrics_error_fails_record(fake_services, tmp_path, monkeypatch):
+    fake_services()
+
+    record_stage = batch.metrics.record_stage
+
+    def broken(stage, *args, **kwargs):
+        if stage == 'notion':
+            raise RuntimeError("metrics down")
+        return record_stage(stage, *args, **kwargs)
+    monkeypatch.setattr(batch.metrics, 'record_stage', broken)
+
+    summary, records = run_with_timeout(video_urls('batchmet', 2), tmp_path)
+    assert summary['failed'] == 2
+    assert [record['stage'] for record in records] == ['notion', 'notion']
+
+def test_notion_failure_is_reported(fake_services, tmp_path):
+    fake_services({'notion': {'error_rate': 1.0, 'error_status': 400}})
+    summary, records = run_with_timeout(video_urls('batchntn', 2), tmp_path)
+    assert summary['failed'] == 2
+    assert all(record['stage'] == 'notion' for record in records)
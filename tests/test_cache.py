@@ -0,0 +1,101 @@
+"""
+cache.DiskCache / MemoryCache 테스트
+
+시각을 바꿔 넣어 TTL 만료를 실제로 기다리지 않고 확인하고, 크기/항목 수 제한을 넘으면
+가장 오래 사용하지 않은 항목부터 지우는지(LRU) 확인한다.
+"""
+import json
+import types
+import zlib
+
+import pytest
+
+import cache
+from cache import DiskCache, MemoryCache
+
+class FakeTime:
+    def __init__(self):
+        self.now = 1000.0
+
+    def time(self):
+        return self.now
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeTime()
+    monkeypatch.setattr(cache, 'time', types.SimpleNamespace(time=clock.time))
+    return clock
+
+def blob_size(value):
+    return len(zlib.compress(json.dumps(value, ensure_ascii=False).encode('utf-8')))
+
+def test_disk_cache_round_trip_and_stats(tmp_path):
+    disk = DiskCache(str(tmp_path / 'cache.sqlite3'))
+    value = {'제목': "영상", 'tags': ["a", "b"], 'count': 3}
+    disk.set('key', value)
+    assert disk.get('key') == value
+    assert disk.get('missing', 'default') == 'default'
+    disk.delete('key')
+    assert disk.get('key') is None
+    assert disk.stats()['hits'] == 1
+    assert disk.stats()['misses'] == 2
+    assert disk.stats()['hit_rate'] == pytest.approx(1 / 3, abs=0.001)
+
+def test_disk_cache_ttl(tmp_path, clock):
+    disk = DiskCache(str(tmp_path / 'cache.sqlite3'), ttl=60)
+    disk.set('old', 1)
+    clock.now += 30
+    disk.set('new', 2)
+    # 조회해도 만료 시각은 늘어나지 않음 (생성 시각 기준)
+    assert disk.get('old') == 1
+    clock.now += 31
+    assert disk.get('old') is None
+    assert disk.get('new') == 2
+    # 저장할 때 만료된 항목도 함께 정리
+    clock.now += 60
+    disk.set('newest', 3)
+    assert disk.stats()['entries'] == 1
+
+def test_disk_cache_lru_eviction(tmp_path, clock):
+    value = "x" * 200
+    disk = DiskCache(str(tmp_path / 'cache.sqlite3'), max_bytes=blob_size(value) * 2)
+    disk.set('a', value)
+    clock.now += 1
+    disk.set('b', value)
+    clock.now += 1
+    # a를 읽었으므로 b가 가장 오래 사용하지 않은 항목
+    disk.get('a')
+    clock.now += 1
+    disk.set('c', value)
+    assert disk.get('b') is None
+    assert disk.get('a') == disk.get('c') == value
+    assert disk.stats()['bytes'] <= blob_size(value) * 2
+
+def test_disk_cache_survives_reopen_and_prefix_cleanup(tmp_path):
+    path = str(tmp_path / 'cache.sqlite3')
+    disk = DiskCache(path)
+    disk.set('v2:a', 1)
+    disk.set('v1:b', 2)
+    disk.set('v1:c', 3)
+    reopened = DiskCache(path)
+    assert reopened.get('v1:b') == 2
+    assert reopened.delete_except_prefix('v2:') == 2
+    assert reopened.get('v2:a') == 1
+    reopened.clear()
+    assert reopened.stats()['entries'] == 0
+
+def test_memory_cache_ttl_and_lru(clock):
+    memory = MemoryCache(max_entries=2, ttl=10)
+    memory.set('a', 1)
+    memory.set('b', 2)
+    assert memory.get('a') == 1
+    memory.set('c', 3)
+    # 항목 수 제한: 가장 오래 사용하지 않은 b가 빠짐
+    assert memory.get('b') is None
+    assert memory.get('a') == 1 and memory.get('c') == 3
+
+    clock.now += 11
+    assert memory.get('a') is None
+    assert memory.stats()['entries'] == 1
+    memory.clear()
+    assert memory.stats()['entries'] == 0
@@ -0,0 +1,77 @@
+"""
+compactor.compact_transcript 테스트
+
+tests/fixtures의 한국어/영어 자동 생성 자막 예시로, 정해진 비음성 태그와 롤링 겹침, 군말은 지우고
+내용 단어(목록에 없는 괄호 내용, 단어로 쓰인 "어"/"음", 강조 반복)는 남기는지 확인한다.
+"""
+import os
+
+import pytest
+
+from compactor import compact_transcript, estimate_tokens
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+def fixture(name):
+    with open(os.path.join(FIXTURES, name), 'r', encoding='utf-8') as f:
+        return f.read()
+
+def test_korean_captions():
+    compacted, stats = compact_transcript(fixture('captions_ko.txt'))
+    assert compacted.splitlines() == [
+        "오늘은 서울의 오래된 시장을 둘러보려고 합니다 그 시장 입구에서 떡볶이를 파는 할머니를 만났어요.",
+        "그러니까 여기가 육십 년 된 가게예요.",
+        "정말 정말 맛있었어요.",
+        "\"어\"는 한국어 모음 글자이고 음 소리를 나타냅니다.",
+        "[자막 제공: 시장 사람들] 다음 주에도 또 올게요.",
+    ]
+    assert stats['removed_tags'] == 4          # [음악] [박수] (웃음) ♪♪
+    assert stats['removed_fillers'] == 3       # 음, 어, 어어
+    assert stats['removed_repeats'] == 1       # 그 그
+    assert stats['removed_overlap_words'] == 6
+    assert stats['compacted_tokens'] < stats['original_tokens']
+
+def test_english_captions():
+    compacted, stats = compact_transcript(fixture('captions_en.txt'))
+    assert compacted.splitlines() == [
+        "so today we're going to look at how sourdough starters work the key thing is wild yeast and bacteria.",
+        "it is very very important to feed it every day.",
+        "[Speaker 2] so-so results mean you need more flour.",
+        "that's it, thanks for watching.",
+    ]
+    assert stats['removed_tags'] == 4          # [Music] [Applause] (Laughter) [ Music ]
+    assert stats['removed_fillers'] == 4       # um uh mm hmm
+    assert stats['removed_repeats'] == 1       # the the
+
+@pytest.mark.parametrize('text', [
+    "[음악]", "[Music]", "[MUSIC]", "(박수)", "[ applause ]", "[웃음 소리]", "♪", "[Foreign]",
+])
+def test_listed_tags_are_removed(text):
+    compacted, stats = compact_transcript(f"앞 {text} 뒤")
+    assert compacted == "앞 뒤"
+    assert stats['removed_tags'] == 1
+
+@pytest.mark.parametrize('text', ["[1]", "[삼성전자]", "(주)", "[Verse 1]", "(see below)"])
+def test_other_brackets_are_kept(text):
+    compacted, stats = compact_transcript(f"앞 {text} 뒤")
+    assert compacted == f"앞 {text} 뒤"
+    assert stats['removed_tags'] == 0
+
+def test_ambiguous_fillers_need_a_pause_mark():
+    compacted, _ = compact_transcript("음 소리가 어 하고 났다\n음, 어... 그, 뭐였지")
+    assert compacted == "음 소리가 어 하고 났다 뭐였지"
+
+def test_duplicate_sentences_and_token_budget():
+    sentence = "이 문장은 중복 문장 제거 대상이 될 만큼 충분히 깁니다."
+    compacted, stats = compact_transcript("\n".join([sentence, "짧은 문장.", sentence, "짧은 문장."]))
+    assert compacted.splitlines() == [sentence, "짧은 문장.", "짧은 문장."]
+    assert stats['removed_sentences'] == 1
+
+    text = "\n".join(f"{i}번째 문장은 토큰 예산을 넘기려고 길게 씁니다." for i in range(200))
+    compacted, stats = compact_transcript(text, token_budget=500)
+    assert estimate_tokens(compacted) <= 500
+    lines = compacted.splitlines()
+    # 앞부분만 남기지 않고 영상 전체에서 고르게 남김
+    kept = [int(line.split("번째")[0]) for line in lines]
+    assert kept[0] < 20 and kept[-1] >= 180
+    assert stats['trimmed_sentences'] == 200 - len(lines)
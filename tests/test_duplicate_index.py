@@ -0,0 +1,84 @@
+"""
+duplicate_index.DuplicateIndex 조회 테스트
+
+재업로드(거의 같은 자막)와 긴 영상에서 잘라 낸 구간(포함 비율)은 찾고, 관계없는 자막과
+MIN_SHINGLES보다 짧은 자막은 찾지 않는지, 후보가 많아도 SQLite 변수 제한 안에서 조회하는지 확인한다.
+"""
+import random
+
+import pytest
+
+from duplicate_index import _QUERY_CHUNK, MIN_SHINGLES, SHINGLE_WORDS, DuplicateIndex, TranscriptSketch
+
+def transcript(seed, words=2000):
+    """seed마다 다른 단어열 (한 줄에 8단어)"""
+    rng = random.Random(seed)
+    tokens = [f"w{rng.randrange(100000)}" for _ in range(words)]
+    return "\n".join(" ".join(tokens[i:i + 8]) for i in range(0, len(tokens), 8))
+
+def edited(text, seed, changes=20):
+    """단어 몇 개만 바꾼 재업로드 자막"""
+    rng = random.Random(seed)
+    tokens = text.split(" ")
+    for _ in range(changes):
+        tokens[rng.randrange(len(tokens))] = f"x{rng.randrange(100000)}"
+    return " ".join(tokens)
+
+@pytest.fixture
+def index(tmp_path):
+    index = DuplicateIndex(str(tmp_path / 'duplicates.sqlite3'))
+    index.add('original', TranscriptSketch.from_text(transcript(1)), title="원본", video_url="https://youtu.be/original")
+    index.add('other', TranscriptSketch.from_text(transcript(2)), title="다른 영상")
+    return index
+
+def find_ids(index, text, **kwargs):
+    return {match['video_id']: match for match in index.find(TranscriptSketch.from_text(text), **kwargs)}
+
+def test_reupload_matches_as_duplicate(index):
+    matches = find_ids(index, edited(transcript(1), seed=3))
+    assert list(matches) == ['original']
+    assert matches['original']['kind'] == 'duplicate'
+    assert matches['original']['similarity'] >= 0.7
+    assert matches['original']['title'] == "원본"
+
+@pytest.mark.parametrize('start', [0, 333, 1111])
+def test_clip_matches_by_containment(index, start):
+    words = transcript(1).split()
+    clip = " ".join(words[start:start + 150])
+    matches = find_ids(index, clip)
+    assert list(matches) == ['original']
+    assert matches['original']['kind'] == 'clip'
+
+def test_unrelated_transcript_does_not_match(index):
+    assert find_ids(index, transcript(4)) == {}
+    assert find_ids(index, " ".join(transcript(5).split()[:150])) == {}
+
+def test_exclude_skips_the_video_itself(index):
+    assert find_ids(index, transcript(1), exclude='original') == {}
+
+def test_short_transcripts_are_not_sketched():
+    words = [f"w{i}" for i in range(MIN_SHINGLES + SHINGLE_WORDS - 1)]
+    assert TranscriptSketch.from_text(" ".join(words[:-1])) is None
+    assert TranscriptSketch.from_text(" ".join(words)) is not None
+
+def test_set_analysis_and_remove(index):
+    index.set_analysis('original', analysis_path="subtitles/original_analysis.md")
+    index.set_analysis('original', notion_url="https://notion.so/original")
+    match = find_ids(index, transcript(1))['original']
+    assert match['analysis_path'] == "subtitles/original_analysis.md"
+    assert match['notion_url'] == "https://notion.so/original"
+
+    index.remove('original')
+    assert find_ids(index, transcript(1)) == {}
+    assert index.stats()['videos'] == 1
+
+def test_many_candidates_are_queried_in_chunks(tmp_path):
+    index = DuplicateIndex(str(tmp_path / 'many.sqlite3'))
+    sketch = TranscriptSketch.from_text(transcript(6, words=60))
+    count = _QUERY_CHUNK * 2 + 1
+    for i in range(count):
+        index.add(f"mirror{i:04d}", sketch)
+
+    matches = index.find(sketch)
+    assert len(matches) == count
+    assert all(match['kind'] == 'duplicate' for match in matches)
@@ -0,0 +1,176 @@
+"""
+fetch_scheduler.FetchScheduler 상태 변화 테스트
+
+가짜 자막 서비스(benchmarks/fakes.py)에 실패를 주입하고, 시각/대기/난수를 바꿔 넣어
+AIMD 동시 실행 수, 프록시 쉬는 시간, 서킷 브레이커 열림/닫힘을 실제로 기다리지 않고 확인한다.
+
+사용법:
+    python -m pytest -q tests
+"""
+import os
+import random
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+from fakes import FakeServiceError, FakeServices, install
+from fetch_scheduler import (
+    BREAKER_COOLDOWN, BREAKER_THRESHOLD, DEFAULT_CONCURRENCY, PROXY_COOLDOWN,
+    CircuitBreaker, CircuitOpenError, FetchScheduler, PermanentError,
+)
+
+GOOD = "http://p1"
+BLOCKED = "http://p2"
+
+class FakeClock:
+    """sleep()을 부르면 그만큼 시각이 흐르는 시계"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+@pytest.fixture
+def transcript_api():
+    """지연 없는 가짜 자막 서비스 (blocked_proxies의 프록시는 항상 429)"""
+    services = FakeServices({
+        'transcript_list': {'latency': 0.0, 'jitter': 0.0, 'blocked_proxies': [BLOCKED]},
+    })
+    uninstall = install(services)
+    from youtube_transcript_api import YouTubeTranscriptApi
+    yield YouTubeTranscriptApi, services['transcript_list']
+    uninstall()
+
+def make_scheduler(clock, proxies, **kwargs):
+    return FetchScheduler(proxies=proxies, rng=random.Random(0), sleep=clock.sleep, clock=clock, **kwargs)
+
+def list_transcripts(api):
+    return lambda proxies: api.list_transcripts('abcdefghijk', proxies=proxies)
+
+def proxy_stats(scheduler):
+    return {item['proxy']: item for item in scheduler.pool.stats()}
+
+def test_blocked_proxy_cools_down_and_loses_health(transcript_api):
+    api, service = transcript_api
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, [GOOD, BLOCKED])
+
+    for _ in range(20):
+        scheduler.call(list_transcripts(api))
+    stats = proxy_stats(scheduler)
+    assert service.errors > 0
+    assert stats[BLOCKED]['cooling'] is True
+    assert stats[BLOCKED]['health'] < stats[GOOD]['health'] == 1.0
+
+    # 쉬는 시간이 지나면 다시 후보가 됨
+    clock.now += PROXY_COOLDOWN * 2 ** service.errors
+    assert proxy_stats(scheduler)[BLOCKED]['cooling'] is False
+
+def test_proxy_cooldown_doubles_on_consecutive_throttles(transcript_api):
+    api, _ = transcript_api
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, [BLOCKED], max_attempts=1, breaker=CircuitBreaker(threshold=100, clock=clock))
+
+    cooldowns = []
+    for _ in range(3):
+        with pytest.raises(FakeServiceError):
+            scheduler.call(list_transcripts(api))
+        _, wait = scheduler.pool.choose()
+        cooldowns.append(wait)
+        clock.now += wait
+    assert cooldowns == [PROXY_COOLDOWN, PROXY_COOLDOWN * 2, PROXY_COOLDOWN * 4]
+
+def test_concurrency_limit_halves_on_throttle_and_grows_on_success(transcript_api):
+    api, service = transcript_api
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, [BLOCKED], max_attempts=1, breaker=CircuitBreaker(threshold=100, clock=clock))
+    assert scheduler.limiter.limit == DEFAULT_CONCURRENCY
+
+    for expected in (DEFAULT_CONCURRENCY / 2, DEFAULT_CONCURRENCY / 4, 1.0, 1.0):
+        with pytest.raises(FakeServiceError):
+            scheduler.call(list_transcripts(api))
+        clock.now += 3600  # 프록시 쉬는 시간 건너뜀
+        assert scheduler.limiter.limit == expected
+
+    # 차단이 풀리면 성공할 때마다 1/limit씩 증가 (한 라운드에 1)
+    service.payload['blocked_proxies'] = []
+    scheduler.call(list_transcripts(api))
+    assert scheduler.limiter.limit == 2.0
+    scheduler.call(list_transcripts(api))
+    scheduler.call(list_transcripts(api))
+    assert scheduler.limiter.limit == pytest.approx(2.0 + 1 / 2.0 + 1 / 2.5)
+    assert scheduler.limiter.in_flight == 0
+
+def test_breaker_opens_half_opens_and_closes(transcript_api):
+    api, service = transcript_api
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, [BLOCKED], max_attempts=1)
+    call = list_transcripts(api)
+
+    for _ in range(BREAKER_THRESHOLD):
+        assert scheduler.breaker.state == 'closed'
+        with pytest.raises(FakeServiceError):
+            scheduler.call(call)
+    assert scheduler.breaker.state == 'open'
+    assert scheduler.breaker.opened == 1
+    assert scheduler.breaker.wait_time() == pytest.approx(BREAKER_COOLDOWN)
+
+    # 쉬는 동안 들어온 요청은 브레이커가 풀릴 때까지 기다렸다가 확인 요청이 됨 → 또 429면 쉬는 시간 두 배
+    calls_before = service.calls
+    with pytest.raises(FakeServiceError):
+        scheduler.call(call)
+    assert BREAKER_COOLDOWN in clock.slept
+    assert service.calls == calls_before + 1
+    assert scheduler.breaker.state == 'open'
+    assert scheduler.breaker.opened == 2
+    assert scheduler.breaker.cooldown == BREAKER_COOLDOWN * 2
+
+    # 쉬는 시간이 지나면 half-open, 확인 요청이 성공하면 닫히고 쉬는 시간도 처음으로
+    clock.now += scheduler.breaker.cooldown
+    assert scheduler.breaker.state == 'half-open'
+    service.payload['blocked_proxies'] = []
+    scheduler.call(call)
+    assert scheduler.breaker.state == 'closed'
+    assert scheduler.breaker.cooldown == BREAKER_COOLDOWN
+
+def test_long_breaker_wait_fails_fast(transcript_api):
+    api, _ = transcript_api
+    clock = FakeClock()
+    breaker = CircuitBreaker(threshold=1, cooldown=1000.0, clock=clock)
+    scheduler = make_scheduler(clock, [BLOCKED], max_attempts=1, breaker=breaker)
+
+    with pytest.raises(FakeServiceError):
+        scheduler.call(list_transcripts(api))
+    slept = list(clock.slept)
+    with pytest.raises(CircuitOpenError):
+        scheduler.call(list_transcripts(api))
+    assert clock.slept == slept
+
+def test_retries_transient_errors_with_backoff_but_not_permanent(transcript_api):
+    api, service = transcript_api
+    clock = FakeClock()
+    scheduler = make_scheduler(clock, [BLOCKED, GOOD])
+
+    # 차단된 프록시를 먼저 고르더라도 백오프 후 다른 프록시로 성공
+    for _ in range(10):
+        scheduler.call(list_transcripts(api))
+    assert service.errors > 0
+    assert all(delay >= 0 for delay in clock.slept)
+
+    calls = []
+    def missing(proxies):
+        calls.append(proxies)
+        raise PermanentError("자막 없음")
+    with pytest.raises(PermanentError):
+        scheduler.call(missing)
+    assert len(calls) == 1
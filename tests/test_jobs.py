@@ -0,0 +1,136 @@
+"""
+jobs 모듈 테스트 (FairSemaphore, JobManager single-flight, run_analysis_job)
+
+- FairSemaphore: 먼저 기다린 쪽부터 슬롯을 얻고, 대기 순번을 조회할 수 있는지
+- JobManager: 같은 작업 키는 실행 중인 작업 하나로 합치고, 실패한 작업만 다시 실행하는지
+- run_analysis_job: 가짜 외부 서비스로 끝까지 실행하고, GPT 스트림이 끊기면 자막은 남긴 채 FAILED인지
+"""
+import threading
+import time
+
+import pytest
+
+import jobs
+from jobs import DONE, FAILED, FairSemaphore, JobManager, job_key
+
+OPTIONS = {'priority': [('ko', False), ('en', True)]}
+API_KEYS = {'openai': 'sk-test', 'notion': 'secret-test', 'notion_db': 'db-test'}
+
+def wait_until(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "조건이 만족되지 않음"
+        time.sleep(0.005)
+
+def test_fair_semaphore_serves_waiters_in_order():
+    semaphore = FairSemaphore(1)
+    semaphore.acquire('holder')
+    order = []
+    threads = []
+    for owner in ('first', 'second', 'third'):
+        thread = threading.Thread(target=lambda owner=owner: (semaphore.acquire(owner), order.append(owner), semaphore.release()))
+        thread.start()
+        threads.append(thread)
+        # 다음 스레드는 앞 스레드가 대기열에 들어간 뒤에 시작
+        wait_until(lambda owner=owner: semaphore.position(owner) is not None)
+
+    assert [semaphore.position(owner) for owner in ('first', 'second', 'third')] == [1, 2, 3]
+    assert semaphore.position('holder') is None
+    semaphore.release()
+    for thread in threads:
+        thread.join(5)
+    assert order == ['first', 'second', 'third']
+
+def test_fair_semaphore_slot_releases_on_error():
+    semaphore = FairSemaphore(1)
+    with pytest.raises(RuntimeError):
+        with semaphore.slot('a'):
+            raise RuntimeError("실패")
+    with semaphore.slot('b'):
+        pass
+
+class BlockingRun:
+    """run_analysis_job 대신 실행되어, 풀어 줄 때까지 기다렸다가 정해진 상태로 끝나는 가짜 작업"""
+
+    def __init__(self, state=DONE):
+        self.state = state
+        self.calls = []
+        self.release = threading.Event()
+
+    def __call__(self, job, api_keys, gpt_gate=None):
+        self.calls.append(job)
+        job.state = jobs.RUNNING
+        self.release.wait(5)
+        job.state = self.state
+        job.finished_at = time.time()
+        return job
+
+def test_same_key_is_single_flight(monkeypatch):
+    run = BlockingRun()
+    monkeypatch.setattr(jobs, 'run_analysis_job', run)
+    manager = JobManager(workers=2)
+
+    first = manager.submit('jobsvideo01', 'https://youtu.be/jobsvideo01', OPTIONS, API_KEYS)
+    second = manager.submit('jobsvideo01', 'https://youtu.be/jobsvideo01', dict(OPTIONS), API_KEYS)
+    other = manager.submit('jobsvideo01', 'https://youtu.be/jobsvideo01', {'priority': [('en', True)]}, API_KEYS)
+    assert second is first
+    assert other is not first
+    assert manager.get(job_key('jobsvideo01', OPTIONS)) is first
+
+    run.release.set()
+    wait_until(lambda: first.state == DONE and other.state == DONE)
+    # 끝난 작업도 FINISHED_JOB_TTL 동안은 그대로 공유
+    assert manager.submit('jobsvideo01', 'https://youtu.be/jobsvideo01', OPTIONS, API_KEYS) is first
+    assert len(run.calls) == 2
+
+def test_failed_job_is_resubmitted(monkeypatch):
+    run = BlockingRun(state=FAILED)
+    run.release.set()
+    monkeypatch.setattr(jobs, 'run_analysis_job', run)
+    manager = JobManager(workers=1)
+
+    failed = manager.submit('jobsvideo02', 'https://youtu.be/jobsvideo02', OPTIONS, API_KEYS)
+    wait_until(lambda: failed.state == FAILED)
+    retried = manager.submit('jobsvideo02', 'https://youtu.be/jobsvideo02', OPTIONS, API_KEYS)
+    assert retried is not failed
+    wait_until(lambda: len(run.calls) == 2)
+
+def test_queue_position_and_finished_eviction(monkeypatch):
+    run = BlockingRun()
+    monkeypatch.setattr(jobs, 'run_analysis_job', run)
+    manager = JobManager(workers=1)
+
+    running = manager.submit('jobsvideo03', 'https://youtu.be/jobsvideo03', OPTIONS, API_KEYS)
+    wait_until(lambda: run.calls)
+    waiting = [manager.submit(f'jobsvideo1{i}', f'https://youtu.be/jobsvideo1{i}', OPTIONS, API_KEYS) for i in range(2)]
+    assert manager.queue_position(running) is None
+    assert [manager.queue_position(job) for job in waiting] == [1, 2]
+
+    run.release.set()
+    wait_until(lambda: all(job.state == DONE for job in waiting))
+    running.finished_at -= jobs.FINISHED_JOB_TTL + 1
+    assert manager.submit('jobsvideo03', 'https://youtu.be/jobsvideo03', OPTIONS, API_KEYS) is not running
+
+def test_run_analysis_job_end_to_end(fake_services):
+    fake_services()
+    job = jobs.AnalysisJob('jobsvideo04', 'https://www.youtube.com/watch?v=jobsvideo04', OPTIONS)
+    deltas = []
+    jobs.run_analysis_job(job, API_KEYS, on_delta=deltas.append)
+
+    assert job.state == DONE, job.error
+    assert job.stage is None
+    assert job.result['language'] == 'ko'
+    assert job.result['analysis_text'] == "".join(deltas)
+    assert job.result['notion_url']
+    assert any(level == 'success' for level, _ in job.notices)
+
+def test_interrupted_stream_fails_but_keeps_transcript(fake_services):
+    fake_services({'openai': {'stream_error_after': 3}})
+    job = jobs.AnalysisJob('jobsvideo05', 'https://www.youtube.com/watch?v=jobsvideo05', OPTIONS)
+    jobs.run_analysis_job(job, API_KEYS)
+
+    assert job.state == FAILED
+    assert "AI 분석에 실패" in job.error
+    assert job.result['analysis_text'] is None
+    assert job.result['notion_url'] is None
+    assert len(job.result['transcript']) > 0
@@ -0,0 +1,109 @@
+"""
+notion_index.NotionPageIndex 테스트
+
+가짜 databases.query로 처음에는 전체를 페이지 단위로 훑고, 이후에는 마지막으로 본 last_edited_time
+이후에 수정된 페이지만 가져오는지, 동기화 간격 안에서는 다시 조회하지 않는지 확인한다.
+"""
+import types
+
+import pytest
+
+import notion_index
+from notion_index import NotionPageIndex
+
+DATABASE = 'db-test'
+
+class FakeDatabase:
+    """last_edited_time 필터, 정렬, 커서 페이지 나누기를 흉내 내는 databases.query"""
+
+    def __init__(self, page_size=2):
+        self.pages = []
+        self.queries = []
+        self.page_size = page_size
+        self.databases = types.SimpleNamespace(query=self.query)
+
+    def add(self, video_id, edited, archived=False, url=None):
+        self.pages = [page for page in self.pages if page['id'] != f"page-{video_id}"]
+        self.pages.append({
+            'id': f"page-{video_id}",
+            'url': f"https://notion.so/page-{video_id}",
+            'last_edited_time': edited,
+            'archived': archived,
+            'properties': {'URL': {'url': url if url is not None else f"https://www.youtube.com/watch?v={video_id}"}},
+        })
+
+    def query(self, database_id, page_size=100, sorts=None, filter=None, start_cursor=None):
+        assert database_id == DATABASE
+        self.queries.append({'filter': filter, 'start_cursor': start_cursor})
+        pages = sorted(self.pages, key=lambda page: page['last_edited_time'])
+        if filter:
+            pages = [page for page in pages if page['last_edited_time'] >= filter['last_edited_time']['on_or_after']]
+        start = int(start_cursor or 0)
+        chunk = pages[start:start + self.page_size]
+        has_more = start + self.page_size < len(pages)
+        return {'results': chunk, 'has_more': has_more, 'next_cursor': str(start + self.page_size) if has_more else None}
+
+def video_id_for_url(url):
+    return url.split('v=')[1] if 'v=' in url else None
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=1000.0)
+    monkeypatch.setattr(notion_index, 'time', types.SimpleNamespace(time=lambda: clock.now))
+    return clock
+
+@pytest.fixture
+def index(tmp_path):
+    return NotionPageIndex(str(tmp_path / 'notion_index.sqlite3'))
+
+def test_first_sync_walks_every_page(index, clock):
+    notion = FakeDatabase()
+    for i in range(5):
+        notion.add(f"video{i}", f"2024-01-0{i + 1}T00:00:00.000Z")
+    notion.add('archived', "2024-01-06T00:00:00.000Z", archived=True)
+    notion.add('nourl', "2024-01-07T00:00:00.000Z", url="")
+
+    assert index.sync(notion, DATABASE, video_id_for_url) == 5
+    assert len(notion.queries) == 4
+    assert notion.queries[0]['filter'] is None
+    assert index.lookup(DATABASE, 'video3') == ('page-video3', "https://notion.so/page-video3")
+    assert index.lookup(DATABASE, 'archived') is None
+    assert index.lookup('other-db', 'video3') is None
+
+def test_later_syncs_fetch_only_edited_pages(index, clock):
+    notion = FakeDatabase()
+    for i in range(3):
+        notion.add(f"video{i}", f"2024-01-0{i + 1}T00:00:00.000Z")
+    index.sync(notion, DATABASE, video_id_for_url)
+
+    # 동기화 간격 안에서는 조회하지 않음
+    notion.add('video9', "2024-02-01T00:00:00.000Z")
+    clock.now += 10
+    queries = len(notion.queries)
+    assert index.sync(notion, DATABASE, video_id_for_url) == 0
+    assert len(notion.queries) == queries
+
+    clock.now += notion_index.DEFAULT_SYNC_INTERVAL
+    assert index.sync(notion, DATABASE, video_id_for_url) == 2  # 기준 시각과 같은 페이지도 다시 봄(on_or_after)
+    assert notion.queries[-1]['filter']['last_edited_time'] == {'on_or_after': "2024-01-03T00:00:00.000Z"}
+    assert index.lookup(DATABASE, 'video9') == ('page-video9', "https://notion.so/page-video9")
+
+def test_record_forget_and_writer(index, clock):
+    index.record(DATABASE, 'video1', 'page-1', "https://notion.so/1")
+    index.record(DATABASE, 'video1', 'page-2', "https://notion.so/2")
+    assert index.lookup(DATABASE, 'video1') == ('page-2', "https://notion.so/2")
+    index.forget(DATABASE, 'video1')
+    assert index.lookup(DATABASE, 'video1') is None
+
+    calls = []
+
+    class Writer:
+        def call(self, func, **kwargs):
+            calls.append(func)
+            return func(**kwargs)
+
+    notion = FakeDatabase()
+    notion.add('video2', "2024-01-01T00:00:00.000Z")
+    index.sync(notion, DATABASE, video_id_for_url, writer=Writer())
+    assert calls == [notion.databases.query]
+    assert index.lookup(DATABASE, 'video2')[0] == 'page-video2'
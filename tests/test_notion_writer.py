@@ -0,0 +1,45 @@
+"""
+notion_writer 텍스트 분할 테스트
+
+조각을 이어 붙이면 원문과 같고(줄바꿈 보존), 조각 수 제한을 넘으면 잘라내지 않고 오류를 내는지 확인한다.
+"""
+import pytest
+
+from notion_writer import (
+    NOTION_RICH_TEXT_MAX_ITEMS, NOTION_TEXT_LIMIT, split_text, to_paragraph_blocks, to_rich_text,
+)
+
+SAMPLES = [
+    "",
+    "짧은 텍스트",
+    "가" * (NOTION_TEXT_LIMIT * 2 + 7),
+    "\n".join(f"{i}번째 줄입니다." for i in range(1000)),
+    ("문단\n\n" + "나" * (NOTION_TEXT_LIMIT - 3) + "\n\n\n") * 5,
+    "\n" * (NOTION_TEXT_LIMIT + 1),
+]
+
+@pytest.mark.parametrize('text', SAMPLES)
+def test_split_text_round_trip(text):
+    chunks = split_text(text)
+    assert "".join(chunks) == text
+    assert all(0 < len(chunk) <= NOTION_TEXT_LIMIT for chunk in chunks)
+
+def test_split_text_cuts_after_newline():
+    text = "a" * 10 + "\n" + "b" * 10
+    assert split_text(text, limit=15) == ["a" * 10 + "\n", "b" * 10]
+
+def test_paragraph_blocks_drop_only_the_cut_newline():
+    # 블록 경계가 줄바꿈 하나를 대신하므로 빈 줄(두 번째 줄바꿈)은 남음
+    text = "a" * (NOTION_TEXT_LIMIT - 10) + "\n\n" + "b" * 20
+    contents = [block['paragraph']['rich_text'][0]['text']['content'] for block in to_paragraph_blocks(text)]
+    assert contents == ["a" * (NOTION_TEXT_LIMIT - 10) + "\n", "b" * 20]
+
+def test_rich_text_keeps_everything_up_to_the_item_limit():
+    text = "다" * (NOTION_TEXT_LIMIT * NOTION_RICH_TEXT_MAX_ITEMS)
+    items = to_rich_text(text)
+    assert len(items) == NOTION_RICH_TEXT_MAX_ITEMS
+    assert "".join(item['text']['content'] for item in items) == text
+
+def test_rich_text_over_item_limit_raises_instead_of_truncating():
+    with pytest.raises(ValueError):
+        to_rich_text("다" * (NOTION_TEXT_LIMIT * NOTION_RICH_TEXT_MAX_ITEMS + 1))
@@ -0,0 +1,71 @@
+"""
+main.resolve_transcript 캐시 선택 테스트
+
+저장된 자막이 있더라도 우선순위가 더 높은 자막이 제공되면 그 자막을 고르는지,
+제공 자막 목록을 캐시한 뒤에는 네트워크 요청 없이 같은 선택을 하는지 확인한다.
+(가짜 자막 서비스는 ko 수동 자막과 en 자동 생성 자막을 제공)
+"""
+import main
+
+KO = ('ko', False)
+EN_AUTO = ('en', True)
+
+def resolve(video_id, priority, translate_to=None):
+    transcript, language, is_generated = main.resolve_transcript(
+        video_id, priority=priority, translate_to=translate_to, log=lambda message: None
+    )
+    return transcript, (language, is_generated)
+
+def seed(video_id, language, is_generated, text):
+    main.get_transcript_cache().set_transcript(
+        video_id, language, is_generated, [{'text': text, 'start': 0.0, 'duration': 1.0}]
+    )
+
+def test_lower_priority_cache_does_not_hide_upstream_track(fake_services):
+    services = fake_services()
+    seed('resolvepri1', 'en', True, "cached english")
+
+    transcript, selected = resolve('resolvepri1', [KO, EN_AUTO])
+    assert selected == KO
+    assert transcript[0]['text'] != "cached english"
+    assert services['transcript_list'].calls == 1
+
+def test_cached_listing_selects_without_network(fake_services):
+    services = fake_services()
+    resolve('resolvepri2', [KO, EN_AUTO])
+    resolve('resolvepri2', [EN_AUTO, KO])
+    calls = services['transcript_list'].calls
+
+    # 목록과 두 자막이 모두 캐시되어 있으면 우선순위대로 골라 요청 없이 반환
+    _, selected = resolve('resolvepri2', [KO, EN_AUTO])
+    assert selected == KO
+    _, selected = resolve('resolvepri2', [EN_AUTO, KO])
+    assert selected == EN_AUTO
+    assert services['transcript_list'].calls == calls
+
+def test_highest_priority_cache_hit_needs_no_listing(fake_services):
+    services = fake_services()
+    seed('resolvepri3', 'ko', False, "cached korean")
+
+    transcript, selected = resolve('resolvepri3', [KO, EN_AUTO])
+    assert selected == KO
+    assert transcript[0]['text'] == "cached korean"
+    assert services['transcript_list'].calls == 0
+
+def test_translation_cache_used_only_when_no_listed_track_matches(fake_services):
+    services = fake_services()
+    seed('resolvepri4', main._translated_language('en'), False, "cached translation")
+
+    # 목록을 모르면 번역 자막 캐시보다 목록 조회가 먼저 (ja 자막이 새로 올라왔을 수 있음)
+    transcript, selected = resolve('resolvepri4', [('ja', False)], translate_to='en')
+    assert selected == ('en', False)
+    assert transcript[0]['text'] != "cached translation"
+    assert services['transcript_list'].calls == 1
+
+    # 목록에 우선순위 자막이 없으면 저장된 번역 자막을 요청 없이 사용
+    resolve('resolvepri4', [('ja', False)], translate_to='en')
+    assert services['transcript_list'].calls == 1
+
+    # 제공되는 자막이 우선순위에 있으면 번역 자막보다 그 자막
+    _, selected = resolve('resolvepri4', [('ja', False), EN_AUTO], translate_to='en')
+    assert selected == EN_AUTO
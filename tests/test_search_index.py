@@ -0,0 +1,102 @@
+"""
+search_index.SearchIndex 테스트
+
+trigram FTS5 검색(bm25 순위, 구문, 모든 단어 포함), 3글자 미만 검색어의 LIKE 대체 검색,
+unicode61 토크나이저 대체, 디렉토리 동기화(바뀐 파일만 색인, 사라진 파일 제거)를 확인한다.
+"""
+import os
+
+import pytest
+
+import search_index
+from search_index import ANALYSIS, HIGHLIGHT_END, HIGHLIGHT_START, TRANSCRIPT, SearchIndex, build_match_query
+
+@pytest.fixture
+def index(tmp_path):
+    index = SearchIndex(str(tmp_path / 'search.sqlite3'))
+    index.add('aaaaaaaaaaa', TRANSCRIPT, "인공지능 입문", "테크 채널", "오늘은 딥 러닝과 인공지능의 역사를 알아봅니다.")
+    index.add('bbbbbbbbbbb', TRANSCRIPT, "서울 맛집 탐방", "먹방 채널", "시장에서 인공지능 로봇이 떡볶이를 팔아요.")
+    index.add('bbbbbbbbbbb', ANALYSIS, "서울 맛집 탐방", "먹방 채널", "## 요약\n서울 시장 음식 리뷰")
+    return index
+
+def ids(results):
+    return [(result['video_id'], result['kind']) for result in results]
+
+def test_build_match_query():
+    assert build_match_query('인공지능 "딥 러닝"') == '"인공지능" "딥 러닝"'
+    # 짝이 맞지 않는 따옴표는 FTS5 문법 오류가 나지 않도록 이스케이프
+    assert build_match_query('a"b') == '"a""b"'
+    assert build_match_query('   ') == ""
+
+def test_fts_search_ranks_title_matches_first(index):
+    assert index.tokenizer == 'trigram'
+    results = index.search("인공지능")
+    assert ids(results) == [('aaaaaaaaaaa', TRANSCRIPT), ('bbbbbbbbbbb', TRANSCRIPT)]
+    assert HIGHLIGHT_START in results[0]['snippet'] and HIGHLIGHT_END in results[0]['snippet']
+    assert results[0]['url'] == "https://www.youtube.com/watch?v=aaaaaaaaaaa"
+
+def test_fts_search_requires_every_term_and_phrase(index):
+    assert ids(index.search("인공지능 떡볶이")) == [('bbbbbbbbbbb', TRANSCRIPT)]
+    assert ids(index.search('"딥 러닝"')) == [('aaaaaaaaaaa', TRANSCRIPT)]
+    assert index.search('"러닝 딥"') == []
+    assert index.search("") == []
+
+def test_kind_filter_and_update(index):
+    assert ids(index.search("맛집", kind=ANALYSIS)) == [('bbbbbbbbbbb', ANALYSIS)]
+    index.add('bbbbbbbbbbb', ANALYSIS, "서울 맛집 탐방", "먹방 채널", "새로 쓴 리포트")
+    assert index.search("음식 리뷰") == []
+    assert ids(index.search("새로 쓴 리포트")) == [('bbbbbbbbbbb', ANALYSIS)]
+    index.remove('bbbbbbbbbbb', ANALYSIS)
+    assert index.stats() == {'tokenizer': 'trigram', TRANSCRIPT: 2}
+
+def test_short_terms_fall_back_to_like(index):
+    # trigram은 3글자 미만 단어를 찾지 못하므로 LIKE 검색 (제목 일치 우선)
+    results = index.search("서울")
+    assert ids(results)[0][0] == 'bbbbbbbbbbb'
+    assert {kind for _, kind in ids(results)} == {TRANSCRIPT, ANALYSIS}
+    assert ids(index.search("서울 리뷰")) == [('bbbbbbbbbbb', ANALYSIS)]
+    assert ids(index.search("딥", kind=TRANSCRIPT)) == [('aaaaaaaaaaa', TRANSCRIPT)]
+    assert f"{HIGHLIGHT_START}딥{HIGHLIGHT_END}" in index.search("딥")[0]['snippet']
+    # LIKE 특수 문자는 그대로 검색
+    assert index.search("%") == []
+
+def test_unicode61_fallback(tmp_path, monkeypatch):
+    monkeypatch.setattr(search_index, '_fts_tokenizer', lambda conn: 'unicode61')
+    path = str(tmp_path / 'unicode61.sqlite3')
+    index = SearchIndex(path)
+    index.add('ccccccccccc', TRANSCRIPT, "Deep learning intro", "AI channel", "We train a neural network.")
+    assert index.tokenizer == 'unicode61'
+    # unicode61은 짧은 단어도 FTS로 검색
+    assert ids(index.search("AI")) == [('ccccccccccc', TRANSCRIPT)]
+    assert ids(index.search('"neural network"')) == [('ccccccccccc', TRANSCRIPT)]
+    # 다시 열면 만들 때의 토크나이저를 그대로 사용
+    monkeypatch.setattr(search_index, '_fts_tokenizer', lambda conn: 'trigram')
+    assert SearchIndex(path).tokenizer == 'unicode61'
+
+def test_sync_directory_indexes_changed_files_only(tmp_path):
+    index = SearchIndex(str(tmp_path / 'search.sqlite3'))
+    directory = tmp_path / 'subtitles'
+    directory.mkdir()
+    transcript = directory / "파이썬_강좌_코딩채널_ddddddddddd_trans.txt"
+    analysis = directory / "파이썬_강좌_ddddddddddd_analysis.txt"
+    transcript.write_text("제너레이터와 이터레이터 설명", encoding='utf-8')
+    analysis.write_text("## 요약\n제너레이터 정리", encoding='utf-8')
+    (directory / "notes.txt").write_text("색인하지 않는 파일", encoding='utf-8')
+
+    titles = {'ddddddddddd': ("파이썬 강좌", "코딩채널")}
+    assert index.sync_directory(str(directory), max_age=0, title_for=titles.get) == 2
+    results = index.search("제너레이터")
+    assert {result['kind'] for result in results} == {TRANSCRIPT, ANALYSIS}
+    assert results[0]['title'] == "파이썬 강좌"
+    assert results[0]['path'].startswith(str(directory))
+
+    # 동기화 간격 안이면 훑지 않고, 바뀌지 않은 파일은 다시 색인하지 않음
+    assert index.sync_directory(str(directory)) == 0
+    assert index.sync_directory(str(directory), max_age=0) == 0
+
+    transcript.write_text("코루틴 설명으로 바뀜", encoding='utf-8')
+    os.utime(transcript, (1, 1))
+    analysis.unlink()
+    assert index.sync_directory(str(directory), max_age=0) == 1
+    assert ids(index.search("코루틴")) == [('ddddddddddd', TRANSCRIPT)]
+    assert index.search("제너레이터") == []
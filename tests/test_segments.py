@@ -0,0 +1,102 @@
+"""
+segments 열 단위 자막 저장소 테스트
+
+.seg 파일로 저장했다가 mmap으로 다시 열어도 항목이 같은지, 앞 항목이 길게 이어지는 자막에서도
+구간 조회가 진행 중인 항목을 찾는지, 저장소의 TTL/크기 제한과 close()가 동작하는지 확인한다.
+"""
+import os
+import time
+
+import pytest
+
+from segments import BLOCK_SEGMENTS, SegmentStore, TranscriptSegments, parse_timestamp
+
+def items(count, step=2.0):
+    return [{'text': f"{i}번째 자막 항목 ✓", 'start': i * step, 'duration': step} for i in range(count)]
+
+@pytest.mark.parametrize('count', [0, 1, BLOCK_SEGMENTS, BLOCK_SEGMENTS * 3 + 5])
+def test_seg_file_round_trip(tmp_path, count):
+    original = items(count)
+    path = TranscriptSegments.from_transcript(original).save(str(tmp_path / 'video.ko.0.seg'))
+
+    with TranscriptSegments.open(path) as segments:
+        assert len(segments) == count
+        assert segments.to_list() == original
+        assert segments == original
+        assert segments.plain_text() == "\n".join(item['text'] for item in original)
+        if count:
+            assert segments[-1] == original[-1]
+    assert segments.closed
+
+def test_from_bytes_rejects_other_formats():
+    with pytest.raises(ValueError):
+        TranscriptSegments.from_bytes(b"not a segment file")
+
+def test_index_range_uses_binary_search_boundaries():
+    segments = TranscriptSegments.from_transcript(items(1000))
+    # 3.0초에는 1번 항목(2~4초)이 진행 중, 10초 시작 항목은 제외
+    assert segments.index_range(3.0, 10.0) == (1, 5)
+    assert segments.index_range(4.0, 4.0) == (2, 2)
+    assert segments.text_between(3.0, 8.0) == "\n".join(f"{i}번째 자막 항목 ✓" for i in range(1, 4))
+    assert segments.index_range(5000.0, 6000.0) == (1000, 1000)
+
+def test_range_finds_long_segment_that_started_earlier():
+    segments = TranscriptSegments.from_transcript([
+        {'text': "긴 노래 가사", 'start': 0.0, 'duration': 100.0},
+        {'text': "짧은 말", 'start': 10.0, 'duration': 1.0},
+        {'text': "다른 말", 'start': 20.0, 'duration': 1.0},
+        {'text': "마지막", 'start': 60.0, 'duration': 5.0},
+    ])
+    # 50초에는 0번 항목이 아직 진행 중 (바로 앞 항목만 보면 놓침)
+    first, last = segments.index_range(50.0, 70.0)
+    assert (first, last) == (0, 4)
+    assert [item['text'] for item in segments.segments_between(50.0, 70.0)] == ["긴 노래 가사", "마지막"]
+    assert segments.text_between(15.0, 30.0) == "긴 노래 가사\n다른 말"
+    assert segments.segments_between(101.0, 200.0) == []
+
+def test_parse_timestamp():
+    assert parse_timestamp("12:30") == 750.0
+    assert parse_timestamp("1:02:03.5") == 3723.5
+    assert parse_timestamp(42) == 42.0
+
+def test_store_ttl_and_lru_eviction(tmp_path):
+    store = SegmentStore(str(tmp_path / 'segments'), ttl=60)
+    store.set_transcript('aaaaaaaaaaa', 'ko', False, items(10))
+    assert store.get_transcript('aaaaaaaaaaa', 'ko', False) == items(10)
+    assert store.get_transcript('aaaaaaaaaaa', 'ko', True) is None
+
+    # 수정 시각이 TTL보다 오래되면 만료
+    path = store.path_for('aaaaaaaaaaa', 'ko', False)
+    old = time.time() - 120
+    os.utime(path, (old, old))
+    assert store.get_transcript('aaaaaaaaaaa', 'ko', False) is None
+    assert not os.path.exists(path)
+    assert store.stats()['hits'] == 1 and store.stats()['misses'] == 2
+    store.close()
+
+    # 크기 제한을 넘으면 가장 오래 읽지 않은 파일부터 정리
+    size = TranscriptSegments.from_transcript(items(200)).nbytes()
+    store = SegmentStore(str(tmp_path / 'lru'), max_bytes=size * 2)
+    for i, video_id in enumerate(['video000001', 'video000002']):
+        store.set_transcript(video_id, 'ko', False, items(200))
+        os.utime(store.path_for(video_id, 'ko', False), (1000 + i, 1000 + i))
+    store.get_transcript('video000001', 'ko', False)
+    store.set_transcript('video000003', 'ko', False, items(200))
+    assert store.get_transcript('video000002', 'ko', False) is None
+    assert store.get_transcript('video000001', 'ko', False) is not None
+    assert store.stats()['entries'] == 2
+    store.close()
+
+def test_store_close_releases_opened_segments(tmp_path):
+    with SegmentStore(str(tmp_path / 'segments')) as store:
+        store.set_transcript('bbbbbbbbbbb', 'en', True, items(5))
+        first = store.get_transcript('bbbbbbbbbbb', 'en', True)
+        second = store.get_transcript('bbbbbbbbbbb', 'en', True)
+        assert first[0]['text'] == "0번째 자막 항목 ✓"
+    assert first.closed and second.closed
+    with pytest.raises(ValueError):
+        first.text(0)
+    # 닫은 뒤에도 새로 열 수 있음
+    reopened = store.get_transcript('bbbbbbbbbbb', 'en', True)
+    assert not reopened.closed
+    reopened.close()
@@ -0,0 +1,145 @@
+"""
+sync.SyncState / sync_sources 상태 변화 테스트
+
+yt_dlp 목록 조회와 run_batch를 바꿔 넣어, 연속 동기화 사이에 올라온 영상이
+한도(max_new)를 넘더라도 빠지지 않고 다음 동기화 때 이어서 처리되는지 확인한다.
+
+사용법:
+    python -m pytest -q tests
+"""
+import io
+import json
+
+import pytest
+
+import sync
+from sync import CHANNEL, DONE, FAILED, MAX_ATTEMPTS, PENDING, PLAYLIST, SKIPPED, SyncState, find_new_videos
+
+CHANNEL_URL = "https://www.youtube.com/@example/videos"
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PLexample"
+
+def video_id(n):
+    return f"video{n:06d}"
+
+class FakeSource:
+    """목록 조회와 배치 처리를 흉내 내는 가짜 소스 (uploads는 업로드 순서)"""
+
+    def __init__(self, monkeypatch, newest_first=True, failing=()):
+        self.uploads = []
+        self.newest_first = newest_first
+        self.failing = set(failing)
+        self.processed = []
+        monkeypatch.setattr(sync, 'iter_flat_entries', self.entries)
+        monkeypatch.setattr(sync, 'run_batch', self.run_batch)
+
+    def upload(self, count):
+        start = len(self.uploads)
+        self.uploads.extend(video_id(n) for n in range(start, start + count))
+
+    def entries(self, source_url):
+        ids = reversed(self.uploads) if self.newest_first else self.uploads
+        return iter([{'video_id': vid, 'title': vid, 'upload_date': None} for vid in ids])
+
+    def run_batch(self, urls, *args, out=None, **kwargs):
+        for url in urls:
+            vid = url.rsplit('=', 1)[1]
+            self.processed.append(vid)
+            status = 'error' if vid in self.failing else 'ok'
+            out.write(json.dumps({'video_id': vid, 'status': status}) + "\n")
+        return {'total': len(urls)}
+
+@pytest.fixture
+def state(tmp_path):
+    return SyncState(str(tmp_path / 'sync.sqlite3'))
+
+def run_sync(source_url, state, **kwargs):
+    return sync.sync_sources([source_url], out=io.StringIO(), state=state, **kwargs)
+
+def statuses(state, source_url):
+    with state._lock:
+        rows = state._conn.execute("SELECT video_id, status FROM videos WHERE source_url = ?", (source_url,)).fetchall()
+    return dict(rows)
+
+def test_channel_overflow_is_resumed_on_next_sync(monkeypatch, state):
+    source = FakeSource(monkeypatch)
+    source.upload(10)
+
+    # 처음 동기화: 최신 2개만 처리
+    summary = run_sync(CHANNEL_URL, state, initial=2, max_new=3)
+    assert source.processed == [video_id(9), video_id(8)]
+    assert summary['pending'] == 0
+
+    # 한도보다 많은 7개가 올라온 뒤 두 번 연속 동기화해도 하나도 빠지지 않음
+    source.upload(7)
+    summary = run_sync(CHANNEL_URL, state, initial=2, max_new=3)
+    assert source.processed[2:] == [video_id(16), video_id(15), video_id(14)]
+    assert summary['new'] == 3
+    assert summary['pending'] == 4
+    assert state.pending(CHANNEL_URL) == [video_id(n) for n in (13, 12, 11, 10)]
+
+    source.upload(1)
+    summary = run_sync(CHANNEL_URL, state, initial=2, max_new=3)
+    assert source.processed[5:] == [video_id(17), video_id(13), video_id(12)]
+    assert (summary['new'], summary['resumed'], summary['pending']) == (1, 2, 2)
+
+    summary = run_sync(CHANNEL_URL, state, initial=2, max_new=3)
+    assert source.processed[8:] == [video_id(11), video_id(10)]
+    assert (summary['new'], summary['resumed'], summary['pending']) == (0, 2, 0)
+
+    # 첫 동기화에서 넘긴 과거 영상은 처리하지 않고, 그 뒤의 영상은 모두 한 번씩 처리
+    assert sorted(source.processed) == [video_id(n) for n in range(8, 18)]
+    recorded = statuses(state, CHANNEL_URL)
+    assert all(recorded[video_id(n)] == DONE for n in range(8, 18))
+    assert state.pending(CHANNEL_URL) == []
+
+def test_channel_walk_stops_at_watermark(monkeypatch, state):
+    source = FakeSource(monkeypatch)
+    source.upload(5)
+    run_sync(CHANNEL_URL, state, initial=1)
+    source.upload(2)
+
+    # 기준점 이전 영상(첫 동기화에서 넘긴 영상)은 새 영상으로 다시 잡히지 않음
+    new_videos, newest, skipped, backlog = find_new_videos(state, CHANNEL_URL, CHANNEL, initial=1, max_new=10)
+    assert [entry['video_id'] for entry in new_videos] == [video_id(6), video_id(5)]
+    assert newest['video_id'] == video_id(6)
+    assert skipped == backlog == []
+
+def test_playlist_first_sync_skips_later_overflow_is_pending(monkeypatch, state):
+    source = FakeSource(monkeypatch, newest_first=False)
+    source.upload(4)
+
+    run_sync(PLAYLIST_URL, state, initial=2, max_new=2)
+    assert source.processed == [video_id(2), video_id(3)]
+    recorded = statuses(state, PLAYLIST_URL)
+    assert recorded[video_id(0)] == recorded[video_id(1)] == SKIPPED
+
+    source.upload(3)
+    summary = run_sync(PLAYLIST_URL, state, initial=2, max_new=2)
+    assert source.processed[2:] == [video_id(5), video_id(6)]
+    assert statuses(state, PLAYLIST_URL)[video_id(4)] == PENDING
+    assert summary['pending'] == 1
+
+    run_sync(PLAYLIST_URL, state, initial=2, max_new=2)
+    assert source.processed[4:] == [video_id(4)]
+    assert statuses(state, PLAYLIST_URL)[video_id(4)] == DONE
+
+def test_failed_videos_are_retried_up_to_max_attempts(monkeypatch, state):
+    source = FakeSource(monkeypatch, failing={video_id(0)})
+    source.upload(1)
+
+    for _ in range(MAX_ATTEMPTS + 1):
+        run_sync(CHANNEL_URL, state)
+    assert source.processed == [video_id(0)] * MAX_ATTEMPTS
+    assert statuses(state, CHANNEL_URL)[video_id(0)] == FAILED
+    assert state.retryable(CHANNEL_URL) == []
+
+def test_dry_run_records_nothing(monkeypatch, state):
+    source = FakeSource(monkeypatch)
+    source.upload(3)
+    out = io.StringIO()
+    sync.sync_sources([CHANNEL_URL], out=out, state=state, initial=2, dry_run=True)
+
+    assert source.processed == []
+    assert [json.loads(line)['status'] for line in out.getvalue().splitlines()] == ['pending', 'pending']
+    assert state.watermark(CHANNEL_URL) is None
+    assert statuses(state, CHANNEL_URL) == {}
@@ -0,0 +1,234 @@
+"""
+YouTube 영상 메타데이터(제목, 채널명) 조회
+
+yt_dlp의 전체 extract_info는 포맷/플레이어 JS/서명까지 해석하기 때문에 느리다.
+제목과 채널명만 필요하므로 다음 순서로 가벼운 경로부터 시도한다.
+
+1. 디스크 캐시
+2. oEmbed (API 키 불필요)
+3. YouTube Data API videos.list (YOUTUBE_API_KEY가 있을 때, 최대 50개 일괄 조회)
+4. yt_dlp (포맷 처리 생략)
+5. yt_dlp 전체 extract_info (최후의 수단)
+
+검색 결과에 붙이는 영상 길이/자막 여부(contentDetails)는 fetch_video_details_batch()로
+검색 페이지마다 videos.list 한 번에 조회한다.
+"""
+import json
+import os
+import re
+import threading
+import urllib.parse
+from cache import CACHE_DIR, DiskCache
+from clients import get_youtube_client
+import metrics
+
+OEMBED_URL = "https://www.youtube.com/oembed"
+# videos.list 한 번에 조회할 수 있는 최대 ID 수
+VIDEOS_LIST_MAX_IDS = 50
+REQUEST_TIMEOUT = 10
+
+_metadata_cache = None
+_metadata_cache_lock = threading.Lock()
+_details_cache = None
+
+# ISO 8601 기간 (contentDetails.duration, 예: PT1H2M3S, P1DT2H, 라이브 중이면 P0D)
+DURATION_PATTERN = re.compile(
+    r'^P(?:(?P<days>\d+)D)?(?:T(?:(?P<hours>\d+)H)?(?:(?P<minutes>\d+)M)?(?:(?P<seconds>\d+)S)?)?$'
+)
+
+def get_metadata_cache():
+    """CLI와 웹 앱이 공유하는 메타데이터 캐시 (TTL 1일)"""
+    global _metadata_cache
+    with _metadata_cache_lock:
+        if _metadata_cache is None:
+            _metadata_cache = DiskCache(
+                os.path.join(CACHE_DIR, 'metadata.sqlite3'),
+                ttl=24 * 3600,
+                max_bytes=20 * 1024 * 1024
+            )
+        return _metadata_cache
+
+def get_details_cache():
+    """검색 결과용 영상 길이/자막 여부 캐시 (TTL 1일, 자막은 나중에 추가될 수 있음)"""
+    global _details_cache
+    with _metadata_cache_lock:
+        if _details_cache is None:
+            _details_cache = DiskCache(
+                os.path.join(CACHE_DIR, 'details.sqlite3'),
+                ttl=24 * 3600,
+                max_bytes=10 * 1024 * 1024
+            )
+        return _details_cache
+
+def parse_duration(value):
+    """ISO 8601 기간 문자열을 초 단위로 변환 (형식이 다르면 None)"""
+    match = DURATION_PATTERN.match(value or '')
+    if not match:
+        return None
+    parts = {name: int(number or 0) for name, number in match.groupdict().items()}
+    return ((parts['days'] * 24 + parts['hours']) * 60 + parts['minutes']) * 60 + parts['seconds']
+
+def video_url_for(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def _fetch_oembed(video_id):
+    """oEmbed 엔드포인트로 제목/채널명 조회"""
+    import urllib.request
+    query = urllib.parse.urlencode({'url': video_url_for(video_id), 'format': 'json'})
+    with urllib.request.urlopen(f"{OEMBED_URL}?{query}", timeout=REQUEST_TIMEOUT) as response:
+        data = json.loads(response.read().decode('utf-8'))
+    return {'title': data['title'], 'channel': data['author_name']}
+
+def _fetch_videos_list(video_ids, api_key):
+    """YouTube Data API videos.list로 여러 영상을 한 번에 조회 (최대 50개)"""
+    youtube = get_youtube_client(api_key)
+    response = youtube.videos().list(
+        part='snippet',
+        id=','.join(video_ids),
+        maxResults=VIDEOS_LIST_MAX_IDS
+    ).execute()
+    return {
+        item['id']: {'title': item['snippet']['title'], 'channel': item['snippet']['channelTitle']}
+        for item in response.get('items', [])
+    }
+
+def _fetch_video_details(video_ids, api_key):
+    """videos.list(part=contentDetails)로 여러 영상의 길이/자막 여부 조회 (최대 50개)"""
+    youtube = get_youtube_client(api_key)
+    response = youtube.videos().list(
+        part='contentDetails',
+        id=','.join(video_ids),
+        maxResults=VIDEOS_LIST_MAX_IDS
+    ).execute()
+    details = {}
+    for item in response.get('items', []):
+        content = item.get('contentDetails', {})
+        details[item['id']] = {
+            'duration_seconds': parse_duration(content.get('duration')),
+            # 업로더가 올린 자막만 'true' (자동 생성 자막은 여기에 표시되지 않음)
+            'has_captions': content.get('caption') == 'true',
+        }
+    return details
+
+def _fetch_yt_dlp(video_id, process=False):
+    """yt_dlp로 조회 (process=False면 포맷 선택/서명 해석 생략)"""
+    import yt_dlp
+    ydl_opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'skip_download': True,
+    }
+    with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        info = ydl.extract_info(video_url_for(video_id), download=False, process=process)
+    if not info or not info.get('title'):
+        raise Exception("yt_dlp가 영상 정보를 반환하지 않았습니다.")
+    return {
+        'title': info.get('title', 'Unknown_Title'),
+        'channel': info.get('uploader') or info.get('channel') or 'Unknown_Channel',
+    }
+
+def fetch_video_metadata(video_id, api_key=None):
+    """
+    영상 하나의 메타데이터 조회
+    반환값: {'title': ..., 'channel': ...} 또는 모든 경로 실패 시 None
+    """
+    cache = get_metadata_cache()
+    cached = cache.get(video_id)
+    if cached:
+        return cached
+
+    api_key = api_key or os.getenv('YOUTUBE_API_KEY')
+    fetchers = [('oembed', lambda: _fetch_oembed(video_id))]
+    if api_key:
+        fetchers.append(('youtube_data_api', lambda: _fetch_videos_list([video_id], api_key)[video_id]))
+    fetchers.append(('yt_dlp', lambda: _fetch_yt_dlp(video_id, process=False)))
+    fetchers.append(('yt_dlp', lambda: _fetch_yt_dlp(video_id, process=True)))
+
+    for service, fetcher in fetchers:
+        try:
+            metadata = fetcher()
+        except Exception:
+            # 다음 경로로 넘어가는 것을 재시도로 기록
+            metrics.count_request(service, 'error')
+            metrics.count_retry('metadata', reason=service)
+            continue
+        metrics.count_request(service)
+        cache.set(video_id, metadata)
+        return metadata
+
+    return None
+
+def fetch_video_metadata_batch(video_ids, api_key=None):
+    """
+    여러 영상의 메타데이터를 한 번에 조회
+    캐시에 없는 영상은 videos.list로 50개씩 묶어 조회하고, 그래도 없으면 개별 조회로 넘어간다.
+    반환값: {video_id: {'title': ..., 'channel': ...}} (조회 실패한 영상은 제외)
+    """
+    cache = get_metadata_cache()
+    api_key = api_key or os.getenv('YOUTUBE_API_KEY')
+    results = {}
+    missing = []
+    for video_id in dict.fromkeys(video_ids):
+        cached = cache.get(video_id)
+        if cached:
+            results[video_id] = cached
+        else:
+            missing.append(video_id)
+
+    if api_key:
+        for i in range(0, len(missing), VIDEOS_LIST_MAX_IDS):
+            chunk = missing[i:i + VIDEOS_LIST_MAX_IDS]
+            try:
+                fetched = _fetch_videos_list(chunk, api_key)
+            except Exception as e:
+                metrics.count_request('youtube_data_api', 'error')
+                print(f"⚠️ videos.list 일괄 조회 실패: {e}")
+                continue
+            metrics.count_request('youtube_data_api')
+            for video_id, metadata in fetched.items():
+                cache.set(video_id, metadata)
+                results[video_id] = metadata
+
+    for video_id in missing:
+        if video_id not in results:
+            metadata = fetch_video_metadata(video_id, api_key)
+            if metadata:
+                results[video_id] = metadata
+
+    return results
+
+def fetch_video_details_batch(video_ids, api_key=None):
+    """
+    여러 영상의 길이/자막 여부를 한 번에 조회 (검색 결과 보강용)
+    캐시에 없는 영상만 videos.list(part=contentDetails)로 50개씩 묶어 조회한다.
+    반환값: ({video_id: {'duration_seconds': ..., 'has_captions': ...}}, videos.list 호출 수)
+    조회 실패한 영상은 결과에서 빠진다.
+    """
+    cache = get_details_cache()
+    api_key = api_key or os.getenv('YOUTUBE_API_KEY')
+    results = {}
+    missing = []
+    for video_id in dict.fromkeys(video_ids):
+        cached = cache.get(video_id)
+        if cached:
+            results[video_id] = cached
+        else:
+            missing.append(video_id)
+
+    api_calls = 0
+    if api_key:
+        for i in range(0, len(missing), VIDEOS_LIST_MAX_IDS):
+            chunk = missing[i:i + VIDEOS_LIST_MAX_IDS]
+            api_calls += 1
+            try:
+                fetched = _fetch_video_details(chunk, api_key)
+            except Exception as e:
+                metrics.count_request('youtube_data_api', 'error')
+                print(f"⚠️ videos.list(contentDetails) 조회 실패: {e}")
+                continue
+            metrics.count_request('youtube_data_api')
+            for video_id, details in fetched.items():
+                cache.set(video_id, details)
+                results[video_id] = details
+
+    return results, api_calls